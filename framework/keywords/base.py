@@ -12,6 +12,12 @@ import time
 import functools
 from playwright.sync_api import Page, Locator, expect, Error as PlaywrightTimeoutError, BrowserContext
 
+from contextlib import nullcontext
+from ..utils.screenshot_policy import CAPTURE_FULL_PAGE, page_screenshot_options
+from ..utils.step_timing import PHASE_ACTION
+from ..utils.page_registry import PageRegistry
+from ..utils.wait_profile import resolve_wait_profile
+
 # 全局变量，用于在测试会话结束时报告总的sleep时间
 _total_sleep_time = 0.0
 
@@ -47,16 +53,19 @@ def _log_action(func):
         if data_content:
             details['data_content'] = data_content
         
-        # 开始记录步骤
+        # 开始记录步骤（执行前截图取自步骤的目标页面）
         self.report_logger.start_step(
             keyword=keyword_name,
             description=description,
-            details=details
+            details=details,
+            step_id=kwargs.get('编号', ''),
+            page=self._step_page_hint(**kwargs)
         )
         
         try:
-            # 执行原函数
-            result = func(*args, **kwargs)
+            # 执行原函数（其中的页面定位、元素定位单独计时，不计入操作本身）
+            with self._time_phase(PHASE_ACTION):
+                result = func(*args, **kwargs)
             # 结束记录步骤（成功）
             self.report_logger.end_step('PASS')
             return result
@@ -72,6 +81,8 @@ def _log_action(func):
 
 class Keywords:
     DEFAULT_TIMEOUT = 10000
+    # get_by_text 匹配到多个元素时的处理策略（auto/first/strict），可在 test_config.json 的 locator 节中配置
+    TEXT_MATCH_STRATEGY = 'auto'
 
     def __init__(self, page: Page, report_logger=None):
         """
@@ -80,11 +91,57 @@ class Keywords:
         """
         self.context: BrowserContext = page.context
         self.active_page: Page = page  # 初始活动页面是主页面
+        # 事件驱动的页面注册表（每个上下文一个），按打开顺序记录存活页面
+        self.page_registry = PageRegistry.for_context(self.context)
         self.report_logger = report_logger  # ReportLogger实例，用于记录测试步骤
+        if report_logger is not None and hasattr(report_logger, 'follow'):
+            # 切换/新开页面后，报告截图跟随当前活动页面
+            report_logger.follow(lambda: self.active_page)
+        self.text_match_strategy = self.TEXT_MATCH_STRATEGY
+        # 本流程最近一次失败截图的路径，报告钩子据此关联截图（并发批次共用截图目录，不能按修改时间查找）
+        self.failure_screenshot = None
+        # 页面等待档位：test_config.json 的 page_wait，流程可以用 set_page_wait 覆盖
+        self.page_wait_config = None
+        self.wait_profile = resolve_wait_profile()
+        self._page_wait_key = None
         
         # 将默认超时应用到初始页面
         self.active_page.set_default_timeout(self.DEFAULT_TIMEOUT)
         
         # 从上下文中获取运行模式
         self.mode = getattr(self.context, 'running_mode', 'headed')
-        self.expect = expect
\ No newline at end of file
+        self.expect = expect
+
+    def set_page_wait(self, flow_page_wait=None):
+        """按流程的 page_wait 覆盖全局等待档位（page_wait_config），为空时恢复全局配置"""
+        key = (self.page_wait_config, flow_page_wait)
+        if key == self._page_wait_key:
+            return
+        self._page_wait_key = key
+        self.wait_profile = resolve_wait_profile(self.page_wait_config, flow_page_wait)
+        print(f"  [页面等待] 使用等待档位 '{self.wait_profile.name}'")
+
+    def _screenshot_mode(self):
+        """[内部] 当前的截图范围（full_page/viewport/element），跟随报告记录器的配置"""
+        return getattr(self.report_logger, 'capture_mode', CAPTURE_FULL_PAGE) if self.report_logger else CAPTURE_FULL_PAGE
+
+    def _screenshot_options(self):
+        """[内部] 对整个页面截图（失败截图等）时传给 page.screenshot() 的参数"""
+        return page_screenshot_options(self._screenshot_mode())
+
+    def _time_phase(self, phase):
+        """[内部] 为当前步骤的某个阶段计时（见 step_timing），没有报告记录器时不计时"""
+        if self.report_logger is not None and hasattr(self.report_logger, 'time_phase'):
+            return self.report_logger.time_phase(phase)
+        return nullcontext()
+
+    def _step_page_hint(self, **kwargs):
+        """
+        [内部] 步骤执行前按'页面'列确定目标页面，用于执行前截图。
+        只查找已经存在的页面，不等待、不校验；无法确定时返回 None（使用当前活动页面）。
+        """
+        page_index_str = str(kwargs.get('页面', '')).strip()
+        if not page_index_str.isdigit():
+            return None
+        page_index = int(page_index_str) - 1
+        return self.page_registry.get(page_index)
@@ -4,11 +4,64 @@
 提供页面元素定位和查找相关的关键字
 """
 
-import re
-import ast
 import pytest
 from playwright.sync_api import Page, Locator
 
+from ..utils.locator_compiler import compile_locator, bind_locator
+from ..utils.step_timing import PHASE_LOCATOR
+
+# get_by_text 匹配到多个元素时的处理策略：
+#   auto   - 直接返回定位器，只有操作真正触发严格模式违规时才改用第一个元素（默认）
+#   first  - 始终使用第一个匹配的元素
+#   strict - 保持 Playwright 的严格模式，匹配多个元素时报错
+TEXT_MATCH_STRATEGIES = ('auto', 'first', 'strict')
+DEFAULT_TEXT_MATCH_STRATEGY = 'auto'
+
+# auto 策略下遇到严格模式违规会改用第一个元素重试的 Locator 方法
+AMBIGUITY_RETRY_METHODS = (
+    'click', 'dblclick', 'tap', 'hover', 'focus', 'fill', 'clear', 'type', 'press', 'press_sequentially',
+    'check', 'uncheck', 'set_checked', 'select_option', 'set_input_files', 'drag_to', 'wait_for',
+    'scroll_into_view_if_needed', 'text_content', 'inner_text', 'inner_html', 'input_value',
+    'get_attribute', 'is_visible', 'is_enabled', 'is_checked', 'screenshot',
+)
+
+
+def _is_strict_mode_violation(error):
+    return "strict mode violation" in str(error).lower()
+
+
+class AmbiguousTextLocator(Locator):
+    """
+    get_by_text 在 auto 策略下返回的定位器。
+    与原定位器共享同一个底层对象，元素唯一时行为完全相同；
+    操作触发严格模式违规时，改用第一个匹配的元素重试一次。
+    """
+
+    def __init__(self, locator: Locator, text):
+        super().__init__(locator._impl_obj)
+        self._ambiguous_text = text
+
+    def run_with_fallback(self, action):
+        """执行 action(locator)，遇到严格模式违规时改用第一个元素重试"""
+        try:
+            return action(self)
+        except Exception as e:
+            if not _is_strict_mode_violation(e):
+                raise
+            print(f"    [定位器] get_by_text('{self._ambiguous_text}') 匹配到多个元素，使用第一个")
+            return action(self.first)
+
+
+def _make_retrying_method(name):
+    def method(self, *args, **kwargs):
+        return self.run_with_fallback(lambda locator: getattr(Locator, name)(locator, *args, **kwargs))
+    method.__name__ = name
+    return method
+
+
+for _method_name in AMBIGUITY_RETRY_METHODS:
+    setattr(AmbiguousTextLocator, _method_name, _make_retrying_method(_method_name))
+
 
 class ElementLocatorMixin:
     """元素定位Mixin类
@@ -16,44 +69,51 @@ class ElementLocatorMixin:
     提供页面元素定位和查找相关的方法实现。
     """
     
-    def _execute_codegen_node(self, node, scope):
-        """
-        [内部] 递归地执行AST（抽象语法树）节点。
-        这是Codegen安全执行引擎的核心部分，用于解析和调用方法。
-        """
-        if isinstance(node, ast.Call):
-            callable_method = self._execute_codegen_node(node.func, scope)
-            allowed_globals = {"re": re}
-            args = [eval(ast.unparse(arg), allowed_globals) for arg in node.args]
-            kwargs = {kw.arg: eval(ast.unparse(kw.value), allowed_globals) for kw in node.keywords}
-            return callable_method(*args, **kwargs)
-        elif isinstance(node, ast.Attribute):
-            parent_object = self._execute_codegen_node(node.value, scope)
-            return getattr(parent_object, node.attr)
-        elif isinstance(node, ast.Name):
-            if node.id in scope:
-                return scope[node.id]
-            raise NameError(f"在codegen的安全作用域中找不到名字: '{node.id}'")
-        else:
-            raise TypeError(f"不支持的Codegen AST节点类型: {type(node)}")
- 
     def _execute_safe_codegen(self, code_str: str, page_obj: Page) -> Locator:
         """
-        [内部] 使用AST解释器安全地执行Codegen字符串。
-        确保只在给定的page对象上执行，防止不安全代码。
+        [内部] 安全地执行Codegen字符串。
+        字符串只会被解析为以 page 开头的属性/方法调用链（编译结果有缓存），
+        并且只在给定的page对象上执行，防止不安全代码。
         """
+        operations = compile_locator('codegen', code_str)
         try:
-            full_code_to_parse = f"page.{code_str}"
-            tree = ast.parse(full_code_to_parse, mode='eval')
-            safe_scope = {'page': page_obj}
-            result = self._execute_codegen_node(tree.body, safe_scope)
+            result = bind_locator(operations, page_obj)
             if not isinstance(result, Locator):
                 raise TypeError("Codegen链式调用最终未返回一个Locator对象")
             return result
         except Exception as e:
             raise ValueError(f"解析或执行 Codegen 字符串 '{code_str}' 失败: {e}")
  
+    def _get_text_locator(self, target_page: Page, target) -> Locator:
+        """
+        [内部] 按文本定位元素，匹配多个元素时按 text_match_strategy 处理。
+        不再预先调用 count()，避免每个步骤多一次浏览器往返。
+        """
+        strategy = str(getattr(self, 'text_match_strategy', DEFAULT_TEXT_MATCH_STRATEGY)).lower()
+        locator = target_page.get_by_text(target)
+        if strategy == 'first':
+            return locator.first
+        if strategy == 'strict':
+            return locator
+        return AmbiguousTextLocator(locator, target)
+
+    def _run_with_text_fallback(self, locator: Locator, action):
+        """[内部] 执行 action(locator)，对 auto 策略的文本定位器在严格模式违规时改用第一个元素重试"""
+        if isinstance(locator, AmbiguousTextLocator):
+            return locator.run_with_fallback(action)
+        return action(locator)
+
     def _get_locator(self, **kwargs) -> Locator:
+        """
+        [内部] 获取步骤的Locator，并告知报告记录器，以便 element 截图范围只截取该元素。
+        """
+        with self._time_phase(PHASE_LOCATOR):
+            locator = self._resolve_locator(**kwargs)
+        if getattr(self, 'report_logger', None):
+            self.report_logger.note_locator(locator)
+        return locator
+
+    def _resolve_locator(self, **kwargs) -> Locator:
         """
         [内部] 关键字驱动框架的定位核心。
         根据Excel数据动态选择定位策略（css, xpath, get_by_role, codegen等）
@@ -66,57 +126,15 @@ class ElementLocatorMixin:
         if not locator_type or not target:
             raise ValueError("关键字缺少'定位方式'或'目标对象'")
 
-        if locator_type == 'css':
-            return target_page.locator(target)
-        if locator_type == 'xpath':
-            return target_page.locator(f"xpath={target}")
         if locator_type == 'get_by_text':
-            # 处理严格模式违规问题：如果匹配多个元素，使用first()
-            try:
-                locator = target_page.get_by_text(target)
-                # 检查是否匹配多个元素
-                count = locator.count()
-                if count > 1:
-                    print(f"    [定位器] get_by_text('{target}') 匹配到{count}个元素，使用第一个")
-                    return locator.first()
-                return locator
-            except Exception as e:
-                # 如果出现严格模式违规，直接使用first()
-                if "strict mode violation" in str(e).lower():
-                    print(f"    [定位器] get_by_text('{target}') 严格模式违规，使用第一个元素")
-                    return target_page.get_by_text(target).first()
-                else:
-                    raise e
-        if locator_type == 'get_by_label':
-            return target_page.get_by_label(target)
-        if locator_type == 'get_by_placeholder':
-            return target_page.get_by_placeholder(target)
+            return self._get_text_locator(target_page, target)
+        if locator_type == 'codegen':
+            return self._execute_safe_codegen(target, target_page)
         if locator_type == 'get_by_role':
-            combined_args_str = target
-            data_content = str(kwargs.get('数据内容', ''))
-            if data_content and re.search(r'^\s*\w+\s*=', data_content):
-                if not combined_args_str.endswith(','):
-                    combined_args_str += ','
-                combined_args_str += data_content
-            modifier_match = re.search(r'(\.(first|last|nth\(\d+\)))$', combined_args_str)
-            core_args_str, modifier_str = (combined_args_str[:-len(modifier_match.group(1))].strip(), modifier_match.group(1)) if modifier_match else (combined_args_str, "")
+            # 参数在编译阶段解析（结果有缓存），这里只需绑定到目标页面
+            operations = compile_locator(locator_type, target, kwargs.get('数据内容', ''))
             try:
-                tree = ast.parse(f"f({core_args_str})")
-                call_node = tree.body[0].value
-                allowed_globals = {"re": re}
-                args = [arg.id if isinstance(arg, ast.Name) else eval(ast.unparse(arg), allowed_globals) for arg in call_node.args]
-                kwargs_dict = {kw.arg: eval(ast.unparse(kw.value), allowed_globals) for kw in call_node.keywords}
-                base_locator = target_page.get_by_role(*args, **kwargs_dict)
-                return eval(f"base_locator{modifier_str}", {"base_locator": base_locator}) if modifier_str else base_locator
+                return bind_locator(operations, target_page)
             except Exception as e:
-                raise ValueError(f"解析 get_by_role 参数 '{combined_args_str}' 失败: {e}")
-        if locator_type == 'chain':
-            parts, scope = [part.strip() for part in target.split('>>')], target_page
-            for part in parts:
-                if not part: raise ValueError(f"链式定位器 '{target}' 中包含空部分")
-                scope = scope.locator(part)
-            return scope
-        if locator_type == 'codegen':
-            return self._execute_safe_codegen(target, target_page)
-        
-        raise ValueError(f"不支持的定位方式: '{locator_type}'")
\ No newline at end of file
+                raise ValueError(f"解析 get_by_role 参数 '{target}' 失败: {e}")
+        return bind_locator(compile_locator(locator_type, target), target_page)
\ No newline at end of file
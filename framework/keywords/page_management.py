@@ -9,6 +9,10 @@ import time
 import pytest
 from playwright.sync_api import Page, Error as PlaywrightTimeoutError
 from .base import _log_action
+from ..utils.step_plan import get_step_args
+from ..utils.page_registry import DOM_READY_STATES
+from ..utils.page_wait_metrics import page_wait_metrics, WAIT_CREATE, WAIT_READY, WAIT_RECOVERY, WAIT_FALLBACK
+from ..utils.step_timing import PHASE_PAGE
 
 
 class PageManagementMixin:
@@ -18,6 +22,16 @@ class PageManagementMixin:
     """
 
     def _get_target_page(self, **kwargs) -> Page:
+        """
+        [内部] 获取步骤的目标页面，并告知报告记录器，以便执行后截图取自该页面。
+        """
+        with self._time_phase(PHASE_PAGE):
+            page = self._resolve_target_page(**kwargs)
+        if getattr(self, 'report_logger', None) and page is not None:
+            self.report_logger.note_page(page)
+        return page
+
+    def _resolve_target_page(self, **kwargs) -> Page:
         """
         [内部] 根据Excel中的'页面'列获取目标Page对象。
         如果'页面'列为空，则返回当前的活动页面(self.active_page)。
@@ -38,22 +52,26 @@ class PageManagementMixin:
             if page_index < 0:
                 raise ValueError("页码必须是正整数。")
 
-            # 智能页面等待机制 - 分层等待策略
-            current_pages_count = len(self.context.pages)
+            # 智能页面等待机制 - 分层等待策略（各项等待的次数和耗时按页码计入 page_wait_metrics）
+            started = page_wait_metrics.now()
+            current_pages_count = len(self.page_registry)
             required_pages_count = page_index + 1
             
             print(f"  [页面定位] 请求页面 {page_index_str} (索引: {page_index}), 当前页面数: {current_pages_count}, 需要页面数: {required_pages_count}")
             
             if current_pages_count > page_index:
                 # 页面已存在，进行状态验证
-                target_page = self.context.pages[page_index]
+                target_page = self.page_registry.get(page_index)
                 if self._validate_page_state(target_page, page_index_str):
                     print(f"  [页面定位] ✓ 目标页面指定为 页{page_index_str} ({target_page.url})")
                     return target_page
                 else:
                     print(f"  [页面定位] ⚠ 页面{page_index_str}状态异常，尝试恢复...")
                     # 尝试状态恢复
-                    if self._recover_page_state(target_page):
+                    recover_started = page_wait_metrics.now()
+                    recovered = self._recover_page_state(target_page)
+                    page_wait_metrics.record(WAIT_RECOVERY, required_pages_count, recover_started, ok=recovered)
+                    if recovered:
                         print(f"  [页面定位] ✓ 页面状态恢复成功")
                         return target_page
                     else:
@@ -62,14 +80,18 @@ class PageManagementMixin:
                 # 页面不存在，实施智能等待策略
                 print(f"  [页面等待] 页面{page_index_str}不存在，启动智能等待机制...")
                 
-                # 基础等待 - 等待页面对象存在 (8秒，增加等待时间)
-                waited_page = self._wait_for_page_creation(required_pages_count, timeout_ms=8000)
+                # 基础等待 - 等待页面对象存在（时长由等待档位决定）
+                waited_page = self._wait_for_page_creation(required_pages_count, timeout_ms=self.wait_profile.page_create_ms)
+                page_wait_metrics.record(WAIT_CREATE, required_pages_count, started, ok=waited_page)
                 if waited_page:
                     print(f"  [页面等待] ✓ 基础等待成功，页面已创建")
-                    target_page = self.context.pages[page_index]
+                    target_page = self.page_registry.get(page_index)
                     
-                    # 状态等待 - 等待页面加载完成 (15秒，增加等待时间)
-                    if self._wait_for_page_ready(target_page, timeout_ms=15000):
+                    # 状态等待 - 等待页面加载完成
+                    ready_started = page_wait_metrics.now()
+                    page_ready = self._wait_for_page_ready(target_page, timeout_ms=self.wait_profile.page_ready_ms)
+                    page_wait_metrics.record(WAIT_READY, required_pages_count, ready_started, ok=page_ready)
+                    if page_ready:
                         print(f"  [页面等待] ✓ 页面状态验证通过")
                         print(f"  [页面定位] ✓ 目标页面指定为 页{page_index_str} ({target_page.url})")
                         return target_page
@@ -78,24 +100,26 @@ class PageManagementMixin:
                         return target_page  # 返回页面，让调用者处理
                 else:
                     # 页面确实不存在，采用容错策略：使用最后一个可用页面
-                    if len(self.context.pages) > 0:
-                        fallback_page = self.context.pages[-1]  # 使用最后一个页面作为替代
-                        print(f"  [容错机制] 页面{page_index_str}不存在，使用最后页面作为替代: 页{len(self.context.pages)} ({fallback_page.url})")
+                    if len(self.page_registry.pages) > 0:
+                        fallback_page = self.page_registry.pages[-1]  # 使用最后一个页面作为替代
+                        page_wait_metrics.record(WAIT_FALLBACK, required_pages_count, started, ok=False)
+                        print(f"  [容错机制] 页面{page_index_str}不存在，使用最后页面作为替代: 页{len(self.page_registry.pages)} ({fallback_page.url})")
                         return fallback_page
                     
             # 所有等待策略都失败，提供详细的错误信息
-            current_pages = [f"页面{i+1}: {page.url}" for i, page in enumerate(self.context.pages)]
+            current_pages = [f"页面{i+1}: {page.url}" for i, page in enumerate(self.page_registry.pages)]
             error_detail = f"\n当前打开的页面列表:\n" + "\n".join(current_pages) if current_pages else "\n当前没有打开的页面"
             
             # 使用警告而不是失败，让测试继续进行
             warning_msg = (f"⚠ [页面等待] 无法获取页面 '{page_index_str}'，" +
-                         f"当前页面总数: {len(self.context.pages)}, 请求页面索引: {page_index}" +
+                         f"当前页面总数: {len(self.page_registry.pages)}, 请求页面索引: {page_index}" +
                          error_detail)
             print(warning_msg)
             
             # 返回主页面作为最后的容错机制
-            if len(self.context.pages) > 0:
-                return self.context.pages[0]
+            page_wait_metrics.record(WAIT_FALLBACK, required_pages_count, started, ok=False)
+            if len(self.page_registry.pages) > 0:
+                return self.page_registry.pages[0]
             else:
                 pytest.fail("严重错误: 没有任何可用的页面")
                        
@@ -108,6 +132,7 @@ class PageManagementMixin:
         """
         [内部] 验证页面状态是否正常。
         检查页面可见性、加载状态、DOM就绪等关键指标。
+        DOM状态优先取页面注册表按加载事件记录的值，只有状态未知时才通过 evaluate 查询页面。
         """
         try:
             # 1. 检查页面是否关闭
@@ -121,24 +146,28 @@ class PageManagementMixin:
                 print(f"    [状态验证] 页面{page_name}URL无效: {current_url}")
                 return False
             
-            # 3. 检查DOM就绪状态 (非阻塞检查)
-            try:
-                ready_state = page.evaluate('document.readyState', timeout=1000)
-                if ready_state not in ['interactive', 'complete']:
-                    print(f"    [状态验证] 页面{page_name}DOM未就绪: {ready_state}")
+            # 3. 检查DOM就绪状态（已记录的状态无需与浏览器通信）
+            ready_state = self.page_registry.ready_state(page)
+            if ready_state is None:
+                try:
+                    ready_state = page.evaluate('document.readyState')
+                except:
+                    print(f"    [状态验证] 页面{page_name}无法获取DOM状态")
                     return False
-            except:
-                print(f"    [状态验证] 页面{page_name}无法获取DOM状态")
-                return False
-            
-            # 4. 检查JavaScript环境
-            try:
-                js_available = page.evaluate('typeof window', timeout=1000)
-                if js_available != 'object':
-                    print(f"    [状态验证] 页面{page_name}JavaScript环境不可用")
+                
+                # 4. 检查JavaScript环境（DOM状态来自加载事件时，JavaScript环境必然可用）
+                try:
+                    js_available = page.evaluate('typeof window')
+                    if js_available != 'object':
+                        print(f"    [状态验证] 页面{page_name}JavaScript环境不可用")
+                        return False
+                except:
+                    print(f"    [状态验证] 页面{page_name}JavaScript环境检查失败")
                     return False
-            except:
-                print(f"    [状态验证] 页面{page_name}JavaScript环境检查失败")
+                self.page_registry.record_ready_state(page, ready_state)
+            
+            if ready_state not in DOM_READY_STATES:
+                print(f"    [状态验证] 页面{page_name}DOM未就绪: {ready_state}")
                 return False
             
             print(f"    [状态验证] 页面{page_name}状态正常")
@@ -151,27 +180,29 @@ class PageManagementMixin:
     def _recover_page_state(self, page: Page) -> bool:
         """
         [内部] 尝试恢复页面状态。
-        对于状态异常的页面，尝试修复或重新加载。
+        对于状态异常的页面，尝试修复或重新加载。各步的等待时间由等待档位决定。
         """
+        wait = self.wait_profile
         try:
-            # 1. 尝试等待页面加载完成
-            try:
-                page.wait_for_load_state('networkidle', timeout=3000)
-                return True
-            except PlaywrightTimeoutError:
-                pass
+            # 1. 尝试等待页面加载完成（档位关闭了 networkidle 等待时跳过）
+            if wait.waits_for_networkidle:
+                try:
+                    page.wait_for_load_state('networkidle', timeout=wait.networkidle_ms)
+                    return True
+                except PlaywrightTimeoutError:
+                    pass
             
             # 2. 尝试等待DOM就绪
             try:
-                page.wait_for_load_state('domcontentloaded', timeout=2000)
+                page.wait_for_load_state('domcontentloaded', timeout=wait.recover_load_ms)
                 return True
             except PlaywrightTimeoutError:
                 pass
             
             # 3. 最后尝试重新刷新页面
             try:
-                page.reload(timeout=5000)
-                page.wait_for_load_state('domcontentloaded', timeout=3000)
+                page.reload(timeout=wait.reload_ms)
+                page.wait_for_load_state('domcontentloaded', timeout=wait.reload_load_ms)
                 return True
             except PlaywrightTimeoutError:
                 pass
@@ -185,38 +216,20 @@ class PageManagementMixin:
     def _wait_for_page_creation(self, required_count: int, timeout_ms: int = 5000) -> bool:
         """
         [内部] 等待页面创建直到满足数量要求。
-        使用短时间轮询策略，避免无限等待。
+        由页面注册表等待 page 事件，页面数满足要求时立即返回，不再轮询和 sleep。
         """
-        import time
-        start_time = time.time()
-        timeout_seconds = timeout_ms / 1000
-        
-        # 增加初始检查
-        initial_count = len(self.context.pages)
+        initial_count = len(self.page_registry)
         if initial_count >= required_count:
             return True
             
         print(f"    [页面等待] 当前{initial_count}个页面，需要{required_count}个，等待新页面创建...")
         
-        while time.time() - start_time < timeout_seconds:
-            current_count = len(self.context.pages)
-            if current_count >= required_count:
-                print(f"    [页面等待] 成功：当前已有{current_count}个页面")
-                return True
-            
-            # 短时间等待新页面事件（增加等待时间）
-            try:
-                self.context.wait_for_event('page', timeout=1000)  # 从500ms增加到1000ms
-                print(f"    [页面等待] 检测到新页面事件，当前页面数: {len(self.context.pages)}")
-            except PlaywrightTimeoutError:
-                pass  # 继续轮询
-            
-            # 添加微小的睡眠，避免过度消耗CPU
-            time.sleep(0.1)
+        if self.page_registry.wait_for_count(required_count, timeout_ms):
+            print(f"    [页面等待] 成功：当前已有{len(self.page_registry)}个页面")
+            return True
         
-        final_count = len(self.context.pages)
-        print(f"    [页面等待] 超时：最终页面数{final_count}，需要{required_count}")
-        return final_count >= required_count
+        print(f"    [页面等待] 超时：最终页面数{len(self.page_registry)}，需要{required_count}")
+        return False
     
     def _wait_for_page_ready(self, page: Page, timeout_ms: int = 10000) -> bool:
         """
@@ -227,11 +240,12 @@ class PageManagementMixin:
             # 1. 等待基本加载完成
             page.wait_for_load_state('domcontentloaded', timeout=timeout_ms)
             
-            # 2. 等待网络活动稳定（可选）
-            try:
-                page.wait_for_load_state('networkidle', timeout=3000)
-            except PlaywrightTimeoutError:
-                pass  # 网络活动稳定不是必须的
+            # 2. 等待网络活动稳定（可选，档位的 networkidle_ms 为 0 时跳过）
+            if self.wait_profile.waits_for_networkidle:
+                try:
+                    page.wait_for_load_state('networkidle', timeout=self.wait_profile.networkidle_ms)
+                except PlaywrightTimeoutError:
+                    pass  # 网络活动稳定不是必须的
             
             # 3. 验证最终状态
             return self._validate_page_state(page, "目标")
@@ -384,10 +398,9 @@ class PageManagementMixin:
         此操作会覆盖当前活动页面的内容。
         数据内容: 要打开的URL, [可选的超时秒数] e.g., "http://a.com,60"
         """
-        data_content = str(kwargs.get('数据内容', ''))
-        parts = [p.strip() for p in data_content.split(',')]
-        url = parts[0]
-        timeout_ms = int(parts[1]) * 1000 if len(parts) > 1 else self.DEFAULT_TIMEOUT
+        url, timeout_ms = get_step_args('open', kwargs)
+        if timeout_ms is None:
+            timeout_ms = self.DEFAULT_TIMEOUT
         print(f"执行 [打开页面]: {url} (在当前活动页上)")
         start_time = time.time()
         try:
@@ -429,8 +442,8 @@ class PageManagementMixin:
         description = kwargs.get('描述', f'设置窗口大小为 {size_str}')
         print(f"执行 [{description}]")
         try:
-            width, height = map(int, size_str.split('x'))
-            self.active_page.set_viewport_size({"width": width, "height": height})
-        except ValueError:
-            pytest.fail(f"窗口大小格式错误: '{size_str}', 期望 '宽x高'")
+            width, height = get_step_args('set_window_size', kwargs)
+        except ValueError as e:
+            pytest.fail(str(e))
+        self.active_page.set_viewport_size({"width": width, "height": height})
         print(f"✓ [{description}] 成功")
\ No newline at end of file
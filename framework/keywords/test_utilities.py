@@ -8,6 +8,7 @@ import time
 import pytest
 from playwright.sync_api import Page
 from .base import _log_action, _total_sleep_time
+from ..utils.screenshot_policy import CAPTURE_ELEMENT
 
 
 class TestUtilitiesMixin:
@@ -37,12 +38,16 @@ class TestUtilitiesMixin:
         """
         [关键字] 对当前目标页面进行截图。
         数据内容: [可选] 截图保存的路径和文件名 (e.g., "reports/screenshots/login_success.png")
+        截图范围跟随 screenshot_mode 配置；element 范围下提供了定位方式/目标对象时只截取该元素。
         """
         path = str(kwargs.get('数据内容', 'screenshot.png'))
         description = kwargs.get('描述', f'截图到 {path}')
         print(f"执行 [{description}]")
-        target_page = self._get_target_page(**kwargs)
-        target_page.screenshot(path=path, full_page=True)
+        if self._screenshot_mode() == CAPTURE_ELEMENT and kwargs.get('定位方式') and kwargs.get('目标对象'):
+            self._get_locator(**kwargs).screenshot(path=path)
+        else:
+            target_page = self._get_target_page(**kwargs)
+            target_page.screenshot(path=path, **self._screenshot_options())
         print(f"✓ [{description}] 成功")
 
     def wait_until(self, **kwargs):
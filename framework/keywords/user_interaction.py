@@ -8,6 +8,7 @@ import os
 import pytest
 from playwright.sync_api import Error as PlaywrightTimeoutError
 from .base import _log_action
+from ..utils.step_plan import get_step_args
 
 
 class UserInteractionMixin:
@@ -38,11 +39,11 @@ class UserInteractionMixin:
         description = kwargs.get('描述', f'滚动页面 {scroll_data}')
         print(f"执行 [{description}]")
         try:
-            delta_x, delta_y = map(int, scroll_data.split(','))
-            self.active_page.mouse.wheel(delta_x, delta_y)
-            print(f"✓ [{description}] 成功")
-        except ValueError:
-            pytest.fail(f"滚动数据格式错误: '{scroll_data}', 期望格式为 'x,y' (例如 '0,500')")
+            delta_x, delta_y = get_step_args('scroll_page', kwargs)
+        except ValueError as e:
+            pytest.fail(str(e))
+        self.active_page.mouse.wheel(delta_x, delta_y)
+        print(f"✓ [{description}] 成功")
  
     @_log_action
     def drag_and_drop(self, **kwargs):
@@ -82,12 +83,10 @@ class UserInteractionMixin:
         print(f"执行 [{description}]")
         
         try:
-            # 解析 x, y 坐标
-            pos_dict = dict(item.split("=") for item in position_data.replace(" ", "").split(','))
-            x_pos = float(pos_dict['x'])
-            y_pos = float(pos_dict['y'])
-        except Exception:
-            pytest.fail(f"位置数据格式错误: '{position_data}', 期望格式为 'x=数值,y=数值'")
+            # 解析 x, y 坐标（执行计划已预解析时直接使用）
+            x_pos, y_pos = get_step_args('click_at_position', kwargs)
+        except ValueError as e:
+            pytest.fail(str(e))
         
         locator_type = str(kwargs.get('定位方式', '')).lower()
         
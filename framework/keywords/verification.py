@@ -314,11 +314,13 @@ class VerificationMixin:
             if 'element' in verify_type:
                 locator = self._get_locator(**kwargs)
                 if verify_type == 'element_visible':
-                    self.expect(locator).to_be_visible()
+                    self._run_with_text_fallback(locator, lambda loc: self.expect(loc).to_be_visible())
                 elif verify_type == 'element_text_equals':
-                    self.expect(locator).to_have_text(str(kwargs.get('数据内容', '')))
+                    expected_text = str(kwargs.get('数据内容', ''))
+                    self._run_with_text_fallback(locator, lambda loc: self.expect(loc).to_have_text(expected_text))
                 elif verify_type == 'element_text_contains':
-                    self.expect(locator).to_contain_text(str(kwargs.get('数据内容', '')))
+                    expected_text = str(kwargs.get('数据内容', ''))
+                    self._run_with_text_fallback(locator, lambda loc: self.expect(loc).to_contain_text(expected_text))
                 else:
                     pytest.fail(f"不支持的元素验证类型: '{verify_type}'")
             elif verify_type == 'url_contains':
@@ -0,0 +1,137 @@
+# framework/utils/context_pool.py
+"""
+浏览器上下文池
+
+Function模式下每个流程默认使用 pytest-playwright 新建的上下文和页面，流程结束后销毁，
+每个流程都要付出一次创建上下文的开销。开启 execution.reuse_context 后，流程从 ContextPool 借用预先创建好的上下文：
+流程结束时用 reset_context 重置后放回池中，下一个流程直接复用，不再重新创建。重置失败的上下文会被关闭丢弃，下次借用时重新创建。
+
+重置内容：
+    - 关闭所有页面并新建一个空白页：sessionStorage 随标签页一起丢弃，
+      set_window_size 等对页面视口的修改也不再保留（新页面使用创建上下文时 browser_context_args 的视口）
+    - 清除 cookie 和授予的权限
+    - 清除流程访问过的所有源的 localStorage：源列表取自 context.storage_state()，
+      逐个源把新页面导航过去清除，导航请求由 route 拦截返回空页面，不会真正访问网站
+
+注意：复用的上下文由 browser.new_context(**browser_context_args) 创建，不经过 pytest-playwright 的 context fixture，
+因此 --tracing / --video 等录制选项对其不生效；IndexedDB、Service Worker 等存储也不会被清除。
+"""
+from collections import deque
+
+BLANK_URL = 'about:blank'
+
+# 清除当前源的 localStorage / sessionStorage（无法访问存储的页面直接跳过）
+_CLEAR_STORAGE_SCRIPT = "() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }"
+
+
+def storage_origins(context):
+    """返回上下文中保存了 localStorage 的源（如 https://example.com）"""
+    origins = context.storage_state().get('origins', [])
+    return [entry['origin'] for entry in origins
+            if entry.get('localStorage') and entry.get('origin', '').startswith(('http://', 'https://'))]
+
+
+def _fulfill_blank(route):
+    route.fulfill(status=200, content_type='text/html', body='<html></html>')
+
+
+def clear_origin_storage(page, origin):
+    """在 page 上打开 origin（请求被拦截，返回空页面）并清除该源的存储"""
+    pattern = f"{origin}/**"
+    page.route(pattern, _fulfill_blank)
+    try:
+        page.goto(f"{origin}/")
+        page.evaluate(_CLEAR_STORAGE_SCRIPT)
+    finally:
+        page.unroute(pattern, _fulfill_blank)
+
+
+def reset_context(context):
+    """
+    把上下文恢复为刚创建时的状态：关闭所有页面并新建一个页面，清除 cookie、授予的权限和各源的 localStorage，
+    最后停在 about:blank。返回新建的页面。
+    """
+    for page in list(context.pages):
+        if not page.is_closed():
+            page.close()
+    page = context.new_page()
+    context.clear_cookies()
+    context.clear_permissions()
+    for origin in storage_origins(context):
+        clear_origin_storage(page, origin)
+    page.goto(BLANK_URL)
+    return page
+
+
+class ContextPool:
+    """预先创建并在流程之间复用浏览器上下文的池"""
+
+    def __init__(self, factory, reset=reset_context, size=1):
+        """
+        :param factory: 创建新上下文的函数，如 lambda: browser.new_context(**browser_context_args)
+        :param reset: 归还时重置上下文的函数，抛出异常时该上下文被关闭丢弃
+        :param size: 池中最多保留的空闲上下文数
+        """
+        self._factory = factory
+        self._reset = reset
+        try:
+            self.size = max(1, int(size))
+        except (TypeError, ValueError):
+            self.size = 1
+        self._idle = deque()
+        self._in_use = []
+        # 新建的上下文数，以及借用时直接使用池中空闲上下文的次数
+        self.created = 0
+        self.reused = 0
+
+    def _create(self):
+        context = self._factory()
+        if not context.pages:
+            context.new_page()
+        self.created += 1
+        return context
+
+    def warm(self):
+        """预先创建上下文，直到池中的上下文数达到 size"""
+        while len(self._idle) + len(self._in_use) < self.size:
+            self._idle.append(self._create())
+
+    def acquire(self):
+        """借出一个上下文（其中至少有一个页面），池中没有空闲上下文时新建"""
+        if self._idle:
+            context = self._idle.popleft()
+            self.reused += 1
+        else:
+            context = self._create()
+        self._in_use.append(context)
+        return context
+
+    def release(self, context):
+        """归还上下文：重置后放回池中；重置失败或池已满时关闭"""
+        if context in self._in_use:
+            self._in_use.remove(context)
+        try:
+            self._reset(context)
+        except Exception as e:
+            print(f"[上下文池] 重置浏览器上下文失败，将关闭并在下次重新创建: {e}")
+            self._close_context(context)
+            return
+        if len(self._idle) < self.size:
+            self._idle.append(context)
+        else:
+            self._close_context(context)
+
+    def close(self):
+        """关闭池中所有上下文（包括尚未归还的）"""
+        contexts = list(self._idle) + self._in_use
+        self._idle.clear()
+        self._in_use = []
+        for context in contexts:
+            self._close_context(context)
+
+    @staticmethod
+    def _close_context(context):
+        try:
+            context.close()
+        except Exception as e:
+            print(f"[上下文池] 关闭浏览器上下文失败: {e}")
@@ -0,0 +1,148 @@
+# framework/utils/duration_history.py
+"""
+耗时历史记录
+
+每次执行后把各测试流程及其步骤的耗时写入 test_data/duration_history.json，
+以 file_path + sheet_name + browser 作为流程的键。
+执行器根据历史耗时把流程按"最长优先"排序和装箱，让并行批次尽量同时结束。
+"""
+import os
+import json
+import time
+from contextlib import contextmanager
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DEFAULT_HISTORY_PATH = os.path.join(project_root, 'test_data', 'duration_history.json')
+
+# 新旧耗时的平滑系数：越大越偏向最近一次的耗时
+SMOOTHING = 0.5
+
+# Session模式下步骤字典中记录所属流程的键，值为 {"file_path": ..., "sheet_name": ...}
+FLOW_META_KEY = '_flow'
+
+
+def flow_key(file_path, sheet_name, browser):
+    """构造流程在历史记录中的键"""
+    normalized_path = os.path.normcase(os.path.normpath(str(file_path or '')))
+    return f"{normalized_path}|{sheet_name}|{str(browser or 'chromium').lower()}"
+
+
+def _smooth(previous, current):
+    if previous is None:
+        return current
+    return round(previous * (1 - SMOOTHING) + current * SMOOTHING, 3)
+
+
+@contextmanager
+def _file_lock(path, timeout=10.0, stale_after=60.0):
+    """
+    基于锁文件的跨进程互斥，避免并发批次同时改写历史文件。
+    超过 stale_after 秒的锁文件视为残留并强制清理。
+    """
+    lock_path = f"{path}.lock"
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > stale_after:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"等待耗时历史文件锁超时: {lock_path}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+
+class DurationHistory:
+    """流程/步骤耗时历史的读取与更新"""
+
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_HISTORY_PATH
+        self.records = self._read()
+        # 本次执行中新记录、尚未写回文件的数据
+        self._pending = {}
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def estimate(self, file_path, sheet_name, browser):
+        """返回流程的预估耗时（秒），没有历史记录时返回 None"""
+        record = self.records.get(flow_key(file_path, sheet_name, browser))
+        return record.get('duration') if record else None
+
+    def estimate_flow(self, flow, browser=None):
+        """根据 test_config.json 中的流程配置返回预估耗时（秒）"""
+        return self.estimate(flow.get('file_path'), flow.get('sheet_name'), browser or flow.get('browser'))
+
+    def estimate_flows(self, flows, browser=None):
+        """
+        返回与 flows 一一对应的预估耗时列表（秒）。
+        没有历史记录的流程按同组已知耗时的中位数估算，全部未知时为 0。
+        """
+        estimates = [self.estimate_flow(flow, browser) for flow in flows]
+        known = sorted(estimate for estimate in estimates if estimate is not None)
+        fallback = known[len(known) // 2] if known else 0.0
+        return [fallback if estimate is None else estimate for estimate in estimates]
+
+    def record(self, file_path, sheet_name, browser, duration=None, step_durations=None):
+        """
+        记录一次执行的耗时，调用 save() 后才会写入文件。
+
+        Args:
+            duration: 流程耗时（秒），为空时按步骤耗时之和计算
+            step_durations: {步骤编号: 耗时(毫秒)}，同一次执行中多次记录会累加
+        """
+        key = flow_key(file_path, sheet_name, browser)
+        pending = self._pending.setdefault(key, {'duration': 0.0, 'steps': {}, 'has_duration': False})
+        if duration is not None:
+            pending['duration'] += float(duration)
+            pending['has_duration'] = True
+        for step_id, step_ms in (step_durations or {}).items():
+            step_id = str(step_id)
+            pending['steps'][step_id] = pending['steps'].get(step_id, 0) + float(step_ms)
+
+    def save(self):
+        """把本次记录的耗时与文件中已有的历史合并后写回"""
+        if not self._pending:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with _file_lock(self.path):
+            records = self._read()
+            for key, pending in self._pending.items():
+                record = records.get(key, {})
+                duration = pending['duration'] if pending['has_duration'] else sum(pending['steps'].values()) / 1000
+                steps = dict(record.get('steps', {}))
+                for step_id, step_ms in pending['steps'].items():
+                    steps[step_id] = _smooth(steps.get(step_id), round(step_ms, 1))
+                records[key] = {
+                    'duration': _smooth(record.get('duration'), round(duration, 3)),
+                    'last': round(duration, 3),
+                    'runs': record.get('runs', 0) + 1,
+                    'steps': steps,
+                    'updated': time.strftime('%Y-%m-%d %H:%M:%S'),
+                }
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(records, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        self.records = records
+        self._pending = {}
@@ -0,0 +1,209 @@
+# framework/utils/locator_compiler.py
+"""
+定位器编译缓存
+
+把 (定位方式, 目标对象, 数据内容) 编译为一组与页面无关的操作序列，
+执行时只需把操作序列依次应用到目标页面上即可得到 Locator。
+get_by_role 的参数解析、codegen 字符串的 AST 解析、chain 的拆分都只在首次编译时进行，
+编译结果按 LRU 策略缓存，循环执行或重复使用同一目标对象的步骤不再重复解析。
+
+定位参数只允许字面量：常量、列表、元组、字典、集合、正负数，以及 re.compile(...)
+和 re.IGNORECASE 这类正则标志，其它表达式一律拒绝，不再经过 eval。
+"""
+import re
+import ast
+from functools import lru_cache
+
+# 缓存的定位器编译结果数量上限
+LOCATOR_CACHE_SIZE = 512
+
+# 只有 get_by_role 会把 数据内容 合并进定位参数，其它定位方式编译时忽略 数据内容，提高缓存命中率
+DATA_CONTENT_LOCATOR_TYPES = ('get_by_role',)
+
+# 编译结果支持的定位方式
+COMPILED_LOCATOR_TYPES = ('css', 'xpath', 'get_by_label', 'get_by_placeholder', 'get_by_role', 'chain', 'codegen')
+
+
+def _attr(name):
+    """操作：读取属性，如 .first"""
+    return ('attr', name, (), ())
+
+
+def _call(name, args=(), kwargs=None):
+    """操作：调用方法，如 .locator("#id")"""
+    return ('call', name, tuple(args), tuple((kwargs or {}).items()))
+
+
+# re.compile 允许使用的正则标志
+_REGEX_FLAGS = {name: getattr(re, name) for name in (
+    'I', 'IGNORECASE', 'M', 'MULTILINE', 'S', 'DOTALL', 'X', 'VERBOSE', 'A', 'ASCII', 'U', 'UNICODE'
+)}
+
+
+def _eval_regex_flags(node):
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) \
+            and node.value.id == 're' and node.attr in _REGEX_FLAGS:
+        return _REGEX_FLAGS[node.attr]
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        return _eval_regex_flags(node.left) | _eval_regex_flags(node.right)
+    if isinstance(node, ast.Constant) and isinstance(node.value, int) and not isinstance(node.value, bool):
+        return node.value
+    raise ValueError(f"不支持的正则标志: {ast.unparse(node)}")
+
+
+def _eval_regex(node):
+    """处理 re.compile(pattern[, flags])"""
+    if node.args and len(node.args) <= 2 and all(kw.arg == 'flags' for kw in node.keywords) \
+            and len(node.args) + len(node.keywords) <= 2:
+        pattern = _eval_argument(node.args[0])
+        if isinstance(pattern, str):
+            flag_nodes = node.args[1:] + [kw.value for kw in node.keywords]
+            flags = _eval_regex_flags(flag_nodes[0]) if flag_nodes else 0
+            return re.compile(pattern, flags)
+    raise ValueError(f"re.compile 参数格式错误: {ast.unparse(node)}")
+
+
+def _eval_argument(node):
+    """只计算字面量形式的定位参数，其它表达式抛出 ValueError"""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)) \
+            and isinstance(node.operand, ast.Constant) and isinstance(node.operand.value, (int, float)) \
+            and not isinstance(node.operand.value, bool):
+        return -node.operand.value if isinstance(node.op, ast.USub) else node.operand.value
+    if isinstance(node, ast.List):
+        return [_eval_argument(element) for element in node.elts]
+    if isinstance(node, ast.Tuple):
+        return tuple(_eval_argument(element) for element in node.elts)
+    if isinstance(node, ast.Set):
+        return {_eval_argument(element) for element in node.elts}
+    if isinstance(node, ast.Dict):
+        if any(key is None for key in node.keys):
+            raise ValueError("定位参数中的字典不支持 ** 展开")
+        return {_eval_argument(key): _eval_argument(value) for key, value in zip(node.keys, node.values)}
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+            and isinstance(node.func.value, ast.Name) and node.func.value.id == 're' and node.func.attr == 'compile':
+        return _eval_regex(node)
+    raise ValueError(f"定位参数只支持字面量和 re.compile(...)，不支持: {ast.unparse(node)}")
+
+
+def _eval_keywords(keywords):
+    if any(kw.arg is None for kw in keywords):
+        raise ValueError("定位参数不支持 ** 展开")
+    return {kw.arg: _eval_argument(kw.value) for kw in keywords}
+
+
+def _compile_get_by_role(target, data_content):
+    combined_args_str = target
+    if data_content and re.search(r'^\s*\w+\s*=', data_content):
+        if not combined_args_str.endswith(','):
+            combined_args_str += ','
+        combined_args_str += data_content
+    modifier_match = re.search(r'(\.(first|last|nth\(\d+\)))$', combined_args_str)
+    if modifier_match:
+        core_args_str = combined_args_str[:-len(modifier_match.group(1))].strip()
+        modifier_str = modifier_match.group(1)
+    else:
+        core_args_str, modifier_str = combined_args_str, ""
+    try:
+        tree = ast.parse(f"f({core_args_str})")
+        call_node = tree.body[0].value
+        args = [arg.id if isinstance(arg, ast.Name) else _eval_argument(arg) for arg in call_node.args]
+        kwargs = _eval_keywords(call_node.keywords)
+    except Exception as e:
+        raise ValueError(f"解析 get_by_role 参数 '{combined_args_str}' 失败: {e}")
+
+    operations = [_call('get_by_role', args, kwargs)]
+    if modifier_str.startswith('.nth('):
+        operations.append(_call('nth', [int(modifier_str[5:-1])]))
+    elif modifier_str:
+        operations.append(_attr(modifier_str[1:]))
+    return tuple(operations)
+
+
+def _compile_codegen_node(node):
+    """把 page.xxx(...).yyy 形式的 AST 转换为操作序列"""
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Attribute):
+            raise TypeError(f"不支持的Codegen调用: {ast.unparse(node.func)}")
+        args = [_eval_argument(arg) for arg in node.args]
+        kwargs = _eval_keywords(node.keywords)
+        return _compile_codegen_node(node.func.value) + [_call(node.func.attr, args, kwargs)]
+    if isinstance(node, ast.Attribute):
+        return _compile_codegen_node(node.value) + [_attr(node.attr)]
+    if isinstance(node, ast.Name):
+        if node.id != 'page':
+            raise NameError(f"在codegen的安全作用域中找不到名字: '{node.id}'")
+        return []
+    raise TypeError(f"不支持的Codegen AST节点类型: {type(node)}")
+
+
+def _compile_codegen(target):
+    try:
+        tree = ast.parse(f"page.{target}", mode='eval')
+        return tuple(_compile_codegen_node(tree.body))
+    except Exception as e:
+        raise ValueError(f"解析或执行 Codegen 字符串 '{target}' 失败: {e}")
+
+
+def _compile_chain(target):
+    parts = [part.strip() for part in target.split('>>')]
+    operations = []
+    for part in parts:
+        if not part:
+            raise ValueError(f"链式定位器 '{target}' 中包含空部分")
+        operations.append(_call('locator', [part]))
+    return tuple(operations)
+
+
+@lru_cache(maxsize=LOCATOR_CACHE_SIZE)
+def _compile_cached(locator_type, target, data_content):
+    if locator_type == 'css':
+        return (_call('locator', [target]),)
+    if locator_type == 'xpath':
+        return (_call('locator', [f"xpath={target}"]),)
+    if locator_type == 'get_by_label':
+        return (_call('get_by_label', [target]),)
+    if locator_type == 'get_by_placeholder':
+        return (_call('get_by_placeholder', [target]),)
+    if locator_type == 'get_by_role':
+        return _compile_get_by_role(target, data_content)
+    if locator_type == 'chain':
+        return _compile_chain(target)
+    if locator_type == 'codegen':
+        return _compile_codegen(target)
+    raise ValueError(f"不支持的定位方式: '{locator_type}'")
+
+
+def compile_locator(locator_type, target, data_content=''):
+    """
+    编译定位器，返回操作序列（元组）。相同参数的编译结果会被缓存。
+
+    Args:
+        locator_type: 定位方式（小写），见 COMPILED_LOCATOR_TYPES
+        target: 目标对象
+        data_content: 数据内容，仅 get_by_role 使用
+
+    Raises:
+        ValueError: 定位方式不支持或目标对象格式错误
+    """
+    data_content = str(data_content or '') if locator_type in DATA_CONTENT_LOCATOR_TYPES else ''
+    return _compile_cached(str(locator_type), str(target), data_content)
+
+
+def bind_locator(operations, page):
+    """把编译好的操作序列应用到页面上，返回最终得到的对象（通常是 Locator）"""
+    result = page
+    for kind, name, args, kwargs in operations:
+        member = getattr(result, name)
+        result = member(*args, **dict(kwargs)) if kind == 'call' else member
+    return result
+
+
+def locator_cache_info():
+    """返回编译缓存的命中统计"""
+    return _compile_cached.cache_info()
+
+
+def clear_locator_cache():
+    _compile_cached.cache_clear()
@@ -24,7 +24,26 @@ def ensure_test_config_exists():
     default_config = {
         "visual_mode": {
             "headed": True,
-            "slow_mo": 50
+            "slow_mo": 50,
+            "screenshot_policy": "full",
+            "screenshot_mode": "full_page",
+            "stream_step_report": False,
+            "report_assets": "embedded",
+            "report_memory_window": 50
+        },
+        "execution": {
+            "max_concurrency": 3,
+            "shards_per_browser": 1,
+            "results_jsonl": True,
+            "junit_xml": False,
+            "reuse_context": False,
+            "context_pool_size": 1
+        },
+        "locator": {
+            "text_match_strategy": "auto"
+        },
+        "page_wait": {
+            "profile": "default"
         },
         "test_flows": [
             {
@@ -0,0 +1,115 @@
+# framework/utils/page_registry.py
+"""
+事件驱动的页面注册表
+
+PageRegistry 对每个浏览器上下文只订阅一次 context 的 page 事件和各页面的 close 事件，
+按打开顺序维护当前存活的页面（与 Excel 中 1 起始的页码一一对应）。
+等待第 N 个页面出现时只需一次 context.wait_for_event('page', predicate=...)：
+页面数满足要求的那个事件到达时立即返回，不再循环轮询、也不再 sleep。
+
+Playwright 的同步 API 只在调用其方法时分发事件，注册表的事件回调先于等待条件注册，
+所以等待条件被检查时注册表中的页面已经是最新的。
+
+注册表同时按 domcontentloaded / load / framenavigated 事件记录每个页面的 document.readyState，
+页面状态校验直接读取记录的状态，只有状态未知时（注册前已加载的页面、刚导航尚未触发事件的页面）
+才需要通过 page.evaluate 查询。
+"""
+import functools
+
+# 注册表挂在 context 对象上的属性名，同一个上下文的多个 Keywords 实例共用一个注册表
+REGISTRY_ATTR = '_page_registry'
+
+# document.readyState 的取值
+READY_LOADING = 'loading'
+READY_INTERACTIVE = 'interactive'
+READY_COMPLETE = 'complete'
+# DOM 已就绪、可以操作的状态
+DOM_READY_STATES = (READY_INTERACTIVE, READY_COMPLETE)
+
+
+class PageRegistry:
+    """按打开顺序记录上下文中存活页面的注册表"""
+
+    def __init__(self, context):
+        self.context = context
+        self._pages = []
+        # 页面 -> 按事件记录的 readyState，未知时不在字典中
+        self._ready_states = {}
+        context.on('page', self._on_page)
+        for page in list(context.pages):
+            self._on_page(page)
+
+    @classmethod
+    def for_context(cls, context):
+        """返回上下文的页面注册表，不存在时创建"""
+        registry = getattr(context, REGISTRY_ATTR, None)
+        if registry is None:
+            registry = cls(context)
+            setattr(context, REGISTRY_ATTR, registry)
+        return registry
+
+    def _on_page(self, page):
+        if page in self._pages or page.is_closed():
+            return
+        self._pages.append(page)
+        page.on('close', self._on_close)
+        page.on('domcontentloaded', functools.partial(self._set_ready_state, page, READY_INTERACTIVE))
+        page.on('load', functools.partial(self._set_ready_state, page, READY_COMPLETE))
+        page.on('framenavigated', functools.partial(self._on_frame_navigated, page))
+
+    def _on_close(self, page):
+        if page in self._pages:
+            self._pages.remove(page)
+        self._ready_states.pop(page, None)
+
+    def _set_ready_state(self, page, state, _event_arg=None):
+        if page in self._pages:
+            self._ready_states[page] = state
+
+    def _on_frame_navigated(self, page, frame):
+        # 只关心主框架；同文档导航（hash/history）之后不会再有 load 事件，因此置为未知而不是 loading
+        if getattr(frame, 'parent_frame', None) is None:
+            self._ready_states.pop(page, None)
+
+    @property
+    def pages(self):
+        """当前存活的页面（按打开顺序）"""
+        return list(self._pages)
+
+    def __len__(self):
+        return len(self._pages)
+
+    def get(self, index):
+        """按 0 起始的索引返回页面，不存在时返回 None"""
+        if 0 <= index < len(self._pages):
+            return self._pages[index]
+        return None
+
+    def index_of(self, page):
+        """页面的 0 起始索引，不在注册表中时返回 None"""
+        try:
+            return self._pages.index(page)
+        except ValueError:
+            return None
+
+    def ready_state(self, page):
+        """按事件记录的页面 readyState，未知时返回 None"""
+        return self._ready_states.get(page)
+
+    def record_ready_state(self, page, state):
+        """记录通过 evaluate 查询到的 readyState，之后的事件会继续更新它"""
+        self._set_ready_state(page, state)
+
+    def wait_for_count(self, count, timeout_ms):
+        """
+        等待存活页面数达到 count，返回是否达到。
+        已经满足时立即返回；否则等待 page 事件，满足要求的事件到达时立即唤醒，超时后按实际页面数返回。
+        """
+        if len(self._pages) >= count:
+            return True
+        try:
+            self.context.wait_for_event('page', predicate=lambda _page: len(self._pages) >= count, timeout=timeout_ms)
+        except Exception:
+            # 超时或上下文已关闭，以实际页面数为准
+            pass
+        return len(self._pages) >= count
@@ -0,0 +1,90 @@
+# framework/utils/page_wait_metrics.py
+"""
+页面等待耗时统计
+
+按'页面'列定位页面时可能产生的等待，按页码（Excel 中 1 起始的页码）分别统计次数、失败次数和耗时：
+    create    - 等待新页面打开（_wait_for_page_creation）
+    ready     - 等待新页面加载就绪（_wait_for_page_ready）
+    recovery  - 页面状态异常时的恢复（_recover_page_state）
+    fallback  - 请求的页面不存在，改用其他页面替代（耗时为放弃前在定位该页面上花费的时间）
+统计结果在 pytest 会话结束时与 sleep 耗时一起输出，用于找出页面等待占主要耗时的流程。
+"""
+import threading
+import time
+
+WAIT_CREATE = 'create'
+WAIT_READY = 'ready'
+WAIT_RECOVERY = 'recovery'
+WAIT_FALLBACK = 'fallback'
+WAIT_KINDS = (WAIT_CREATE, WAIT_READY, WAIT_RECOVERY, WAIT_FALLBACK)
+
+WAIT_LABELS = {
+    WAIT_CREATE: '等待新页面',
+    WAIT_READY: '等待页面就绪',
+    WAIT_RECOVERY: '页面状态恢复',
+    WAIT_FALLBACK: '页面替代',
+}
+
+
+class PageWaitMetrics:
+    """按页码和等待类型累计页面等待的次数与耗时"""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (页码, 类型) -> {'count', 'failed', 'total_ms', 'max_ms'}
+        self._stats = {}
+
+    def now(self):
+        """当前时间，作为 record 的 started 参数"""
+        return self._clock()
+
+    def record(self, kind, page_number, started, ok=True):
+        """
+        记录一次页面等待。
+
+        :param kind: 等待类型，见 WAIT_KINDS
+        :param page_number: 1 起始的页码
+        :param started: 等待开始时 now() 的返回值
+        :param ok: 等待是否成功
+        """
+        elapsed_ms = max(0.0, (self._clock() - started) * 1000)
+        with self._lock:
+            stats = self._stats.setdefault((page_number, kind), {'count': 0, 'failed': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            stats['count'] += 1
+            stats['failed'] += 0 if ok else 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    def stats(self):
+        """返回 {(页码, 类型): 统计} 的副本，按页码和 WAIT_KINDS 的顺序排列"""
+        with self._lock:
+            keys = sorted(self._stats, key=lambda key: (key[0], WAIT_KINDS.index(key[1]) if key[1] in WAIT_KINDS else len(WAIT_KINDS)))
+            return {key: dict(self._stats[key]) for key in keys}
+
+    def total_ms(self):
+        """所有页面等待的总耗时（毫秒）"""
+        with self._lock:
+            return sum(stats['total_ms'] for stats in self._stats.values())
+
+    def __bool__(self):
+        return bool(self._stats)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def summary_lines(self):
+        """会话结束时输出的统计文字，每行一个页码的一种等待"""
+        lines = []
+        for (page_number, kind), stats in self.stats().items():
+            failed = f"，失败 {stats['failed']} 次" if stats['failed'] else ""
+            lines.append(f"页{page_number} {WAIT_LABELS.get(kind, kind)}: {stats['count']} 次{failed}，"
+                         f"共 {stats['total_ms'] / 1000:.2f} 秒，最长 {stats['max_ms']:.0f} ms")
+        if lines:
+            lines.append(f"页面等待总耗时: {self.total_ms() / 1000:.2f} 秒")
+        return lines
+
+
+# 当前进程的统计（与 _total_sleep_time 一样在会话结束时汇总输出）
+page_wait_metrics = PageWaitMetrics()
@@ -5,16 +5,30 @@
 @File: report_logger.py
 @Description: This module provides a logging utility to generate detailed HTML reports for test automation steps.
 """
-import base64
+import io
+import os
+import shutil
+import tempfile
 import time
+from contextlib import nullcontext
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
-from io import BytesIO
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from PIL import Image
 from playwright.sync_api import Page, Error
 
+from framework.utils import screenshot_encoder
+from framework.utils.report_writer import StepReportWriter
+from framework.utils.step_store import StepStore
+from framework.utils.step_timing import StepTimer, PHASE_LOGGER, PHASE_SCREENSHOT, timing_records
+from framework.utils.screenshot_policy import (
+    ScreenshotPolicy, CAPTURE_ELEMENT, ASSETS_EXTERNAL, normalize_capture_mode, page_screenshot_options
+)
+
+# Element captures give up quickly (e.g. the element vanished after a click) and fall back to the viewport
+ELEMENT_CAPTURE_TIMEOUT_MS = 1000
+
 
 @dataclass
 class LogStep:
@@ -26,12 +40,16 @@ class LogStep:
     description: str
     status: str = 'PASS'
     duration: float = 0.0
+    # Frame ids in ReportLogger.frames; identical frames share one id
     before_screenshot: Optional[str] = None
     after_screenshot: Optional[str] = None
     details: dict = field(default_factory=dict)
     error_message: Optional[str] = None
     timestamp: str = field(default_factory=lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
     page_url: str = ''
+    step_id: str = ''
+    # Per-phase breakdown in ms (page/locator/action/screenshot/logger), see framework.utils.step_timing
+    timings: dict = field(default_factory=dict)
 
 
 class ReportLogger:
@@ -39,65 +57,227 @@ class ReportLogger:
     Manages the logging of test steps and generates an HTML report.
     """
 
-    def __init__(self, page: Page):
+    def __init__(self, page: Page, screenshot_policy: Optional[ScreenshotPolicy] = None,
+                 asset_dir: Optional[str] = None, memory_window: Optional[int] = None):
         """
         Initializes the logger with a Playwright Page object.
 
         :param page: The Playwright page to interact with.
+        :param screenshot_policy: When to take step screenshots (defaults to before and after every step).
+        :param asset_dir: The report's screenshots directory, used when the policy's asset mode is 'external'.
+        :param memory_window: If set, only this many recent steps stay in memory; older steps and encoded
+                              screenshots are spilled to a temporary directory (for long session-scoped runs).
         """
         self.page = page
-        self.steps: List[LogStep] = []
+        self.screenshot_policy = screenshot_policy or ScreenshotPolicy()
+        self._spill_dir: Optional[str] = None
+        if memory_window:
+            self._spill_dir = tempfile.mkdtemp(prefix="report_logger_")
+            # The on_failure policy still updates the buffered steps after they finished, keep them in memory
+            window = max(int(memory_window), self.screenshot_policy.buffer_size + 1)
+            self.steps: Union[List[LogStep], StepStore] = StepStore(
+                window, os.path.join(self._spill_dir, 'steps.jsonl'), factory=LogStep)
+        else:
+            self.steps: Union[List[LogStep], StepStore] = []
         self._current_step: Optional[LogStep] = None
         self._step_start_time: Optional[float] = None
+        # Encoded screenshots, deduplicated by content hash. In the external asset mode they are written
+        # as files (with thumbnails) under <asset_dir>/steps and the report links to them.
+        if self.screenshot_policy.asset_mode == ASSETS_EXTERNAL and asset_dir:
+            self.frames = screenshot_encoder.FrameStore(asset_dir=os.path.join(asset_dir, 'steps'),
+                                                        asset_base=os.path.dirname(os.path.abspath(asset_dir)))
+        else:
+            self.frames = screenshot_encoder.FrameStore(
+                spill_dir=os.path.join(self._spill_dir, 'frames') if self._spill_dir else None)
+        # Raw (unencoded) before-frames of the most recent steps, used by the on_failure policy
+        self._frame_buffer = deque(maxlen=self.screenshot_policy.buffer_size)
+        # full_page / viewport / element, can be overridden per flow via set_capture_mode()
+        self.capture_mode = self.screenshot_policy.capture_mode
+        # The locator the current step resolved, used by the element capture mode
+        self._step_locator = None
+        # Set by stream_to(): finished steps are appended to an HTML file as they complete
+        self._stream_writer: Optional[StepReportWriter] = None
+        # Returns the page the keywords currently act on (Keywords.active_page), see follow()
+        self._page_source = None
+        # The page the current step resolved as its target, used for the after-step capture
+        self._step_page: Optional[Page] = None
+        # Per-phase timer of the current step
+        self._timer: Optional[StepTimer] = None
+        # Callbacks receiving every finished LogStep (e.g. the structured results emitter)
+        self._step_listeners = []
 
-    def take_screenshot(self, quality=50) -> Optional[str]:
+    def set_capture_mode(self, capture_mode: Optional[str] = None):
         """
-        Takes a screenshot, compresses it, and returns it as a Base64 encoded string.
+        Overrides the capture mode (e.g. from a flow's screenshot_mode). None restores the configured default.
+        """
+        try:
+            self.capture_mode = normalize_capture_mode(capture_mode, self.screenshot_policy.capture_mode)
+        except ValueError as e:
+            print(f"{e}, falling back to '{self.screenshot_policy.capture_mode}'")
+            self.capture_mode = self.screenshot_policy.capture_mode
 
-        :param quality: The quality of the compressed image (1-100).
-        :return: Base64 encoded string of the compressed screenshot, or None on failure.
+    def note_locator(self, locator):
+        """
+        Remembers the locator used by the current step so the element capture mode can clip to it.
+        """
+        if self._current_step:
+            self._step_locator = locator
+
+    def follow(self, page_source):
+        """
+        Makes screenshots follow the page the keywords act on instead of the page the logger was created with.
+
+        :param page_source: A callable returning the current active page (e.g. lambda: keywords.active_page).
+        """
+        self._page_source = page_source
+
+    def note_page(self, page: Page):
+        """
+        Remembers the page the current step targets (e.g. via the '页面' column) for the after-step capture.
+        """
+        if self._current_step:
+            self._step_page = page
+
+    def add_step_listener(self, listener):
         """
+        Registers a callback that is called with every finished LogStep, right after it is recorded.
+        Errors raised by the callback are printed and do not affect the test.
+        """
+        self._step_listeners.append(listener)
+
+    def time_phase(self, phase: str):
+        """
+        Context manager timing a phase (see framework.utils.step_timing) of the current step.
+        Outside of a step it does nothing.
+        """
+        if self._current_step and self._timer:
+            return self._timer.phase(phase)
+        return nullcontext()
+
+    @property
+    def current_page(self) -> Page:
+        """
+        The page the keywords currently act on, falling back to the page the logger was created with.
+        """
+        page = self._page_source() if self._page_source else None
+        return page or self.page
+
+    def _capture_page(self, page: Optional[Page] = None) -> Optional[Page]:
+        """
+        Picks the page to capture: the given page if it is still open, otherwise the active page.
+        Returns None when both are closed so no capture is attempted on a stale page.
+        """
+        for candidate in (page, self.current_page):
+            if candidate is not None and not candidate.is_closed():
+                return candidate
+        return None
+
+    def _capture_raw(self, locator=None, page: Optional[Page] = None) -> Optional[bytes]:
+        """
+        Captures the raw PNG bytes of the target page (or of the given locator in element mode), or None on failure.
+        """
+        if self.capture_mode == CAPTURE_ELEMENT and locator is not None:
+            try:
+                return locator.screenshot(timeout=ELEMENT_CAPTURE_TIMEOUT_MS)
+            except Exception:
+                # The element is gone or hidden; capture the viewport instead
+                pass
+        target_page = self._capture_page(page)
+        if target_page is None:
+            return None
         try:
-            screenshot_bytes = self.page.screenshot(full_page=True)
-            img = Image.open(BytesIO(screenshot_bytes))
-            
-            # Convert to RGB if it's RGBA to avoid issues with saving as JPEG
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-
-            buffered = BytesIO()
-            img.save(buffered, format="JPEG", quality=quality, optimize=True)
-            return base64.b64encode(buffered.getvalue()).decode('utf-8')
+            return target_page.screenshot(**page_screenshot_options(self.capture_mode))
         except Error as e:
             # Handle cases where the page or context might be closed
             print(f"Failed to take screenshot: {e}")
             return None
         except Exception as e:
-            # Handle other potential exceptions (e.g., from Pillow)
             print(f"An unexpected error occurred during screenshot: {e}")
             return None
 
-    def start_step(self, keyword: str, description: str, details: Optional[dict] = None):
+    def capture_screenshot(self, quality=50, locator=None, page: Optional[Page] = None) -> Optional[str]:
+        """
+        Captures the raw screenshot bytes and registers them in the frame store. Encoding happens in the
+        background, and a frame identical to an earlier one is not encoded again.
+
+        :param quality: The quality of the compressed image (1-100).
+        :param locator: The element to clip to in element capture mode.
+        :param page: The page to capture (defaults to the active page).
+        :return: The frame id, or None on failure.
+        """
+        with self._timer.phase(PHASE_SCREENSHOT) if self._timer else nullcontext():
+            screenshot_bytes = self._capture_raw(locator, page)
+        if screenshot_bytes is None:
+            return None
+        return self.frames.add(screenshot_bytes, quality)
+
+    def _flush_frame_buffer(self, quality=50):
+        """
+        Encodes the buffered before-frames (on_failure policy) so the report shows the steps leading up to a failure.
+        """
+        for step, screenshot_bytes in self._frame_buffer:
+            step.before_screenshot = self.frames.add(screenshot_bytes, quality)
+        self._frame_buffer.clear()
+
+    def _is_buffered(self, step: LogStep) -> bool:
+        """
+        Whether the step's before-frame is still in the on_failure frame buffer (not yet encoded or discarded).
+        """
+        return any(buffered is step for buffered, _ in self._frame_buffer)
+
+    def take_screenshot(self, quality=50) -> Optional[str]:
+        """
+        Takes a screenshot, compresses it, and returns it as a Base64 encoded string.
+
+        :param quality: The quality of the compressed image (1-100).
+        :return: Base64 encoded string of the compressed screenshot, or None on failure.
+        """
+        screenshot_bytes = self._capture_raw()
+        if screenshot_bytes is None:
+            return None
+        return screenshot_encoder.resolve(screenshot_encoder.submit_encode(screenshot_bytes, quality))
+
+    def wait_for_screenshots(self):
+        """
+        Blocks until every pending background screenshot encoding has finished.
+        """
+        self.frames.resolve_all()
+
+    def start_step(self, keyword: str, description: str, details: Optional[dict] = None, step_id: str = '',
+                   page: Optional[Page] = None):
         """
         Starts a new test step.
 
         :param keyword: The keyword or action being performed (e.g., 'click', 'fill').
         :param description: A human-readable description of the step.
         :param details: A dictionary with extra data like locators, values, etc.
+        :param step_id: The '编号' of the Excel row this step belongs to.
+        :param page: The page the step is expected to act on (defaults to the active page).
         """
         if self._current_step:
             # Auto-close the previous step if a new one starts
             self.end_step('PASS')
 
         self._step_start_time = time.time()
-        self._current_step = LogStep(
-            order=len(self.steps) + 1,
-            keyword=keyword,
-            description=description,
-            details=details or {},
-            before_screenshot=self.take_screenshot(),
-            page_url=self.page.url
-        )
+        self._step_locator = None
+        self._step_page = None
+        self._timer = StepTimer()
+        with self._timer.phase(PHASE_LOGGER):
+            before_page = self._capture_page(page)
+            self._current_step = LogStep(
+                order=len(self.steps) + 1,
+                keyword=keyword,
+                description=description,
+                details=details or {},
+                before_screenshot=self.capture_screenshot(page=before_page) if self.screenshot_policy.captures_before else None,
+                page_url=before_page.url if before_page else '',
+                step_id=str(step_id or '')
+            )
+            if self.screenshot_policy.buffers_before:
+                with self._timer.phase(PHASE_SCREENSHOT):
+                    screenshot_bytes = self._capture_raw(page=before_page)
+                if screenshot_bytes is not None:
+                    self._frame_buffer.append((self._current_step, screenshot_bytes))
 
     def end_step(self, status: str, error: Optional[str] = None):
         """
@@ -111,132 +291,102 @@ class ReportLogger:
 
         self._current_step.duration = round((time.time() - self._step_start_time) * 1000)  # in ms
         self._current_step.status = status
-        self._current_step.after_screenshot = self.take_screenshot()
+        with self._timer.phase(PHASE_LOGGER) if self._timer else nullcontext():
+            if self.screenshot_policy.captures_after(status):
+                # The page the step resolved, or the active page if the step switched/closed pages
+                self._current_step.after_screenshot = self.capture_screenshot(locator=self._step_locator,
+                                                                              page=self._step_page)
 
-        if status == 'FAIL':
-            self._current_step.error_message = error
-            self.add_failure_context()
+            if status == 'FAIL':
+                self._current_step.error_message = error
+                self.add_failure_context()
+                self._flush_frame_buffer()
+        if self._timer:
+            self._current_step.timings = self._timer.breakdown()
 
         self.steps.append(self._current_step)
+        for listener in self._step_listeners:
+            try:
+                listener(self._current_step)
+            except Exception as e:
+                print(f"Step listener failed: {e}")
+        if self._stream_writer:
+            # Rows whose screenshots are still being encoded are written on a later step (or on close)
+            self._stream_writer.add_step(self._current_step)
+            self._stream_writer.flush()
         self._current_step = None
         self._step_start_time = None
+        self._step_locator = None
+        self._step_page = None
+        self._timer = None
+
+    def timing_records(self) -> List[dict]:
+        """
+        Returns the per-step timing breakdown as JSON-serializable records, including the background
+        encode time of each screenshot frame (counted on the first step that references it).
+        """
+        self.wait_for_screenshots()
+        return timing_records(self.steps, self.frames.encode_ms)
 
     def add_failure_context(self):
         """
         Gathers additional context when a step fails, such as the current URL.
         """
-        if self._current_step:
-            self._current_step.page_url = self.page.url
+        failed_page = self._capture_page(self._step_page)
+        if self._current_step and failed_page:
+            self._current_step.page_url = failed_page.url
             # In the future, we could add more context here, like console logs or network requests.
 
+    def stream_to(self, path: str):
+        """
+        Streams the report to an HTML file: every finished step is appended as it completes and its
+        screenshots are released from memory once written, so long runs never hold the whole report.
+        The file is finalized by close().
+
+        :param path: The HTML file to write.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Steps still in the on_failure frame buffer may get a before-screenshot later, hold them back until
+        # the buffer is flushed on a failure or they fall out of it
+        self._stream_writer = StepReportWriter(open(path, 'w', encoding='utf-8'), self.frames,
+                                               release_frames=True, close_stream=True, hold=self._is_buffered)
+        for step in self.steps:
+            self._stream_writer.add_step(step)
+        self._stream_writer.flush()
+
+    def write_html(self, stream):
+        """
+        Writes the recorded steps as a self-contained HTML report to a text file object, row by row.
+        Each distinct screenshot frame is embedded once, no matter how many steps reference it.
+        """
+        writer = StepReportWriter(stream, self.frames)
+        for step in self.steps:
+            writer.add_step(step)
+        writer.close()
+
     def to_html(self) -> str:
         """
         Converts the recorded steps into a self-contained HTML report.
         """
         if not self.steps:
             return "<p>No steps were recorded.</p>"
+        buffer = io.StringIO()
+        self.write_html(buffer)
+        return buffer.getvalue()
 
-        # Complete HTML structure with CSS and JavaScript
-        html = """
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <title>Test Case Report</title>
-            <style>
-                body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif; margin: 20px; background-color: #f8f9fa; color: #333; }
-                h2 { color: #007bff; border-bottom: 2px solid #007bff; padding-bottom: 10px; }
-                table { width: 100%; border-collapse: collapse; margin-top: 20px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
-                th, td { border: 1px solid #dee2e6; padding: 12px; text-align: left; vertical-align: top; }
-                th { background-color: #e9ecef; color: #495057; }
-                tr.status-FAIL { background-color: #f8d7da; color: #721c24; }
-                tr.status-PASS { background-color: #d4edda; color: #155724; }
-                .status-FAIL .badge-status { background-color: #dc3545; }
-                .status-PASS .badge-status { background-color: #28a745; }
-                .badge-status { color: white; padding: 4px 8px; border-radius: 4px; font-weight: bold; }
-                .screenshot { max-width: 100%; height: auto; display: none; margin-top: 10px; border: 1px solid #ccc; cursor: pointer; }
-                .screenshot-container { margin-top: 10px; }
-                .screenshot-toggle { cursor: pointer; color: #007bff; text-decoration: none; font-size: 14px; }
-                .screenshot-toggle:hover { text-decoration: underline; }
-                .details { white-space: pre-wrap; word-wrap: break-word; font-family: "Courier New", Courier, monospace; background-color: #e9ecef; padding: 8px; border-radius: 4px; margin-top: 5px; }
-                .error { color: #721c24; white-space: pre-wrap; word-wrap: break-word; font-family: "Courier New", Courier, monospace; }
-            </style>
-        </head>
-        <body>
-            <h2>Test Execution Report</h2>
-            <table>
-                <thead>
-                    <tr>
-                        <th>#</th>
-                        <th>Timestamp</th>
-                        <th>Keyword</th>
-                        <th>Description</th>
-                        <th>Duration (ms)</th>
-                        <th>Status</th>
-                        <th>Screenshots & Details</th>
-                    </tr>
-                </thead>
-                <tbody>
+    def close(self):
         """
-
-        for step in self.steps:
-            status_class = f"status-{step.status}"
-            html += f'<tr class="{status_class}">'
-            html += f'<td>{step.order}</td>'
-            html += f'<td>{step.timestamp}</td>'
-            html += f'<td>{step.keyword}</td>'
-            html += f'<td>{step.description}</td>'
-            html += f'<td>{step.duration}</td>'
-            html += f'<td><span class="badge-status">{step.status}</span></td>'
-            html += '<td>'
-
-            if step.before_screenshot:
-                html += f'''
-                <div class="screenshot-container">
-                    <a href="javascript:void(0);" class="screenshot-toggle" onclick="toggleScreenshot('ss_before_{step.order}')">Show/Hide Before</a>
-                    <img id="ss_before_{step.order}" class="screenshot" src="data:image/jpeg;base64,{step.before_screenshot}" onclick="this.style.display='none'">
-                </div>
-                '''
-            if step.after_screenshot:
-                html += f'''
-                <div class="screenshot-container">
-                    <a href="javascript:void(0);" class="screenshot-toggle" onclick="toggleScreenshot('ss_after_{step.order}')">Show/Hide After</a>
-                    <img id="ss_after_{step.order}" class="screenshot" src="data:image/jpeg;base64,{step.after_screenshot}" onclick="this.style.display='none'">
-                </div>
-                '''
-
-            if step.details:
-                details_str = '<div class="details">'
-                for key, value in step.details.items():
-                    details_str += f'<strong>{key}:</strong> {value}<br>'
-                details_str += '</div>'
-                html += details_str
-
-            if step.error_message:
-                html += f'<div class="error"><strong>Error:</strong> {step.error_message}</div>'
-            
-            if step.page_url:
-                html += f'<div class="details"><strong>Page URL:</strong> <a href="{step.page_url}" target="_blank">{step.page_url}</a></div>'
-
-            html += '</td></tr>'
-
-        html += """
-                </tbody>
-            </table>
-            <script>
-                function toggleScreenshot(id) {
-                    var img = document.getElementById(id);
-                    if (img.style.display === 'none') {
-                        img.style.display = 'block';
-                    } else {
-                        img.style.display = 'none';
-                    }
-                }
-            </script>
-        </body>
-        </html>
-        """
-        return html
+        Finishes all pending screenshot encodings and the streamed report, if any. Called when the logger's test is done.
+        Spilled steps and screenshots are deleted afterwards.
+        """
+        self.wait_for_screenshots()
+        if self._stream_writer:
+            self._stream_writer.close()
+            self._stream_writer = None
+        if self._spill_dir:
+            self.steps.close()
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
 
     def clear(self):
         """
@@ -245,3 +395,17 @@ class ReportLogger:
         self.steps.clear()
         self._current_step = None
         self._step_start_time = None
+        self._frame_buffer.clear()
+        self.frames.clear()
+
+    def step_durations(self) -> dict:
+        """
+        Sums the recorded step durations per Excel step id.
+
+        :return: A dictionary mapping step id to total duration in ms.
+        """
+        durations = {}
+        for step in self.steps:
+            if step.step_id:
+                durations[step.step_id] = durations.get(step.step_id, 0) + step.duration
+        return durations
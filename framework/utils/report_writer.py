@@ -0,0 +1,243 @@
+# framework/utils/report_writer.py
+"""
+步骤报告的流式HTML写入
+
+StepReportWriter 把 ReportLogger 的步骤报告按"页头 - 每个步骤一行 - 页尾"的顺序写入任意文件对象，
+不再把整份报告拼接成一个字符串：
+    - to_html 写入 StringIO，得到与以前相同的报告字符串
+    - 流式模式下每个步骤结束后立即追加到报告文件，写入后的截图数据随即从内存中释放，
+      长时间运行的 Session 模式不会在内存中保存整份报告
+截图在后台编码，flush() 默认只写出截图已经编码完成的步骤（保持步骤顺序），不会阻塞测试执行。
+on_failure 截图策略下，执行前截图仍在环形缓冲中的步骤也会暂缓写出（hold），
+直到失败时缓冲被编码、或该步骤移出缓冲，否则写出的行会缺少失败前的截图。
+每一帧截图只在第一次被引用时以 <script> 片段写入一次，之后的步骤直接引用帧编号。
+外部资源模式下帧是截图文件，报告中只显示懒加载的缩略图，点击后再加载原图。
+"""
+import json
+from collections import deque
+
+from framework.utils.screenshot_encoder import thumbnail_path
+from framework.utils.step_timing import format_timings, with_encode_time
+
+REPORT_HEADER = """
+        <!DOCTYPE html>
+        <html lang="en">
+        <head>
+            <meta charset="UTF-8">
+            <title>Test Case Report</title>
+            <style>
+                body { font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif; margin: 20px; background-color: #f8f9fa; color: #333; }
+                h2 { color: #007bff; border-bottom: 2px solid #007bff; padding-bottom: 10px; }
+                table { width: 100%; border-collapse: collapse; margin-top: 20px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+                th, td { border: 1px solid #dee2e6; padding: 12px; text-align: left; vertical-align: top; }
+                th { background-color: #e9ecef; color: #495057; }
+                tr.status-FAIL { background-color: #f8d7da; color: #721c24; }
+                tr.status-PASS { background-color: #d4edda; color: #155724; }
+                .status-FAIL .badge-status { background-color: #dc3545; }
+                .status-PASS .badge-status { background-color: #28a745; }
+                .badge-status { color: white; padding: 4px 8px; border-radius: 4px; font-weight: bold; }
+                .screenshot { max-width: 100%; height: auto; display: none; margin-top: 10px; border: 1px solid #ccc; cursor: pointer; }
+                .screenshot-container { margin-top: 10px; }
+                .screenshot-toggle { cursor: pointer; color: #007bff; text-decoration: none; font-size: 14px; }
+                .screenshot-toggle:hover { text-decoration: underline; }
+                .thumbnail { display: block; max-width: 240px; height: auto; margin-top: 6px; border: 1px solid #ccc; cursor: zoom-in; }
+                .details { white-space: pre-wrap; word-wrap: break-word; font-family: "Courier New", Courier, monospace; background-color: #e9ecef; padding: 8px; border-radius: 4px; margin-top: 5px; }
+                .error { color: #721c24; white-space: pre-wrap; word-wrap: break-word; font-family: "Courier New", Courier, monospace; }
+            </style>
+            <script>
+                window.ssFrames = window.ssFrames || {};
+                function toggleScreenshot(id) {
+                    var img = document.getElementById(id);
+                    if (!img.src && img.dataset.frame) {
+                        img.src = 'data:image/jpeg;base64,' + (window.ssFrames[img.dataset.frame] || '');
+                    }
+                    if (img.style.display !== 'block') {
+                        img.style.display = 'block';
+                    } else {
+                        img.style.display = 'none';
+                    }
+                }
+            </script>
+        </head>
+        <body>
+            <h2>Test Execution Report</h2>
+            <table>
+                <thead>
+                    <tr>
+                        <th>#</th>
+                        <th>Timestamp</th>
+                        <th>Keyword</th>
+                        <th>Description</th>
+                        <th>Duration (ms)</th>
+                        <th>Status</th>
+                        <th>Screenshots & Details</th>
+                    </tr>
+                </thead>
+                <tbody>
+        """
+
+REPORT_FOOTER = """
+                </tbody>
+            </table>
+        </body>
+        </html>
+        """
+
+
+def step_frame_ids(step):
+    """返回步骤引用的帧编号（执行前、执行后）"""
+    return [frame_id for frame_id in (step.before_screenshot, step.after_screenshot) if frame_id]
+
+
+def render_step_row(step, available_frames, img_prefix='', frame_urls=None, timings=None):
+    """
+    渲染一个步骤的表格行。
+
+    :param step: LogStep
+    :param available_frames: 已写入报告的帧编号集合，不在其中的截图（编码失败）不显示
+    :param img_prefix: 图片元素id前缀，避免同一页面中多份报告的元素id冲突
+    :param frame_urls: 外部资源模式下帧编号到截图文件相对路径的映射
+    :param timings: 步骤的阶段耗时（毫秒），见 step_timing
+    """
+    parts = [
+        f'<tr class="status-{step.status}">',
+        f'<td>{step.order}</td>',
+        f'<td>{step.timestamp}</td>',
+        f'<td>{step.keyword}</td>',
+        f'<td>{step.description}</td>',
+        f'<td>{step.duration}</td>',
+        f'<td><span class="badge-status">{step.status}</span></td>',
+        '<td>',
+    ]
+
+    for label, frame_id in (('Before', step.before_screenshot), ('After', step.after_screenshot)):
+        if frame_id not in available_frames:
+            continue
+        img_id = f"ss_{label.lower()}_{img_prefix}_{step.order}"
+        if frame_urls is not None:
+            url = frame_urls[frame_id]
+            parts.append(f'''
+                <div class="screenshot-container">
+                    <a href="javascript:void(0);" class="screenshot-toggle" onclick="toggleScreenshot('{img_id}')">Show/Hide {label}</a>
+                    <img class="thumbnail" src="{thumbnail_path(url)}" loading="lazy" alt="{label}" onclick="toggleScreenshot('{img_id}')">
+                    <img id="{img_id}" class="screenshot" src="{url}" loading="lazy" onclick="this.style.display='none'">
+                </div>
+                ''')
+            continue
+        # 帧数据在 window.ssFrames 中，第一次展开时才赋给图片
+        parts.append(f'''
+                <div class="screenshot-container">
+                    <a href="javascript:void(0);" class="screenshot-toggle" onclick="toggleScreenshot('{img_id}')">Show/Hide {label}</a>
+                    <img id="{img_id}" class="screenshot" data-frame="{frame_id}" onclick="this.style.display='none'">
+                </div>
+                ''')
+
+    if step.details:
+        parts.append('<div class="details">')
+        for key, value in step.details.items():
+            parts.append(f'<strong>{key}:</strong> {value}<br>')
+        parts.append('</div>')
+
+    if step.error_message:
+        parts.append(f'<div class="error"><strong>Error:</strong> {step.error_message}</div>')
+
+    if step.page_url:
+        parts.append(f'<div class="details"><strong>Page URL:</strong> <a href="{step.page_url}" target="_blank">{step.page_url}</a></div>')
+
+    if timings:
+        parts.append(f'<div class="details"><strong>Timing (ms):</strong> {format_timings(timings)}</div>')
+
+    parts.append('</td></tr>')
+    return ''.join(parts)
+
+
+class StepReportWriter:
+    """把步骤逐行写入HTML报告的写入器"""
+
+    def __init__(self, stream, frames, release_frames=False, close_stream=False, hold=None):
+        """
+        :param stream: 可写的文本文件对象
+        :param frames: 截图帧仓库（screenshot_encoder.FrameStore）
+        :param release_frames: 帧写入后是否从仓库中释放其数据（流式写文件时使用）
+        :param close_stream: close() 时是否一并关闭 stream
+        :param hold: 可选的 hold(step)，返回 True 时该步骤的截图还可能变化，flush() 暂不写出
+        """
+        self.stream = stream
+        self.frames = frames
+        self.hold = hold
+        self.release_frames = release_frames
+        self.close_stream = close_stream
+        self.rows_written = 0
+        self._pending = deque()
+        # 已写入报告的帧编号；编码失败的帧不在 _available_frames 中
+        self._written_frames = set()
+        self._available_frames = set()
+        # 外部资源模式下帧编号到文件相对路径的映射
+        self._frame_urls = {} if getattr(frames, 'external', False) else None
+        # 编码耗时已经计入过的帧
+        self._timed_frames = set()
+        self._started = False
+        self._closed = False
+
+    def start(self):
+        """写入页头（只写一次）"""
+        if not self._started:
+            self.stream.write(REPORT_HEADER)
+            self._started = True
+
+    def add_step(self, step):
+        """登记一个已结束的步骤，等待 flush() 写出"""
+        self._pending.append(step)
+
+    def flush(self, block=False):
+        """
+        写出等待中的步骤。block=False 时遇到被 hold 暂缓或截图尚未编码完成的步骤即停止，留到下次写出。
+        """
+        self.start()
+        while self._pending:
+            step = self._pending[0]
+            if not block and self.hold and self.hold(step):
+                break
+            frame_ids = step_frame_ids(step)
+            if not block and not all(self.frames.ready(frame_id) for frame_id in frame_ids):
+                break
+            self._pending.popleft()
+            self._write_step(step, frame_ids)
+        if hasattr(self.stream, 'flush'):
+            self.stream.flush()
+
+    def _write_step(self, step, frame_ids):
+        new_frames = {}
+        for frame_id in frame_ids:
+            if frame_id in self._written_frames:
+                continue
+            self._written_frames.add(frame_id)
+            data = self.frames.get(frame_id)
+            if data and self._frame_urls is not None:
+                self._frame_urls[frame_id] = data
+                self._available_frames.add(frame_id)
+            elif data:
+                new_frames[frame_id] = data
+                self._available_frames.add(frame_id)
+            if self.release_frames:
+                self.frames.release(frame_id)
+        if new_frames:
+            self.stream.write(f'<script>Object.assign(window.ssFrames, {json.dumps(new_frames)});</script>')
+        timings = getattr(step, 'timings', None)
+        encode_ms = getattr(self.frames, 'encode_ms', None)
+        if encode_ms:
+            timings = with_encode_time(timings, frame_ids, encode_ms, self._timed_frames)
+        self.stream.write(render_step_row(step, self._available_frames, self.frames.prefix, self._frame_urls, timings))
+        self.rows_written += 1
+
+    def close(self):
+        """写出剩余步骤（等待截图编码完成）并写入页尾"""
+        if self._closed:
+            return
+        self.flush(block=True)
+        self.stream.write(REPORT_FOOTER)
+        self._closed = True
+        if self.close_stream:
+            self.stream.close()
+        elif hasattr(self.stream, 'flush'):
+            self.stream.flush()
@@ -0,0 +1,130 @@
+# framework/utils/results_emitter.py
+"""
+结构化执行结果输出
+
+pytest-html 报告适合人看，但仪表盘等下游工具只能去解析几百MB的HTML。
+ResultsEmitter 在执行过程中把结果以 JSON Lines 逐行写入文件（每行写完立即刷新），下游可以边执行边读取：
+    {"type": "run_start", ...}                     pytest 会话开始
+    {"type": "step", ...}                          每个关键字步骤结束（编号、关键字、状态、耗时、错误、页面URL）
+    {"type": "test", ...}                          每个 pytest 用例结束（Function模式一个用例是一个流程，Session模式是一个步骤）
+    {"type": "flow", ...}                          每个流程结束（按 file_path + sheet_name 汇总其中的用例）
+    {"type": "run_end", ...}                       pytest 会话结束，包含各状态的用例数
+同一流程的用例总是连续执行，流程切换或会话结束时输出上一个流程的汇总。
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+RECORD_RUN_START = 'run_start'
+RECORD_STEP = 'step'
+RECORD_TEST = 'test'
+RECORD_FLOW = 'flow'
+RECORD_RUN_END = 'run_end'
+
+
+def _now():
+    return datetime.now().isoformat(timespec='milliseconds')
+
+
+def flow_key(flow):
+    """流程的标识（file_path, sheet_name），flow 为空时返回 None"""
+    if not flow:
+        return None
+    return (flow.get('file_path'), flow.get('sheet_name'))
+
+
+class ResultsEmitter:
+    """把执行结果逐行写入 JSON Lines 文件"""
+
+    def __init__(self, path, **run_info):
+        """
+        :param path: 输出文件路径（追加写入）
+        :param run_info: 写入每条记录的公共字段，如 browser
+        """
+        self.path = path
+        self.run_info = run_info
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._flow = None
+        self._flow_summary = None
+        self.outcomes = {}
+
+    def emit(self, record_type, **fields):
+        """写入一条记录并立即刷新，供下游增量读取"""
+        record = {'type': record_type, 'time': _now(), **self.run_info, **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def start_run(self, **fields):
+        self.emit(RECORD_RUN_START, **fields)
+
+    def emit_step(self, step, test=None, flow=None):
+        """写入一个关键字步骤（LogStep）的结果"""
+        self.emit(
+            RECORD_STEP,
+            test=test,
+            flow=flow,
+            step_id=step.step_id,
+            order=step.order,
+            keyword=step.keyword,
+            description=step.description,
+            status=step.status,
+            duration_ms=step.duration,
+            timings_ms=getattr(step, 'timings', None) or {},
+            error=step.error_message,
+            page_url=step.page_url,
+        )
+
+    def emit_test(self, test, outcome, duration_ms, flow=None, step_id=None, error=None, page_url=None):
+        """
+        写入一个 pytest 用例的结果，并累计到所属流程；流程切换时先输出上一个流程的汇总。
+
+        :param outcome: passed / failed / skipped
+        """
+        key = flow_key(flow)
+        if key != self._flow:
+            self.flush_flow()
+
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.emit(RECORD_TEST, test=test, flow=flow, step_id=step_id, outcome=outcome,
+                  duration_ms=round(duration_ms), error=error, page_url=page_url)
+        if key is None:
+            return
+        if self._flow_summary is None:
+            self._flow = key
+            self._flow_summary = {'flow': flow, 'tests': 0, 'outcomes': {}, 'duration_ms': 0.0, 'errors': []}
+        summary = self._flow_summary
+        summary['tests'] += 1
+        summary['outcomes'][outcome] = summary['outcomes'].get(outcome, 0) + 1
+        summary['duration_ms'] += duration_ms
+        if error:
+            summary['errors'].append({'test': test, 'step_id': step_id, 'error': error})
+
+    def flush_flow(self):
+        """输出当前流程的汇总记录"""
+        summary = self._flow_summary
+        self._flow = None
+        self._flow_summary = None
+        if summary is None:
+            return
+        status = 'failed' if summary['outcomes'].get('failed') else 'passed'
+        if not summary['outcomes'].get('failed') and not summary['outcomes'].get('passed'):
+            status = 'skipped'
+        self.emit(RECORD_FLOW, flow=summary['flow'], status=status, tests=summary['tests'],
+                  outcomes=summary['outcomes'], duration_ms=round(summary['duration_ms']), errors=summary['errors'])
+
+    def close(self, exitstatus=None):
+        """输出最后一个流程的汇总和 run_end 记录并关闭文件"""
+        if self._file.closed:
+            return
+        self.flush_flow()
+        self.emit(RECORD_RUN_END, exitstatus=exitstatus, outcomes=self.outcomes,
+                  status='failed' if self.outcomes.get('failed') else 'passed')
+        with self._lock:
+            self._file.close()
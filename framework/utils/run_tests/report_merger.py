@@ -0,0 +1,180 @@
+# framework/utils/run_tests/report_merger.py
+"""
+分片报告合并
+
+把同一浏览器批次拆分出的多个 pytest-html 分片报告合并为一份 HTML 报告。
+pytest-html 4.x 把所有用例结果以 JSON 形式存放在 data-container 节点的
+data-jsonblob 属性里，合并时把各分片的用例结果汇总到第一份报告中。
+不是自包含的分片报告（外部资源模式）引用报告旁的 assets/ 目录，合并报告写在其他目录时一并复制过去。
+无法识别报告格式时，退化为生成一个链接到各分片报告的汇总页面。
+"""
+import os
+import re
+import json
+import html
+import shutil
+
+_BLOB_PATTERN = re.compile(r'(<div id="data-container" data-jsonblob=")([^"]*)(")')
+_OUTCOME_PATTERN = re.compile(r'(<span class="(\w+)">)(\d+)( [^<]*</span>)')
+_RUN_COUNT_PATTERN = re.compile(r'(<p class="run-count">)(\d+)')
+# pytest-html 非自包含报告的样式等资源目录（与报告在同一目录下）
+REPORT_ASSETS_DIR = 'assets'
+
+
+def _read_report(report_path):
+    with open(report_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _extract_blob(content):
+    match = _BLOB_PATTERN.search(content)
+    if not match:
+        return None
+    try:
+        return json.loads(html.unescape(match.group(2)))
+    except ValueError:
+        return None
+
+
+def _merge_blobs(blobs):
+    """合并各分片的用例数据，给重名用例加上分片后缀并重新编号"""
+    merged = dict(blobs[0])
+    merged_tests = {}
+    sequence = 0
+    for shard_number, blob in enumerate(blobs, 1):
+        for test_id, results in blob.get("tests", {}).items():
+            key = test_id if test_id not in merged_tests else f"{test_id} [shard{shard_number}]"
+            renumbered = []
+            for result in results if isinstance(results, list) else [results]:
+                if isinstance(result, dict):
+                    result = dict(result)
+                    if "id" in result:
+                        sequence += 1
+                        result["id"] = f"test_{sequence}"
+                    if "testId" in result:
+                        result["testId"] = key
+                renumbered.append(result)
+            merged_tests[key] = renumbered
+    merged["tests"] = merged_tests
+    return merged
+
+
+def _sum_outcomes(contents):
+    """累加各分片 Summary 区域中的结果统计（Passed/Failed/...）"""
+    totals = {}
+    for content in contents:
+        for match in _OUTCOME_PATTERN.finditer(content):
+            totals[match.group(2)] = totals.get(match.group(2), 0) + int(match.group(3))
+    return totals
+
+
+def _sum_run_count(contents):
+    total = 0
+    for content in contents:
+        match = _RUN_COUNT_PATTERN.search(content)
+        if match:
+            total += int(match.group(2))
+    return total
+
+
+def _write_index_report(report_paths, output_path, title):
+    """生成链接到各分片报告的汇总页面"""
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    rows = []
+    for shard_number, report_path in enumerate(report_paths, 1):
+        relative_path = os.path.relpath(report_path, output_dir).replace(os.sep, '/')
+        rows.append(
+            f'<li>分片 {shard_number}: <a href="{html.escape(relative_path)}" target="_blank">'
+            f'{html.escape(os.path.basename(report_path))}</a></li>'
+        )
+    content = (
+        '<!DOCTYPE html>\n<html lang="zh-CN">\n<head>\n<meta charset="UTF-8">\n'
+        f'<title>{html.escape(title)}</title>\n</head>\n<body>\n'
+        f'<h2>{html.escape(title)}</h2>\n<ul>\n' + "\n".join(rows) + '\n</ul>\n</body>\n</html>\n'
+    )
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def merge_html_reports(report_paths, output_path, title="分片报告汇总"):
+    """
+    合并多个 pytest-html 分片报告。
+
+    Args:
+        report_paths: 分片报告路径列表（不存在的文件会被忽略）
+        output_path: 合并后报告的输出路径
+        title: 退化为汇总页面时使用的标题
+
+    Returns:
+        成功生成报告时返回 True
+    """
+    existing_paths = [path for path in report_paths if os.path.exists(path)]
+    if not existing_paths:
+        return False
+
+    contents = [_read_report(path) for path in existing_paths]
+    blobs = [_extract_blob(content) for content in contents]
+    if any(blob is None for blob in blobs):
+        print("[报告合并] 无法识别分片报告格式，改为生成分片报告索引页")
+        _write_index_report(existing_paths, output_path, title)
+        return True
+
+    merged_blob = _merge_blobs(blobs)
+    escaped_blob = html.escape(json.dumps(merged_blob, ensure_ascii=False), quote=True)
+    merged = _BLOB_PATTERN.sub(lambda m: f"{m.group(1)}{escaped_blob}{m.group(3)}", contents[0], count=1)
+
+    outcome_totals = _sum_outcomes(contents)
+    merged = _OUTCOME_PATTERN.sub(
+        lambda m: f"{m.group(1)}{outcome_totals.get(m.group(2), m.group(3))}{m.group(4)}", merged
+    )
+    run_count = _sum_run_count(contents)
+    merged = _RUN_COUNT_PATTERN.sub(lambda m: f"{m.group(1)}{run_count}", merged, count=1)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(merged)
+    _copy_report_assets(existing_paths[0], output_path)
+    return True
+
+
+def _copy_report_assets(source_report, output_path):
+    """合并报告基于 source_report 生成，把其引用的 assets/ 目录复制到合并报告旁"""
+    source_dir = os.path.join(os.path.dirname(os.path.abspath(source_report)), REPORT_ASSETS_DIR)
+    target_dir = os.path.join(os.path.dirname(os.path.abspath(output_path)), REPORT_ASSETS_DIR)
+    if os.path.isdir(source_dir) and source_dir != target_dir:
+        shutil.copytree(source_dir, target_dir, dirs_exist_ok=True)
+
+
+def merge_jsonl_files(paths, output_path, tag_key="shard"):
+    """
+    把各分片的 JSON Lines 文件（结构化结果、步骤耗时）按分片顺序合并为一个文件。
+
+    Args:
+        paths: 分片文件路径列表（不存在的文件会被忽略）
+        output_path: 合并后的输出路径
+        tag_key: 为每条记录加上的分片编号字段（1 起始），为空时不添加
+
+    Returns:
+        合并的分片文件数
+    """
+    merged = 0
+    with open(output_path, 'w', encoding='utf-8') as output:
+        for shard_number, path in enumerate(paths, 1):
+            if not os.path.exists(path):
+                continue
+            merged += 1
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.rstrip('\n')
+                    if not line.strip():
+                        continue
+                    if tag_key:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            record = None
+                        if isinstance(record, dict):
+                            line = json.dumps({**record, tag_key: shard_number}, ensure_ascii=False)
+                    output.write(line + '\n')
+    if not merged:
+        os.remove(output_path)
+    return merged
@@ -2,7 +2,7 @@
 import json
 import os
 import sys
-import subprocess
+import functools
 from datetime import datetime
 from collections import defaultdict
 
@@ -11,6 +11,15 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from framework.utils.run_tests.scheduler import (
+    BatchTask, DEFAULT_MAX_CONCURRENCY, prefixed_print, split_into_shards,
+    run_command_streaming, run_concurrently, print_batch_summary
+)
+from framework.utils.run_tests.report_merger import merge_html_reports, merge_jsonl_files
+from framework.utils.duration_history import DurationHistory
+from framework.utils.step_loader import get_sheet_names, warm_step_cache
+from framework.utils.screenshot_policy import ASSETS_EMBEDDED, report_asset_mode
+
 # 浏览器别名映射
 BROWSER_ALIASES = {
     "cr": "chromium",
@@ -21,14 +30,31 @@ BROWSER_ALIASES = {
     "webkit": "webkit"
 }
 
-def get_test_flows():
-    """从 test_config.json 加载并过滤启用的测试流程。"""
+def load_framework_config():
+    """读取 test_config.json，文件不存在时返回 None。"""
     config_path = os.path.join(project_root, 'test_data', 'test_config.json')
     if not os.path.exists(config_path):
         print(f"[错误] 配置文件不存在: {config_path}")
-        return []
+        return None
     with open(config_path, 'r', encoding='utf-8') as f:
-        config = json.load(f)
+        return json.load(f)
+
+def get_execution_config():
+    """获取 test_config.json 中的 execution 执行配置（并发数等）。"""
+    config = load_framework_config() or {}
+    execution_config = config.get("execution", {})
+    return execution_config if isinstance(execution_config, dict) else {}
+
+def get_report_asset_mode():
+    """获取报告截图的存放方式（visual_mode.report_assets），embedded 时生成自包含的HTML报告。"""
+    config = load_framework_config() or {}
+    return report_asset_mode(config.get("visual_mode", {}))
+
+def get_test_flows():
+    """从 test_config.json 加载并过滤启用的测试流程。"""
+    config = load_framework_config()
+    if config is None:
+        return []
     all_flows = config.get("test_flows", [])
     # 为没有指定浏览器的流程设置默认浏览器为chromium
     for flow in all_flows:
@@ -36,8 +62,13 @@ def get_test_flows():
             flow["browser"] = "chromium"
     return [flow for flow in all_flows if flow.get("enabled", True)]
 
-def group_flows_by_browser(flows):
-    """根据浏览器对测试流程进行分组。"""
+def group_flows_by_browser(flows, history=None):
+    """根据浏览器对测试流程进行分组。
+
+    Args:
+        history: DurationHistory 实例，提供时每组内的流程按历史耗时从长到短排序，
+                 让并行执行时长流程先启动、各批次尽量同时结束
+    """
     grouped = defaultdict(list)
     for flow in flows:
         # 获取浏览器，默认为 chromium
@@ -45,74 +76,204 @@ def group_flows_by_browser(flows):
         # 解析别名
         browser_name = BROWSER_ALIASES.get(browser_key, "chromium")
         grouped[browser_name].append(flow)
+    if history is not None:
+        for browser_name, browser_flows in grouped.items():
+            estimates = history.estimate_flows(browser_flows, browser_name)
+            ordered = sorted(zip(estimates, range(len(browser_flows)), browser_flows),
+                             key=lambda entry: (-entry[0], entry[1]))
+            grouped[browser_name] = [flow for _, _, flow in ordered]
     return grouped
 
-def run_pytest_batch(browser, flows_for_browser, test_file_path, ci_mode=False):
-    """为单个浏览器执行一批测试。"""
-    print(f"\n{'='*20} 准备执行 {browser.upper()} 批次测试 {'='*20}")
-    
-    # 1. 创建一个临时的JSON文件，只包含当前浏览器的流程
-    temp_config_path = os.path.join(project_root, 'test_data', f'temp_run_{browser}.json')
-    with open(temp_config_path, 'w', encoding='utf-8') as f:
-        json.dump(flows_for_browser, f, indent=4)
-        
-    # 2. 构造报告文件名和路径
+def prepare_report_paths(browser, ci_mode=False):
+    """构造本批次的报告路径和截图目录，返回 (report_path, screenshots_dir)。"""
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     date_str = datetime.now().strftime("%Y-%m-%d")
     ci_suffix = "_CI" if ci_mode else ""
     
     # 创建按日期分类的报告目录
+    # 并发执行时多个批次可能同时创建目录，使用 exist_ok 避免竞争报错
     report_date_dir = os.path.join(project_root, 'reports', f'reports_{date_str}')
-    if not os.path.exists(report_date_dir):
-        os.makedirs(report_date_dir)
+    os.makedirs(report_date_dir, exist_ok=True)
     
     # 创建screenshots子目录
     screenshots_dir = os.path.join(report_date_dir, 'screenshots')
-    if not os.path.exists(screenshots_dir):
-        os.makedirs(screenshots_dir)
+    os.makedirs(screenshots_dir, exist_ok=True)
     
     # 报告名包含浏览器和状态，调整格式为: report_2025-07-30_17-30-55_firefox_CI_Failed.html
     report_filename = f"report_{timestamp}_{browser}{ci_suffix}.html"
-    report_path = os.path.join(report_date_dir, report_filename)
+    return os.path.join(report_date_dir, report_filename), screenshots_dir
+
+def execute_pytest(browser, flows_for_browser, test_file_path, report_path, screenshots_dir,
+                   temp_name=None, output_prefix=None):
+    """写入临时流程配置并启动一个 pytest 子进程，返回子进程返回码。"""
+    log = functools.partial(prefixed_print, output_prefix)
+    
+    # 1. 创建一个临时的JSON文件，只包含当前批次（或分片）的流程
+    temp_config_path = os.path.join(project_root, 'test_data', f'temp_run_{temp_name or browser}.json')
+    with open(temp_config_path, 'w', encoding='utf-8') as f:
+        json.dump(flows_for_browser, f, indent=4)
     
-    # 3. 构建pytest命令
+    # 2. 构建pytest命令
     command = [
         sys.executable,  # 使用当前虚拟环境的python
         "-m", "pytest",
         "-s", "-v",
         "--browser", browser,
         "--html", report_path,
-        "--self-contained-html",
         # 传递临时配置文件路径给测试文件
         f"--flow-config-file={temp_config_path}",
         # 传递screenshots目录路径
         f"--screenshots-dir={screenshots_dir}",
         test_file_path
     ]
+    # 外部资源模式下截图以文件形式放在 screenshots 目录，报告不再内嵌
+    if get_report_asset_mode() == ASSETS_EMBEDDED:
+        command.insert(command.index(report_path) + 1, "--self-contained-html")
+    # 结构化结果：与HTML报告同名的 _results.jsonl（默认开启）和可选的 JUnit XML
+    execution_config = get_execution_config()
+    report_base = os.path.splitext(report_path)[0]
+    if execution_config.get("results_jsonl", True):
+        command.insert(-1, f"--results-jsonl={report_base}_results.jsonl")
+    if execution_config.get("junit_xml", False):
+        command.insert(-1, f"--junitxml={report_base}.xml")
     
-    print(f"执行命令: {' '.join(command)}")
+    log(f"执行命令: {' '.join(command)}")
     
-    # 4. 执行命令
-    result = subprocess.run(command)
-    
-    # 5. 清理临时文件
-    os.remove(temp_config_path)
-    
-    # 6. 重命名报告文件，添加成功/失败状态
-    if result.returncode != 0:
-        print(f"!!!!!! {browser.upper()} 批次测试执行失败 !!!!!!")
-        failed_report_path = report_path.replace('.html', '_Failed.html')
-        if os.path.exists(report_path):
-            os.rename(report_path, failed_report_path)
-            print(f"报告已生成: {failed_report_path}")
-        return False
+    # 3. 执行命令（有前缀时逐行转发输出），结束后清理临时文件
+    try:
+        return run_command_streaming(command, prefix=output_prefix)
+    finally:
+        os.remove(temp_config_path)
+
+def finalize_report(browser, report_path, passed, output_prefix=None):
+    """重命名报告文件，添加成功/失败状态。"""
+    log = functools.partial(prefixed_print, output_prefix)
+    if not passed:
+        log(f"!!!!!! {browser.upper()} 批次测试执行失败 !!!!!!")
+        final_report_path = report_path.replace('.html', '_Failed.html')
     else:
-        print(f"====== {browser.upper()} 批次测试执行成功 ======")
-        passed_report_path = report_path.replace('.html', '_Passed.html')
-        if os.path.exists(report_path):
-            os.rename(report_path, passed_report_path)
-            print(f"报告已生成: {passed_report_path}")
-        return True
+        log(f"====== {browser.upper()} 批次测试执行成功 ======")
+        final_report_path = report_path.replace('.html', '_Passed.html')
+    if os.path.exists(report_path):
+        os.rename(report_path, final_report_path)
+        log(f"报告已生成: {final_report_path}")
+    return passed
+
+def run_pytest_batch(browser, flows_for_browser, test_file_path, ci_mode=False, output_prefix=None):
+    """为单个浏览器执行一批测试。
+
+    Args:
+        output_prefix: 并发执行时的输出前缀，为空时子进程直接输出到终端
+    """
+    prefixed_print(output_prefix, f"\n{'='*20} 准备执行 {browser.upper()} 批次测试 {'='*20}")
+    # 预先写好步骤磁盘缓存，pytest 子进程直接读取，无需再解析 Excel
+    warm_step_cache(flows_for_browser)
+    report_path, screenshots_dir = prepare_report_paths(browser, ci_mode)
+    returncode = execute_pytest(browser, flows_for_browser, test_file_path, report_path,
+                                screenshots_dir, output_prefix=output_prefix)
+    return finalize_report(browser, report_path, returncode == 0, output_prefix)
+
+def run_pytest_shard(browser, shard_number, flows_for_shard, test_file_path, shard_report_path,
+                     screenshots_dir, output_prefix=None):
+    """执行一个浏览器批次中的单个分片，分片报告稍后统一合并。"""
+    prefixed_print(output_prefix, f"\n{'='*20} 准备执行 {browser.upper()} 分片 {shard_number} "
+                                  f"({len(flows_for_shard)} 个流程) {'='*20}")
+    returncode = execute_pytest(browser, flows_for_shard, test_file_path, shard_report_path,
+                                screenshots_dir, temp_name=f"{browser}_shard{shard_number}",
+                                output_prefix=output_prefix)
+    return returncode == 0
+
+# 与HTML报告同名的 JSON Lines 输出（结构化结果、步骤耗时），分片结束后与报告一起合并
+SHARD_JSONL_SUFFIXES = ("_results.jsonl", "_timings.jsonl")
+
+def _merge_shard_reports(browser, report_path, shard_report_paths, passed):
+    """把分片报告（以及同名的 JSON Lines 输出）合并为一份批次报告，并按结果重命名。"""
+    if merge_html_reports(shard_report_paths, report_path, title=f"{browser} 分片报告汇总"):
+        print(f"[报告合并] {browser.upper()} 的 {len(shard_report_paths)} 个分片报告已合并")
+    report_base = os.path.splitext(report_path)[0]
+    shard_bases = [os.path.splitext(path)[0] for path in shard_report_paths]
+    for suffix in SHARD_JSONL_SUFFIXES:
+        merged = merge_jsonl_files([base + suffix for base in shard_bases], report_base + suffix)
+        if merged:
+            print(f"[报告合并] {browser.upper()} 的 {merged} 个分片 {suffix} 已合并: {report_base + suffix}")
+    finalize_report(browser, report_path, passed)
+
+def run_batches(batches, ci_mode=False, allow_shards=False):
+    """
+    并发执行多个浏览器批次，并打印汇总结果。
+    execution.shards_per_browser 大于1且 allow_shards 为 True 时，每个浏览器批次的流程会再拆分到多个
+    pytest 子进程中执行，各分片报告在全部结束后合并为一份报告。
+
+    Args:
+        batches: (browser, flows, test_file_path) 元组列表
+        allow_shards: 是否允许分片。只有Function模式的流程彼此独立；Session模式的步骤和流程在同一个页面中
+                      按顺序执行、前后依赖，必须留在一个 pytest 进程中，调用方不能开启分片
+
+    Returns:
+        所有批次都通过时返回 True
+    """
+    execution_config = get_execution_config()
+    max_concurrency = execution_config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+    shards_per_browser = execution_config.get("shards_per_browser", 1) if allow_shards else 1
+    history = DurationHistory()
+    # 并发启动前统一预热步骤缓存，避免多个批次线程重复解析同一个工作簿
+    warm_step_cache([flow for _, flows, _ in batches for flow in flows])
+
+    planned = []
+    batch_estimates = {}
+    for browser, flows, test_file_path in batches:
+        # 按历史耗时均衡装箱，没有历史时每个流程权重相同
+        estimates = {id(flow): estimate for flow, estimate in zip(flows, history.estimate_flows(flows, browser))}
+        shards = split_into_shards(flows, shards_per_browser, weight=lambda flow: estimates[id(flow)] or 1.0)
+        for shard_number, shard_flows in enumerate(shards, 1):
+            label = browser if len(shards) <= 1 else f"{browser}#{shard_number}"
+            batch_estimates[label] = sum(estimates[id(flow)] for flow in shard_flows)
+        planned.append((browser, test_file_path, shards))
+    # 只有一个子进程时无需前缀，保持原有的终端输出效果
+    use_prefix = sum(len(shards) for _, _, shards in planned) > 1
+
+    tasks = []
+    shard_groups = []
+    for browser, test_file_path, shards in planned:
+        if len(shards) <= 1:
+            tasks.append(BatchTask(
+                label=browser,
+                run=functools.partial(
+                    run_pytest_batch, browser, shards[0] if shards else [], test_file_path,
+                    ci_mode=ci_mode, output_prefix=browser.upper() if use_prefix else None
+                ),
+                estimated_duration=batch_estimates.get(browser, 0.0)
+            ))
+            continue
+
+        report_path, screenshots_dir = prepare_report_paths(browser, ci_mode)
+        shard_dir = os.path.join(os.path.dirname(report_path), 'shards')
+        os.makedirs(shard_dir, exist_ok=True)
+        report_name = os.path.splitext(os.path.basename(report_path))[0]
+        labels, shard_report_paths = [], []
+        for shard_number, shard_flows in enumerate(shards, 1):
+            label = f"{browser}#{shard_number}"
+            shard_report_path = os.path.join(shard_dir, f"{report_name}_shard{shard_number}.html")
+            labels.append(label)
+            shard_report_paths.append(shard_report_path)
+            tasks.append(BatchTask(
+                label=label,
+                run=functools.partial(
+                    run_pytest_shard, browser, shard_number, shard_flows, test_file_path,
+                    shard_report_path, screenshots_dir, output_prefix=label.upper()
+                ),
+                estimated_duration=batch_estimates.get(label, 0.0)
+            ))
+        shard_groups.append((browser, report_path, labels, shard_report_paths))
+
+    results = run_concurrently(tasks, max_concurrency=max_concurrency)
+
+    passed_by_label = {result.label: result.passed for result in results}
+    for browser, report_path, labels, shard_report_paths in shard_groups:
+        group_passed = all(passed_by_label.get(label, False) for label in labels)
+        _merge_shard_reports(browser, report_path, shard_report_paths, group_passed)
+
+    return print_batch_summary(results)
 
 def get_flow_by_index(test_flows, index):
     """根据索引获取测试流程"""
@@ -157,10 +318,11 @@ def run_tests(choice_input, ci_mode=False):
         return
     
     if choice == "1":  # Function模式
-        grouped_flows = group_flows_by_browser(test_flows)
+        # Function模式的流程互相独立，按历史耗时最长优先排序
+        grouped_flows = group_flows_by_browser(test_flows, history=DurationHistory())
         test_file_py = os.path.join(project_root, 'tests', 'test_flows', 'test_flow_by_function_json.py')
-        for browser, flows in grouped_flows.items():
-            run_pytest_batch(browser, flows, test_file_py, ci_mode=ci_mode)
+        return run_batches([(browser, flows, test_file_py) for browser, flows in grouped_flows.items()], ci_mode=ci_mode,
+                           allow_shards=True)
     
     elif choice == "2":  # Session模式
         # Session模式只跑指定索引的流程的第一个浏览器
@@ -171,7 +333,7 @@ def run_tests(choice_input, ci_mode=False):
             
         browser = BROWSER_ALIASES.get(selected_flow.get("browser", "cr").lower(), "chromium")
         test_file_py = os.path.join(project_root, 'tests', 'test_flows', 'test_steps_by_session_json.py')
-        run_pytest_batch(browser, [selected_flow], test_file_py, ci_mode=ci_mode)
+        return run_pytest_batch(browser, [selected_flow], test_file_py, ci_mode=ci_mode)
         
     elif choice == "3":  # Session模式-Browsers
         # Session模式在所有支持的浏览器上执行指定索引的流程
@@ -183,15 +345,13 @@ def run_tests(choice_input, ci_mode=False):
         # 获取所有支持的浏览器
         supported_browsers = ["chromium", "firefox", "webkit"]
         test_file_py = os.path.join(project_root, 'tests', 'test_flows', 'test_steps_by_session_json.py')
-        for browser in supported_browsers:
-            run_pytest_batch(browser, [selected_flow], test_file_py, ci_mode=ci_mode)
+        return run_batches([(browser, [selected_flow], test_file_py) for browser in supported_browsers], ci_mode=ci_mode)
     
     elif choice == "4":  # Session模式-All
         # Session模式执行所有启用的流程
         grouped_flows = group_flows_by_browser(test_flows)
         test_file_py = os.path.join(project_root, 'tests', 'test_flows', 'test_steps_by_session_json.py')
-        for browser, flows in grouped_flows.items():
-            run_pytest_batch(browser, flows, test_file_py, ci_mode=ci_mode)
+        return run_batches([(browser, flows, test_file_py) for browser, flows in grouped_flows.items()], ci_mode=ci_mode)
             
     elif choice == "5":  # Function模式-Sheets
         # Function模式-Sheets执行指定Excel文件中的所有sheet
@@ -215,11 +375,9 @@ def run_tests(choice_input, ci_mode=False):
             print(f"Excel文件不存在: {excel_file_path}")
             return
             
-        # 获取Excel文件中的所有sheet名称
-        import pandas as pd
+        # 获取Excel文件中的所有sheet名称（解析结果会被缓存，后续读取步骤无需重复解析）
         try:
-            excel_file = pd.ExcelFile(excel_file_path)
-            sheet_names = excel_file.sheet_names
+            sheet_names = get_sheet_names(excel_file_path)
         except Exception as e:
             print(f"读取Excel文件失败: {e}")
             return
@@ -233,10 +391,10 @@ def run_tests(choice_input, ci_mode=False):
             sheet_flows.append(sheet_flow)
             
         # 按浏览器分组并执行
-        grouped_flows = group_flows_by_browser(sheet_flows)
+        grouped_flows = group_flows_by_browser(sheet_flows, history=DurationHistory())
         test_file_py = os.path.join(project_root, 'tests', 'test_flows', 'test_flow_by_function_json.py')
-        for browser, flows in grouped_flows.items():
-            run_pytest_batch(browser, flows, test_file_py, ci_mode=ci_mode)
+        return run_batches([(browser, flows, test_file_py) for browser, flows in grouped_flows.items()], ci_mode=ci_mode,
+                           allow_shards=True)
             
     elif choice == "6":  # Session模式-Sheets
         # Session模式-Sheets执行指定Excel文件中的所有sheet
@@ -260,11 +418,9 @@ def run_tests(choice_input, ci_mode=False):
             print(f"Excel文件不存在: {excel_file_path}")
             return
             
-        # 获取Excel文件中的所有sheet名称
-        import pandas as pd
+        # 获取Excel文件中的所有sheet名称（解析结果会被缓存，后续读取步骤无需重复解析）
         try:
-            excel_file = pd.ExcelFile(excel_file_path)
-            sheet_names = excel_file.sheet_names
+            sheet_names = get_sheet_names(excel_file_path)
         except Exception as e:
             print(f"读取Excel文件失败: {e}")
             return
@@ -280,8 +436,7 @@ def run_tests(choice_input, ci_mode=False):
         # 按浏览器分组并执行
         grouped_flows = group_flows_by_browser(sheet_flows)
         test_file_py = os.path.join(project_root, 'tests', 'test_flows', 'test_steps_by_session_json.py')
-        for browser, flows in grouped_flows.items():
-            run_pytest_batch(browser, flows, test_file_py, ci_mode=ci_mode)
+        return run_batches([(browser, flows, test_file_py) for browser, flows in grouped_flows.items()], ci_mode=ci_mode)
 
 def cleanup_temp_files(ci_mode=False):
     """清理残留的临时文件"""
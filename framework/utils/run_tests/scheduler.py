@@ -0,0 +1,194 @@
+# framework/utils/run_tests/scheduler.py
+"""
+并发批次调度器
+
+负责把多个 pytest 批次（每个浏览器一个子进程）同时启动，
+按前缀实时转发各批次的输出，并汇总所有批次的执行结果。
+"""
+import os
+import sys
+import time
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+# 默认最大并发数：三种浏览器内核可以同时执行
+DEFAULT_MAX_CONCURRENCY = 3
+
+# 多个批次线程同时打印时，保证每一行输出完整不交错
+_print_lock = threading.Lock()
+
+
+@dataclass
+class BatchTask:
+    """一个待调度的批次任务"""
+    label: str
+    run: Callable[..., bool]
+    # 预估耗时（秒），用于决定提交顺序，耗时长的批次优先启动
+    estimated_duration: float = 0.0
+
+
+@dataclass
+class BatchResult:
+    """单个批次的执行结果"""
+    label: str
+    passed: bool
+    duration: float = 0.0
+    error: Optional[str] = None
+
+
+def prefixed_print(prefix, message):
+    """线程安全地打印一行带前缀的输出"""
+    with _print_lock:
+        if prefix:
+            print(f"[{prefix}] {message}", flush=True)
+        else:
+            print(message, flush=True)
+
+
+def run_command_streaming(command, prefix=None):
+    """
+    启动子进程并逐行转发其输出。
+
+    Args:
+        command: 要执行的命令列表
+        prefix: 输出前缀（如浏览器名），为空时直接继承终端输出
+
+    Returns:
+        子进程的返回码
+    """
+    if not prefix:
+        return subprocess.run(command).returncode
+
+    env = os.environ.copy()
+    # 关闭子进程的输出缓冲，保证日志实时转发
+    env["PYTHONUNBUFFERED"] = "1"
+    env.setdefault("PYTHONIOENCODING", "utf-8")
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=env,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        bufsize=1,
+    )
+    for line in process.stdout:
+        prefixed_print(prefix, line.rstrip("\r\n"))
+    process.stdout.close()
+    return process.wait()
+
+
+def resolve_max_concurrency(value, task_count):
+    """把配置中的最大并发数规范化为 [1, task_count] 范围内的整数"""
+    try:
+        max_concurrency = int(value)
+    except (TypeError, ValueError):
+        max_concurrency = DEFAULT_MAX_CONCURRENCY
+    if max_concurrency < 1:
+        max_concurrency = 1
+    return max(1, min(max_concurrency, task_count))
+
+
+def split_into_shards(items, shard_count, weight=None):
+    """
+    把一组任务按权重均衡地拆分为多个分片（最长处理时间优先的贪心装箱）。
+
+    Args:
+        items: 待拆分的任务列表
+        shard_count: 分片数量，超过任务数时按任务数计算
+        weight: 计算单个任务权重（预估耗时）的函数，为空时每个任务权重相同
+
+    Returns:
+        分片列表，每个分片内保持任务的原始相对顺序，空分片会被丢弃
+    """
+    items = list(items)
+    try:
+        shard_count = int(shard_count)
+    except (TypeError, ValueError):
+        shard_count = 1
+    shard_count = max(1, min(shard_count, len(items)))
+    if shard_count <= 1:
+        return [items] if items else []
+
+    weight = weight or (lambda item: 1.0)
+    weighted = [(float(weight(item) or 0.0), index, item) for index, item in enumerate(items)]
+    # 权重大的任务先装箱，每次放入当前总权重最小的分片
+    weighted.sort(key=lambda entry: (-entry[0], entry[1]))
+    shard_loads = [0.0] * shard_count
+    shard_entries = [[] for _ in range(shard_count)]
+    for item_weight, index, item in weighted:
+        target = min(range(shard_count), key=lambda i: (shard_loads[i], len(shard_entries[i])))
+        shard_loads[target] += item_weight
+        shard_entries[target].append((index, item))
+
+    shards = []
+    for entries in shard_entries:
+        if entries:
+            entries.sort(key=lambda entry: entry[0])
+            shards.append([item for _, item in entries])
+    return shards
+
+
+def run_concurrently(tasks: List[BatchTask], max_concurrency=DEFAULT_MAX_CONCURRENCY) -> List[BatchResult]:
+    """
+    并发执行批次任务。
+
+    Args:
+        tasks: BatchTask 列表，每个任务的 run() 返回 True(通过)/False(失败)
+        max_concurrency: 同时运行的最大批次数
+
+    Returns:
+        按启动顺序（预估耗时从长到短，相同时保持提交顺序）排列的 BatchResult 列表
+    """
+    if not tasks:
+        return []
+
+    # 预估耗时长的批次优先启动，避免最后剩下一个长批次单独运行
+    ordered_tasks = sorted(tasks, key=lambda task: task.estimated_duration, reverse=True)
+    workers = resolve_max_concurrency(max_concurrency, len(ordered_tasks))
+    print(f"\n[调度器] 共 {len(ordered_tasks)} 个批次，最大并发数: {workers}")
+
+    def _run_task(task):
+        start_time = time.time()
+        try:
+            passed = bool(task.run())
+            return BatchResult(task.label, passed, time.time() - start_time)
+        except Exception as e:
+            prefixed_print(task.label, f"批次执行异常: {e}")
+            return BatchResult(task.label, False, time.time() - start_time, str(e))
+
+    if workers == 1:
+        return [_run_task(task) for task in ordered_tasks]
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        futures = [executor.submit(_run_task, task) for task in ordered_tasks]
+        return [future.result() for future in futures]
+
+
+def print_batch_summary(results: List[BatchResult]):
+    """
+    打印所有批次的汇总结果。
+
+    Returns:
+        所有批次都通过时返回 True
+    """
+    if not results:
+        return True
+
+    all_passed = all(result.passed for result in results)
+    print(f"\n{'='*20} 批次执行汇总 {'='*20}")
+    for result in results:
+        status = "通过" if result.passed else "失败"
+        line = f"  {result.label:<24} {status}  耗时: {result.duration:.1f}s"
+        if result.error:
+            line += f"  错误: {result.error}"
+        print(line)
+    passed_count = sum(1 for result in results if result.passed)
+    print(f"  合计: {passed_count}/{len(results)} 个批次通过")
+    print("=" * 54)
+    sys.stdout.flush()
+    return all_passed
@@ -0,0 +1,295 @@
+# framework/utils/screenshot_encoder.py
+"""
+截图后台编码
+
+ReportLogger 截图后只拿到原始 PNG 字节，JPEG 压缩和 base64 编码交给后台线程池完成，
+测试步骤无需等待编码即可继续执行。生成报告前通过 resolve() 取回编码结果。
+
+FrameStore 按原始字节的哈希对截图去重：相邻步骤"执行后"与"执行前"的截图通常完全相同，
+相同的帧只编码、嵌入一次，步骤中只保存帧编号。
+
+外部资源模式（visual_mode.report_assets = external）下，FrameStore 不再保存 base64，
+而是把截图写成 JPEG 文件并生成缩略图，报告中只引用文件的相对路径。
+指定 spill_dir 时，编码完成的 base64 会写入该目录，内存中只保留仍在编码的帧。
+"""
+import base64
+import hashlib
+import itertools
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from typing import Optional
+
+# 后台编码线程数：Pillow 编码时会释放 GIL，两个线程足以跟上截图速度
+DEFAULT_WORKERS = 2
+# 外部资源模式下缩略图的宽度（像素）
+THUMBNAIL_WIDTH = 320
+THUMBNAIL_SUFFIX = '_thumb'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _open_rgb(image_source):
+    """打开图片（字节或文件路径）并转换为 JPEG 可保存的模式"""
+    from PIL import Image
+    img = Image.open(BytesIO(image_source) if isinstance(image_source, bytes) else image_source)
+    # JPEG 不支持透明通道
+    if img.mode in ('RGBA', 'P', 'LA'):
+        img = img.convert('RGB')
+    return img
+
+
+def _save_thumbnail(img, path, width=THUMBNAIL_WIDTH, quality=50):
+    thumbnail = img.copy()
+    thumbnail.thumbnail((width, max(1, width * 4)))
+    thumbnail.save(path, format="JPEG", quality=quality, optimize=True)
+
+
+def thumbnail_path(path: str) -> str:
+    """截图文件（或相对路径）对应的缩略图路径：a/b.jpg -> a/b_thumb.jpg"""
+    base, _ = os.path.splitext(path)
+    return f"{base}{THUMBNAIL_SUFFIX}.jpg"
+
+
+def encode_screenshot(png_bytes: bytes, quality=50) -> Optional[str]:
+    """把 PNG 截图压缩为 JPEG 并返回 base64 字符串，失败时返回 None"""
+    try:
+        img = _open_rgb(png_bytes)
+        buffered = BytesIO()
+        img.save(buffered, format="JPEG", quality=quality, optimize=True)
+        return base64.b64encode(buffered.getvalue()).decode('utf-8')
+    except Exception as e:
+        print(f"An unexpected error occurred during screenshot encoding: {e}")
+        return None
+
+
+def save_screenshot(png_bytes: bytes, path: str, quality=50, thumbnail_width=THUMBNAIL_WIDTH) -> bool:
+    """把 PNG 截图压缩为 JPEG 文件，并在同一目录生成缩略图；失败时返回 False"""
+    try:
+        img = _open_rgb(png_bytes)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        img.save(path, format="JPEG", quality=quality, optimize=True)
+        _save_thumbnail(img, thumbnail_path(path), thumbnail_width, quality)
+        return True
+    except Exception as e:
+        print(f"An unexpected error occurred during screenshot saving: {e}")
+        return False
+
+
+def create_thumbnail(image_path: str, thumbnail_width=THUMBNAIL_WIDTH) -> Optional[str]:
+    """为已有的截图文件（如失败截图）生成缩略图，返回缩略图路径，失败时返回 None"""
+    try:
+        target = thumbnail_path(image_path)
+        _save_thumbnail(_open_rgb(image_path), target, thumbnail_width)
+        return target
+    except Exception as e:
+        print(f"An unexpected error occurred during thumbnail creation: {e}")
+        return None
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_WORKERS, thread_name_prefix="screenshot-encoder")
+        return _executor
+
+
+def submit_encode(png_bytes: bytes, quality=50) -> Future:
+    """提交一张截图到后台编码，返回 Future"""
+    return _get_executor().submit(encode_screenshot, png_bytes, quality)
+
+
+def _save_asset(png_bytes: bytes, path: str, url: str, quality=50) -> Optional[str]:
+    """把截图保存为文件，成功时返回 url，失败时返回 None"""
+    return url if save_screenshot(png_bytes, path, quality) else None
+
+
+def resolve(value):
+    """取回编码结果：Future 会等待其完成，其它值原样返回"""
+    if isinstance(value, Future):
+        try:
+            return value.result()
+        except Exception as e:
+            print(f"An unexpected error occurred during screenshot encoding: {e}")
+            return None
+    return value
+
+
+class _SpilledFrame:
+    """已经写入磁盘的帧，get() 时再读回"""
+
+    __slots__ = ('path',)
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self) -> Optional[str]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError as e:
+            print(f"An unexpected error occurred while reading a spilled screenshot: {e}")
+            return None
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class FrameStore:
+    """
+    按内容哈希去重的截图帧仓库。
+    帧的值默认是 base64 字符串；指定 asset_dir 时为截图文件相对 asset_base 的路径（外部资源模式）。
+    """
+
+    _prefix_counter = itertools.count(1)
+
+    def __init__(self, prefix=None, asset_dir=None, asset_base=None, spill_dir=None):
+        # 帧编号前缀，保证同一份HTML中多个记录器的帧编号不冲突
+        self.prefix = prefix or f"r{next(self._prefix_counter)}"
+        self.asset_dir = asset_dir
+        # 报告所在目录，文件路径相对于它写入报告
+        self.asset_base = asset_base or (os.path.dirname(os.path.abspath(asset_dir)) if asset_dir else None)
+        # 多个 pytest 进程共用同一个截图目录，文件名带上随机前缀避免冲突
+        self._asset_token = uuid.uuid4().hex[:8]
+        self._frames = {}
+        self._ids_by_hash = {}
+        # 清空后编号也不重复，避免与已经写入报告的帧冲突
+        self._id_counter = itertools.count(1)
+        # 编码完成的 base64 写入该目录（外部资源模式下帧本来就在磁盘上，无需溢出）
+        self.spill_dir = None if asset_dir else spill_dir
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        # 尚未写入 spill_dir 的帧编号
+        self._unspilled = []
+        # 每一帧的编码耗时（毫秒）
+        self._encode_ms = {}
+        self.added = 0
+        self.deduplicated = 0
+
+    def add(self, png_bytes: bytes, quality=50) -> str:
+        """登记一帧截图并返回帧编号，内容相同的帧复用已有编号，不再重复编码"""
+        if self.spill_dir:
+            self.spill()
+        self.added += 1
+        digest = hashlib.sha1(png_bytes).hexdigest()
+        key = (digest, quality)
+        frame_id = self._ids_by_hash.get(key)
+        if frame_id is not None:
+            self.deduplicated += 1
+            return frame_id
+        frame_id = f"{self.prefix}_f{next(self._id_counter)}"
+        self._ids_by_hash[key] = frame_id
+        if self.external:
+            path = os.path.join(self.asset_dir, f"step_{self._asset_token}_{frame_id}.jpg")
+            url = os.path.relpath(path, self.asset_base).replace(os.sep, '/')
+            self._frames[frame_id] = self._submit(frame_id, _save_asset, png_bytes, path, url, quality)
+        else:
+            self._frames[frame_id] = self._submit(frame_id, encode_screenshot, png_bytes, quality)
+            if self.spill_dir:
+                self._unspilled.append(frame_id)
+        return frame_id
+
+    def _submit(self, frame_id, func, *args) -> Future:
+        """提交到后台线程池执行，并记录该帧的编码耗时"""
+        def timed():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self._encode_ms[frame_id] = round((time.perf_counter() - started) * 1000, 1)
+        return _get_executor().submit(timed)
+
+    def encode_ms(self, frame_id) -> Optional[float]:
+        """帧的编码耗时（毫秒），尚未编码完成或不存在时返回 None"""
+        return self._encode_ms.get(frame_id)
+
+    @property
+    def external(self) -> bool:
+        """是否为外部资源模式（帧的值是文件路径而不是 base64）"""
+        return bool(self.asset_dir)
+
+    def get(self, frame_id) -> Optional[str]:
+        """返回帧的 base64 编码结果，未完成时等待编码"""
+        if frame_id not in self._frames:
+            return None
+        value = self._frames[frame_id]
+        if isinstance(value, _SpilledFrame):
+            return value.read()
+        self._frames[frame_id] = resolve(value)
+        return self._frames[frame_id]
+
+    def spill(self):
+        """把已经编码完成的帧写入 spill_dir 并从内存中移除，返回本次写出的帧数"""
+        spilled = 0
+        pending = []
+        for frame_id in self._unspilled:
+            value = self._frames.get(frame_id)
+            if isinstance(value, Future) and not value.done():
+                pending.append(frame_id)
+                continue
+            data = resolve(value)
+            if not isinstance(data, str):
+                continue
+            path = os.path.join(self.spill_dir, f"{frame_id}.b64")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            self._frames[frame_id] = _SpilledFrame(path)
+            spilled += 1
+        self._unspilled = pending
+        return spilled
+
+    def ready(self, frame_id) -> bool:
+        """帧是否已经编码完成（不存在或已释放的帧视为完成）"""
+        value = self._frames.get(frame_id)
+        return not isinstance(value, Future) or value.done()
+
+    def release(self, frame_id):
+        """释放已经写入报告的帧数据；保留哈希映射，之后相同的帧仍复用该编号"""
+        if frame_id in self._frames:
+            if isinstance(self._frames[frame_id], _SpilledFrame):
+                self._frames[frame_id].remove()
+            self._frames[frame_id] = None
+
+    def resolve_all(self):
+        """等待所有帧编码完成"""
+        for frame_id in list(self._frames):
+            self.get(frame_id)
+
+    def frames(self, frame_ids=None):
+        """返回 {帧编号: base64}，可以只取指定的帧；编码失败的帧不包含在内"""
+        frame_ids = self._frames if frame_ids is None else frame_ids
+        result = {}
+        for frame_id in frame_ids:
+            data = self.get(frame_id)
+            if data:
+                result[frame_id] = data
+        return result
+
+    def clear(self):
+        for value in self._frames.values():
+            if isinstance(value, _SpilledFrame):
+                value.remove()
+        self._frames.clear()
+        self._unspilled = []
+        self._encode_ms.clear()
+        self._ids_by_hash.clear()
+        self.added = 0
+        self.deduplicated = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+
+def shutdown(wait=True):
+    """关闭后台编码线程池（下次提交时会自动重建）"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
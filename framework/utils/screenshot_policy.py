@@ -0,0 +1,169 @@
+# framework/utils/screenshot_policy.py
+"""
+报告截图策略
+
+决定 ReportLogger 在每个步骤前后是否截图：
+    full        - 每个步骤截取执行前、执行后两张图（默认，与旧版行为一致）
+    after_only  - 只截取执行后的图
+    on_failure  - 步骤执行前的截图只以原始字节保存在最近 N 帧的环形缓冲区中，
+                  只有步骤失败时才编码失败前的这几帧并截取失败后的图，通过的执行几乎没有截图开销
+    off         - 不截图
+可在 test_config.json 的 visual_mode.screenshot_policy 中配置，命令行 --screenshot-policy 优先。
+
+截图范围（visual_mode.screenshot_mode，可在单个流程中用 screenshot_mode 覆盖）：
+    full_page   - 整个页面（默认，与旧版行为一致）。长页面需要对整个文档排版，截图很大
+    viewport    - 只截取当前可视区域
+    element     - 步骤用到了定位器时只截取该元素所在区域，否则截取可视区域
+
+报告中截图的存放方式（visual_mode.report_assets）：
+    embedded    - 截图以 base64 嵌入报告，生成单个自包含的HTML文件（默认，与旧版行为一致）
+    external    - 截图写成 reports/reports_<日期>/screenshots/ 下的文件，报告只显示缩略图，
+                  原图按需懒加载，大型流程的报告体积和打开速度都会大幅改善
+"""
+from dataclasses import dataclass
+
+POLICY_FULL = 'full'
+POLICY_AFTER_ONLY = 'after_only'
+POLICY_ON_FAILURE = 'on_failure'
+POLICY_OFF = 'off'
+SCREENSHOT_POLICIES = (POLICY_FULL, POLICY_AFTER_ONLY, POLICY_ON_FAILURE, POLICY_OFF)
+
+# 常见写法到标准策略名的映射
+_POLICY_ALIASES = {
+    'every_step': POLICY_FULL,
+    'all': POLICY_FULL,
+    'after': POLICY_AFTER_ONLY,
+    'failure': POLICY_ON_FAILURE,
+    'failure_only': POLICY_ON_FAILURE,
+    'none': POLICY_OFF,
+    'false': POLICY_OFF,
+}
+
+# on_failure 策略默认保留的帧数
+DEFAULT_BUFFER_SIZE = 3
+
+CAPTURE_FULL_PAGE = 'full_page'
+CAPTURE_VIEWPORT = 'viewport'
+CAPTURE_ELEMENT = 'element'
+CAPTURE_MODES = (CAPTURE_FULL_PAGE, CAPTURE_VIEWPORT, CAPTURE_ELEMENT)
+
+_CAPTURE_MODE_ALIASES = {
+    'full': CAPTURE_FULL_PAGE,
+    'page': CAPTURE_FULL_PAGE,
+    'clip': CAPTURE_ELEMENT,
+    'locator': CAPTURE_ELEMENT,
+}
+
+ASSETS_EMBEDDED = 'embedded'
+ASSETS_EXTERNAL = 'external'
+REPORT_ASSET_MODES = (ASSETS_EMBEDDED, ASSETS_EXTERNAL)
+
+_ASSET_MODE_ALIASES = {
+    'inline': ASSETS_EMBEDDED,
+    'self_contained': ASSETS_EMBEDDED,
+    'files': ASSETS_EXTERNAL,
+    'file': ASSETS_EXTERNAL,
+}
+
+
+def normalize_policy(value):
+    """把配置值规范化为标准策略名，无法识别时抛出 ValueError"""
+    name = str(value).strip().lower().replace('-', '_').replace(' ', '_')
+    name = _POLICY_ALIASES.get(name, name)
+    if name not in SCREENSHOT_POLICIES:
+        raise ValueError(f"未知的截图策略 '{value}'，可选值: {', '.join(SCREENSHOT_POLICIES)}")
+    return name
+
+
+def normalize_capture_mode(value, default=CAPTURE_FULL_PAGE):
+    """把截图范围配置规范化为标准名称，空值返回 default，无法识别时抛出 ValueError"""
+    if value is None or str(value).strip() == '':
+        return default
+    name = str(value).strip().lower().replace('-', '_').replace(' ', '_')
+    name = _CAPTURE_MODE_ALIASES.get(name, name)
+    if name not in CAPTURE_MODES:
+        raise ValueError(f"未知的截图范围 '{value}'，可选值: {', '.join(CAPTURE_MODES)}")
+    return name
+
+
+def normalize_asset_mode(value, default=ASSETS_EMBEDDED):
+    """把报告截图存放方式规范化为标准名称，空值返回 default，无法识别时抛出 ValueError"""
+    if value is None or str(value).strip() == '':
+        return default
+    name = str(value).strip().lower().replace('-', '_').replace(' ', '_')
+    name = _ASSET_MODE_ALIASES.get(name, name)
+    if name not in REPORT_ASSET_MODES:
+        raise ValueError(f"未知的报告截图存放方式 '{value}'，可选值: {', '.join(REPORT_ASSET_MODES)}")
+    return name
+
+
+def report_asset_mode(visual_config=None):
+    """读取 visual_mode.report_assets，无法识别时打印提示并使用默认的 embedded"""
+    try:
+        return normalize_asset_mode((visual_config or {}).get('report_assets'))
+    except ValueError as e:
+        print(f"[配置] {e}，使用默认方式 '{ASSETS_EMBEDDED}'")
+        return ASSETS_EMBEDDED
+
+
+def page_screenshot_options(capture_mode):
+    """返回对整个页面截图时传给 page.screenshot() 的参数（element 范围在没有定位器时按可视区域截图）"""
+    return {'full_page': capture_mode == CAPTURE_FULL_PAGE}
+
+
+@dataclass
+class ScreenshotPolicy:
+    """ReportLogger 的截图策略"""
+    mode: str = POLICY_FULL
+    # on_failure 策略下保留的最近帧数
+    buffer_size: int = DEFAULT_BUFFER_SIZE
+    # 截图范围，见 CAPTURE_MODES
+    capture_mode: str = CAPTURE_FULL_PAGE
+    # 报告中截图的存放方式，见 REPORT_ASSET_MODES
+    asset_mode: str = ASSETS_EMBEDDED
+
+    def __post_init__(self):
+        self.mode = normalize_policy(self.mode)
+        self.capture_mode = normalize_capture_mode(self.capture_mode)
+        self.asset_mode = normalize_asset_mode(self.asset_mode)
+        try:
+            self.buffer_size = max(1, int(self.buffer_size))
+        except (TypeError, ValueError):
+            self.buffer_size = DEFAULT_BUFFER_SIZE
+
+    @property
+    def captures_before(self):
+        """步骤开始时是否截图并立即编码"""
+        return self.mode == POLICY_FULL
+
+    @property
+    def buffers_before(self):
+        """步骤开始时是否只截图放入环形缓冲区"""
+        return self.mode == POLICY_ON_FAILURE
+
+    def captures_after(self, status):
+        """步骤结束时是否截图"""
+        if self.mode in (POLICY_FULL, POLICY_AFTER_ONLY):
+            return True
+        return self.mode == POLICY_ON_FAILURE and status == 'FAIL'
+
+    @classmethod
+    def from_config(cls, visual_config=None, cli_value=None):
+        """
+        根据 visual_mode 配置和命令行参数创建策略，命令行参数优先。
+        配置值无法识别时打印提示并使用默认策略。
+        """
+        visual_config = visual_config or {}
+        mode = cli_value or visual_config.get('screenshot_policy', POLICY_FULL)
+        buffer_size = visual_config.get('screenshot_buffer_size', DEFAULT_BUFFER_SIZE)
+        try:
+            capture_mode = normalize_capture_mode(visual_config.get('screenshot_mode'))
+        except ValueError as e:
+            print(f"[配置] {e}，使用默认截图范围 '{CAPTURE_FULL_PAGE}'")
+            capture_mode = CAPTURE_FULL_PAGE
+        asset_mode = report_asset_mode(visual_config)
+        try:
+            return cls(mode, buffer_size, capture_mode, asset_mode)
+        except ValueError as e:
+            print(f"[配置] {e}，使用默认策略 '{POLICY_FULL}'")
+            return cls(POLICY_FULL, buffer_size, capture_mode, asset_mode)
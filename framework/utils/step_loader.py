@@ -0,0 +1,318 @@
+# framework/utils/step_loader.py
+"""
+测试步骤加载
+
+统一从 Excel 中读取测试步骤。Excel 通过 openpyxl 只读模式逐行读取，
+执行路径上不再导入 pandas/numpy。每个工作簿在一次执行中只解析一次，
+解析结果按 文件路径 + 修改时间 + Sheet名称 缓存，供 Session/Function
+测试模块和执行器（读取 Sheet 列表）共同使用。
+
+解析结果还会以 JSON 形式写入磁盘缓存目录 test_data/.step_cache/，
+目录名取自工作簿内容的哈希值。执行器在启动 pytest 子进程前预先写好缓存，
+子进程和之后的重复执行（包括CI重跑）对未修改的工作簿直接读取缓存，无需再解析 Excel。
+每次写入新的缓存目录后清理旧目录：其他 CACHE_VERSION 的目录全部删除，
+当前版本只保留最近使用的 MAX_CACHE_ENTRIES 个（读取缓存时会更新目录的修改时间）。
+"""
+import os
+import json
+import re
+import shutil
+import hashlib
+import threading
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+STEP_CACHE_DIR = os.path.join(project_root, 'test_data', '.step_cache')
+# 解析规则变化时递增，使旧的磁盘缓存自动失效
+CACHE_VERSION = 3
+# 当前版本最多保留的缓存目录数（每个工作簿的每个内容版本一个目录）
+MAX_CACHE_ENTRIES = 64
+_CACHE_DIR_PATTERN = re.compile(r'^v(\d+)_[0-9a-f]{40}$')
+# 磁盘缓存（JSON）能原样还原的单元格类型；含有日期等其他类型的工作簿不写入磁盘缓存
+_JSON_CELL_TYPES = (str, int, float, bool)
+
+# (文件绝对路径, 修改时间, Sheet名称) -> 步骤列表
+_steps_cache = {}
+# (文件绝对路径, 修改时间) -> 按工作簿顺序排列的 Sheet 名称列表
+_sheet_names_cache = {}
+# (文件绝对路径, 修改时间) -> 磁盘缓存目录
+_disk_cache_dirs = {}
+
+
+def resolve_excel_path(file_path):
+    """把 test_config.json 中的相对路径解析为基于项目根目录的绝对路径"""
+    file_path = str(file_path)
+    if not os.path.isabs(file_path):
+        file_path = os.path.join(project_root, file_path)
+    return os.path.abspath(file_path)
+
+
+def _header_names(header_row):
+    """
+    把表头行转换为列名，规则与 pandas.read_excel 一致：
+    空表头命名为 "Unnamed: 列序号"，重复的列名依次加上 ".1"、".2" 后缀。
+    """
+    names = []
+    seen = {}
+    for index, value in enumerate(header_row):
+        name = f"Unnamed: {index}" if value is None or value == '' else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _is_blank(value):
+    return value is None or value == ''
+
+
+def _row_width(row):
+    """行中最后一个非空单元格之后的列数"""
+    for index in range(len(row) - 1, -1, -1):
+        if not _is_blank(row[index]):
+            return index + 1
+    return 0
+
+
+def _iter_sheet_rows(worksheet):
+    """
+    产出步骤字典：第一行为表头，空单元格为 ''，整行为空的行被跳过。
+    与 pandas 一致，列数取所有行中最靠右的非空单元格，超出表头的列命名为 "Unnamed: 列序号"，
+    每个步骤都包含全部列（因此需要先读完整个 Sheet 才能确定列名）。
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header_row = next(rows, None)
+    if header_row is None:
+        return
+    data_rows = [row for row in rows if _row_width(row)]
+    width = max([_row_width(header_row)] + [_row_width(row) for row in data_rows])
+    header_row = list(header_row)[:width]
+    header_row += [None] * (width - len(header_row))
+    names = _header_names(header_row)
+    for row in data_rows:
+        step = {name: '' for name in names}
+        for index, value in enumerate(row[:width]):
+            step[names[index]] = '' if value is None else value
+        yield step
+
+
+def iter_steps(file_path, sheet_name=0):
+    """
+    以只读模式逐行读取 Sheet 中的测试步骤，产出步骤字典。
+
+    Args:
+        file_path: Excel 文件路径（相对路径基于项目根目录）
+        sheet_name: Sheet 名称，也可以是从 0 开始的 Sheet 序号
+    """
+    from openpyxl import load_workbook
+    workbook = load_workbook(resolve_excel_path(file_path), read_only=True, data_only=True)
+    try:
+        if isinstance(sheet_name, int) and not isinstance(sheet_name, bool):
+            if not 0 <= sheet_name < len(workbook.sheetnames):
+                raise ValueError(f"Sheet 序号 {sheet_name} 超出范围，共 {len(workbook.sheetnames)} 个 Sheet")
+            worksheet = workbook.worksheets[sheet_name]
+        elif str(sheet_name) in workbook.sheetnames:
+            worksheet = workbook[str(sheet_name)]
+        else:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        yield from _iter_sheet_rows(worksheet)
+    finally:
+        workbook.close()
+
+
+def _parse_workbook(excel_path):
+    """一次性解析工作簿中的所有 Sheet，返回 {Sheet名称: 步骤列表}"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        return {str(worksheet.title): list(_iter_sheet_rows(worksheet)) for worksheet in workbook.worksheets}
+    finally:
+        workbook.close()
+
+
+def _content_hash(excel_path):
+    """计算工作簿内容的哈希值"""
+    digest = hashlib.sha1()
+    with open(excel_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json_atomic(path, data):
+    temp_path = f"{path}.{os.getpid()}_{threading.get_ident()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+def _json_cacheable(sheets):
+    """所有单元格都能经 JSON 原样还原时返回 True（日期、时间等类型读回后会变成字符串，与内存中的结果不一致）"""
+    return all(isinstance(value, _JSON_CELL_TYPES)
+               for steps in sheets.values() for step in steps for value in step.values())
+
+
+def _write_disk_cache(cache_dir, sheets):
+    """
+    把解析结果写入磁盘缓存：sheets.json 记录 Sheet 顺序，每个 Sheet 一个 JSON 文件。
+    含有 JSON 无法原样表示的单元格时不写入，子进程会自行解析工作簿。
+    """
+    if not _json_cacheable(sheets):
+        print("[步骤缓存] 工作簿含有日期等无法原样缓存的单元格，不写入磁盘缓存")
+        return
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for index, steps in enumerate(sheets.values()):
+            _write_json_atomic(os.path.join(cache_dir, f"{index}.json"), steps)
+        # 最后写入 Sheet 列表，它存在即表示缓存完整
+        _write_json_atomic(os.path.join(cache_dir, 'sheets.json'), list(sheets))
+    except OSError as e:
+        print(f"[步骤缓存] 写入磁盘缓存失败: {e}")
+        return
+    _prune_disk_cache(cache_dir)
+
+
+def _prune_disk_cache(keep_dir):
+    """删除其他 CACHE_VERSION 的缓存目录，当前版本只保留最近使用的 MAX_CACHE_ENTRIES 个（keep_dir 始终保留）"""
+    cache_root = os.path.dirname(keep_dir)
+    try:
+        names = os.listdir(cache_root)
+    except OSError:
+        return
+    current = []
+    for name in names:
+        match = _CACHE_DIR_PATTERN.match(name)
+        path = os.path.join(cache_root, name)
+        if not match or path == keep_dir or not os.path.isdir(path):
+            continue
+        if int(match.group(1)) != CACHE_VERSION:
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        try:
+            current.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    current.sort(reverse=True)
+    # keep_dir 占用一个名额
+    for _, path in current[MAX_CACHE_ENTRIES - 1:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _read_disk_sheet_names(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'sheets.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_disk_sheet(cache_dir, index):
+    try:
+        with open(os.path.join(cache_dir, f"{index}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _ensure_parsed(excel_path):
+    """确保工作簿已解析（或已从磁盘缓存载入 Sheet 列表），返回缓存使用的 (路径, 修改时间) 键"""
+    if not os.path.exists(excel_path):
+        raise FileNotFoundError(f"测试文件不存在: {excel_path}")
+    workbook_key = (excel_path, os.path.getmtime(excel_path))
+    if workbook_key in _sheet_names_cache:
+        return workbook_key
+
+    # 工作簿被修改过时，清理旧版本的缓存
+    for cache in (_sheet_names_cache, _disk_cache_dirs):
+        for stale_key in [key for key in cache if key[0] == excel_path]:
+            del cache[stale_key]
+    for stale_key in [key for key in _steps_cache if key[0] == excel_path]:
+        del _steps_cache[stale_key]
+
+    cache_dir = os.path.join(STEP_CACHE_DIR, f"v{CACHE_VERSION}_{_content_hash(excel_path)}")
+    _disk_cache_dirs[workbook_key] = cache_dir
+    sheet_names = _read_disk_sheet_names(cache_dir)
+    if sheet_names is not None:
+        # 更新目录的修改时间，清理旧缓存时按最近使用排序
+        try:
+            os.utime(cache_dir)
+        except OSError:
+            pass
+        _sheet_names_cache[workbook_key] = sheet_names
+        return workbook_key
+
+    sheets = _parse_workbook(excel_path)
+    for sheet_name, steps in sheets.items():
+        _steps_cache[workbook_key + (sheet_name,)] = steps
+    _sheet_names_cache[workbook_key] = list(sheets)
+    _write_disk_cache(cache_dir, sheets)
+    return workbook_key
+
+
+def _get_sheet_steps(workbook_key, sheet_name):
+    """从内存缓存读取 Sheet，未命中时从磁盘缓存载入，磁盘缓存损坏时重新解析工作簿"""
+    steps_key = workbook_key + (sheet_name,)
+    if steps_key not in _steps_cache:
+        index = _sheet_names_cache[workbook_key].index(sheet_name)
+        steps = _read_disk_sheet(_disk_cache_dirs[workbook_key], index)
+        if steps is None:
+            sheets = _parse_workbook(workbook_key[0])
+            for name, sheet_steps in sheets.items():
+                _steps_cache[workbook_key + (name,)] = sheet_steps
+            _write_disk_cache(_disk_cache_dirs[workbook_key], sheets)
+        else:
+            _steps_cache[steps_key] = steps
+    return _steps_cache[steps_key]
+
+
+def get_sheet_names(file_path):
+    """返回工作簿中所有 Sheet 的名称"""
+    workbook_key = _ensure_parsed(resolve_excel_path(file_path))
+    return list(_sheet_names_cache[workbook_key])
+
+
+def load_steps(file_path, sheet_name):
+    """
+    读取指定 Sheet 中的全部测试步骤。
+
+    Args:
+        file_path: Excel 文件路径（相对路径基于项目根目录）
+        sheet_name: Sheet 名称，也可以是从 0 开始的 Sheet 序号
+
+    Returns:
+        步骤字典列表（每次返回新的副本，调用方可以自由修改）
+    """
+    workbook_key = _ensure_parsed(resolve_excel_path(file_path))
+    sheet_names = _sheet_names_cache[workbook_key]
+    if isinstance(sheet_name, int) and not isinstance(sheet_name, bool):
+        if not 0 <= sheet_name < len(sheet_names):
+            raise ValueError(f"Sheet 序号 {sheet_name} 超出范围，共 {len(sheet_names)} 个 Sheet")
+        sheet_name = sheet_names[sheet_name]
+    sheet_name = str(sheet_name)
+    if sheet_name not in sheet_names:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    return [dict(step) for step in _get_sheet_steps(workbook_key, sheet_name)]
+
+
+def warm_step_cache(flows):
+    """
+    预先解析流程用到的工作簿并写入磁盘缓存，供随后启动的 pytest 子进程直接读取。
+
+    Args:
+        flows: test_config.json 中的流程配置列表
+    """
+    for file_path in {flow.get("file_path") for flow in flows if flow.get("file_path")}:
+        try:
+            _ensure_parsed(resolve_excel_path(file_path))
+        except Exception as e:
+            # 预热失败不影响执行，子进程会自行解析并报告错误
+            print(f"[步骤缓存] 预解析 {file_path} 失败: {e}")
+
+
+def clear_cache():
+    """清空已解析的步骤缓存（仅内存，不删除磁盘缓存）"""
+    _steps_cache.clear()
+    _sheet_names_cache.clear()
+    _disk_cache_dirs.clear()
@@ -0,0 +1,201 @@
+# framework/utils/step_plan.py
+"""
+测试步骤执行计划
+
+在浏览器启动前把 Excel 中的步骤行编译为执行计划：
+- 关键字只解析一次（从 Keywords 类上查找处理函数，执行时再绑定到实例）
+- 需要解析格式的 数据内容（如 open 的 "url,超时"、set_window_size 的 "宽x高"）预先解析，
+  解析结果通过步骤字典中的 PARSED_ARGS_KEY 传给关键字，关键字不再重复解析
+- 整个 Sheet 中格式错误的步骤一次性汇总报告，而不是执行到一半才失败
+- Session模式按步骤字典参数化，字典中的 PLANNED_STEP_KEY 指向编译后的步骤，执行时同样通过 bind 调用
+
+只校验会被正常执行的步骤：跳过(skip)的步骤、终止(end)之后的步骤不校验；
+尝试执行(try)的步骤失败本就会被跳过，因此同样不视为错误。
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+from .execution_status import get_execution_status, is_end_status, is_skip_status, is_try_status
+
+# 步骤字典中存放预解析参数的键
+PARSED_ARGS_KEY = '_parsed_args'
+# Session模式参数化用的步骤字典中指向 PlannedStep 的键
+PLANNED_STEP_KEY = '_planned_step'
+
+
+def parse_open_args(data_content):
+    """解析 open 的 数据内容 "url[,超时秒数]"，返回 (url, 超时毫秒或None)"""
+    parts = [p.strip() for p in str(data_content).split(',')]
+    url = parts[0]
+    if len(parts) > 1:
+        try:
+            return url, int(parts[1]) * 1000
+        except ValueError:
+            raise ValueError(f"超时秒数格式错误: '{parts[1]}', 期望格式为 'url,秒数'")
+    return url, None
+
+
+def parse_position_args(data_content):
+    """解析 click_at_position 的 数据内容 "x=数值,y=数值"，返回 (x, y)"""
+    position_data = str(data_content).strip()
+    try:
+        pos_dict = dict(item.split("=") for item in position_data.replace(" ", "").split(','))
+        return float(pos_dict['x']), float(pos_dict['y'])
+    except Exception:
+        raise ValueError(f"位置数据格式错误: '{position_data}', 期望格式为 'x=数值,y=数值'")
+
+
+def parse_window_size_args(data_content):
+    """解析 set_window_size 的 数据内容 "宽x高"，返回 (宽, 高)"""
+    try:
+        width, height = map(int, str(data_content).split('x'))
+        return width, height
+    except ValueError:
+        raise ValueError(f"窗口大小格式错误: '{data_content}', 期望 '宽x高'")
+
+
+def parse_scroll_args(data_content):
+    """解析 scroll_page 的 数据内容 "x,y"，返回 (x轴像素, y轴像素)"""
+    scroll_data = str(data_content).strip()
+    try:
+        delta_x, delta_y = map(int, scroll_data.split(','))
+        return delta_x, delta_y
+    except ValueError:
+        raise ValueError(f"滚动数据格式错误: '{scroll_data}', 期望格式为 'x,y' (例如 '0,500')")
+
+
+# 关键字 -> (数据内容解析函数, 数据内容列缺失时的默认值)
+ARGUMENT_PARSERS = {
+    'open': (parse_open_args, ''),
+    'open_in_new_page': (parse_open_args, ''),
+    'click_at_position': (parse_position_args, ''),
+    'set_window_size': (parse_window_size_args, '1920x1080'),
+    'scroll_page': (parse_scroll_args, '0,500'),
+}
+
+
+def parse_step_args(keyword, step):
+    """按关键字解析步骤的 数据内容，不需要解析的关键字返回 None，格式错误时抛出 ValueError"""
+    parser, default = ARGUMENT_PARSERS.get(keyword, (None, None))
+    if parser is None:
+        return None
+    return parser(step.get('数据内容', default))
+
+
+def get_step_args(keyword, kwargs):
+    """供关键字使用：优先取执行计划预解析的参数，没有时现场解析"""
+    if PARSED_ARGS_KEY in kwargs:
+        return kwargs[PARSED_ARGS_KEY]
+    return parse_step_args(keyword, kwargs)
+
+
+@dataclass
+class PlannedStep:
+    """编译后的单个步骤"""
+    index: int
+    step: dict
+    step_id: str
+    keyword: str
+    description: str
+    # 关键字在 Keywords 类上的处理函数，关键字为空或不存在时为 None
+    handler: Optional[Callable] = None
+    args: Any = None
+    error: Optional[str] = None
+
+    @property
+    def kwargs(self):
+        """传给关键字的参数：原始步骤字典 + 预解析参数"""
+        if self.args is None:
+            return self.step
+        return {**self.step, PARSED_ARGS_KEY: self.args}
+
+    def as_param(self):
+        """Session模式参数化用的步骤字典：kwargs 加上指向本步骤的引用（调用关键字时仍使用 kwargs）"""
+        return {**self.kwargs, PLANNED_STEP_KEY: self}
+
+    def bind(self, keywords):
+        """把处理函数绑定到 Keywords 实例，返回可直接调用的关键字方法"""
+        return self.handler.__get__(keywords, type(keywords)) if self.handler else None
+
+
+@dataclass
+class StepPlan:
+    """一个 Sheet（或一组步骤）的执行计划"""
+    steps: List[PlannedStep] = field(default_factory=list)
+    name: str = ''
+
+    @property
+    def errors(self):
+        return [f"步骤 {step.step_id} (第{step.index + 2}行): {step.error}" for step in self.steps if step.error]
+
+
+def _resolve_handler(keywords_class, keyword):
+    handler = getattr(keywords_class, keyword, None) if keyword else None
+    return handler if callable(handler) else None
+
+
+def compile_plan(steps, keywords_class=None, name=''):
+    """
+    把步骤字典列表编译为执行计划。
+
+    Args:
+        steps: load_steps 返回的步骤字典列表
+        keywords_class: 用于查找关键字的类，默认为 framework.keywords.Keywords
+        name: 计划名称（如 "文件路径 [Sheet]"），用于错误报告
+
+    Returns:
+        StepPlan，格式错误的步骤记录在 PlannedStep.error 中
+    """
+    if keywords_class is None:
+        from framework.keywords import Keywords as keywords_class
+
+    plan = StepPlan(name=name)
+    validating = True
+    for index, step in enumerate(steps):
+        keyword = str(step.get('关键字', '') or '').strip()
+        planned = PlannedStep(
+            index=index,
+            step=step,
+            step_id=str(step.get('编号', '') or f'行号_{index + 2}'),
+            keyword=keyword,
+            description=str(step.get('描述', '') or ''),
+            handler=_resolve_handler(keywords_class, keyword),
+        )
+        plan.steps.append(planned)
+
+        execution_status = get_execution_status(step)
+        if is_end_status(execution_status):
+            # 终止之后的步骤不会被执行
+            validating = False
+        if not keyword or not validating or is_skip_status(execution_status):
+            continue
+        tolerant = is_try_status(execution_status)
+
+        if planned.handler is None:
+            if not tolerant:
+                planned.error = f"关键字 '{keyword}' 不存在"
+            continue
+        try:
+            planned.args = parse_step_args(keyword, step)
+        except ValueError as e:
+            if not tolerant:
+                planned.error = str(e)
+    return plan
+
+
+def planned_step_of(step):
+    """取回 as_param 生成的步骤字典对应的 PlannedStep，不是编译生成的字典时返回 None"""
+    return step.get(PLANNED_STEP_KEY) if isinstance(step, dict) else None
+
+
+def format_plan_errors(plans):
+    """把多个执行计划中的格式错误汇总为一条报告文本，没有错误时返回空字符串"""
+    sections = []
+    for plan in plans:
+        if plan.errors:
+            lines = "\n".join(f"  - {error}" for error in plan.errors)
+            sections.append(f"{plan.name or '测试步骤'}:\n{lines}")
+    if not sections:
+        return ''
+    total = sum(len(plan.errors) for plan in plans)
+    return f"测试步骤校验失败，共 {total} 处错误（浏览器未启动）:\n\n" + "\n\n".join(sections)
@@ -0,0 +1,100 @@
+# framework/utils/step_store.py
+"""
+步骤记录的溢出存储
+
+Session 模式下 ReportLogger 在整个会话中持续记录步骤，步骤列表会一直增长。
+StepStore 只在内存中保留最近 window 个步骤，更早的步骤以 JSON Lines 的形式追加写入磁盘文件，
+会话运行多久内存占用都保持不变。需要遍历全部步骤时（生成报告、统计耗时）再从文件中按行读回。
+
+最近的步骤留在内存中是因为它们仍可能被修改（例如 on_failure 截图策略在步骤失败时
+给前几个步骤补上执行前截图），只有离开窗口的步骤才会写入文件。
+"""
+import json
+import os
+import tempfile
+from collections import deque
+from dataclasses import asdict, is_dataclass
+
+# 默认在内存中保留的步骤数
+DEFAULT_WINDOW = 50
+
+
+def _to_record(step):
+    return asdict(step) if is_dataclass(step) else dict(step)
+
+
+class StepStore:
+    """只在内存中保留最近若干步骤、其余步骤追加写入 JSONL 文件的步骤列表"""
+
+    def __init__(self, window=DEFAULT_WINDOW, path=None, factory=None):
+        """
+        :param window: 内存中保留的步骤数
+        :param path: JSONL 文件路径，为空时使用临时文件（close() 时删除）
+        :param factory: 从文件读回步骤时使用的构造函数，接收字段字典；为空时直接返回字典
+        """
+        self.window = max(1, int(window))
+        self.factory = factory
+        self._owns_file = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="report_steps_", suffix=".jsonl")
+            os.close(fd)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+        self._recent = deque()
+        self._spilled = 0
+
+    def append(self, step):
+        self._recent.append(step)
+        while len(self._recent) > self.window:
+            self._spill(self._recent.popleft())
+
+    def _spill(self, step):
+        self._file.write(json.dumps(_to_record(step), ensure_ascii=False, default=str) + '\n')
+        self._spilled += 1
+
+    @property
+    def spilled(self) -> int:
+        """已经写入文件的步骤数"""
+        return self._spilled
+
+    @property
+    def recent(self):
+        """内存中的最近步骤"""
+        return list(self._recent)
+
+    def _load(self, line):
+        record = json.loads(line)
+        return self.factory(**record) if self.factory else record
+
+    def __iter__(self):
+        """按记录顺序遍历全部步骤：先从文件读回已写出的步骤，再遍历内存中的步骤"""
+        if self._spilled:
+            self._file.flush()
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield self._load(line)
+        yield from list(self._recent)
+
+    def __len__(self):
+        return self._spilled + len(self._recent)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def clear(self):
+        """清空全部步骤（包括已写入文件的步骤）"""
+        self._recent.clear()
+        self._file.seek(0)
+        self._file.truncate()
+        self._spilled = 0
+
+    def close(self):
+        """关闭文件；使用临时文件时一并删除"""
+        if self._file.closed:
+            return
+        self._file.close()
+        if self._owns_file and os.path.exists(self.path):
+            os.remove(self.path)
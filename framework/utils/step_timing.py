@@ -0,0 +1,124 @@
+# framework/utils/step_timing.py
+"""
+步骤耗时分解
+
+LogStep.duration 只有一个总耗时，其中还包含了截图开销。StepTimer 把一个步骤的耗时按阶段分解：
+    page        - _get_target_page 中的页面定位与等待
+    locator     - 定位器解析（不含其中的页面定位）
+    action      - Playwright 操作本身（不含定位）
+    screenshot  - 报告截图（page.screenshot / locator.screenshot）
+    logger      - 报告记录器自身的开销（不含截图）
+    encode      - 截图的后台编码，不在步骤的执行路径上；帧去重后只计入第一个引用该帧的步骤
+阶段可以嵌套，外层阶段只记录扣除内层阶段后的时间，各阶段之和不会重复计算。
+耗时分解显示在步骤报告中，并以 JSON Lines 写入 <报告名>_timings.jsonl 供程序分析。
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+PHASE_PAGE = 'page'
+PHASE_LOCATOR = 'locator'
+PHASE_ACTION = 'action'
+PHASE_SCREENSHOT = 'screenshot'
+PHASE_LOGGER = 'logger'
+PHASE_ENCODE = 'encode'
+PHASES = (PHASE_PAGE, PHASE_LOCATOR, PHASE_ACTION, PHASE_SCREENSHOT, PHASE_LOGGER, PHASE_ENCODE)
+
+
+class StepTimer:
+    """记录一个步骤各阶段耗时的计时器"""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._totals = {}
+        # 正在计时的阶段：[阶段名, 开始时间, 内层阶段耗时]
+        self._stack = []
+
+    @contextmanager
+    def phase(self, name):
+        """计时一个阶段；嵌套在其中的阶段的耗时不计入本阶段"""
+        frame = [name, self._clock(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = self._clock() - frame[1]
+            self.add(name, elapsed - frame[2])
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def add(self, name, seconds):
+        """直接累加一个阶段的耗时（秒）"""
+        self._totals[name] = self._totals.get(name, 0.0) + max(0.0, seconds)
+
+    def breakdown(self) -> dict:
+        """返回 {阶段: 毫秒}，按 PHASES 的顺序排列，未出现的阶段不包含在内"""
+        ordered = [name for name in PHASES if name in self._totals]
+        ordered += [name for name in self._totals if name not in PHASES]
+        return {name: round(self._totals[name] * 1000, 1) for name in ordered}
+
+
+def with_encode_time(timings, frame_ids, encode_ms, seen_frames):
+    """
+    在步骤耗时中补上截图编码时间。
+
+    :param timings: 步骤的阶段耗时
+    :param frame_ids: 步骤引用的帧编号
+    :param encode_ms: 按帧编号返回编码耗时（毫秒）的函数，未知时返回 None
+    :param seen_frames: 已经计入过的帧编号集合（会被更新），同一帧只计入第一个引用它的步骤
+    """
+    result = dict(timings or {})
+    total = 0.0
+    counted = False
+    for frame_id in frame_ids:
+        if frame_id in seen_frames:
+            continue
+        seen_frames.add(frame_id)
+        elapsed = encode_ms(frame_id)
+        if elapsed is not None:
+            total += elapsed
+            counted = True
+    if counted:
+        result[PHASE_ENCODE] = round(total, 1)
+    return result
+
+
+def format_timings(timings) -> str:
+    """把阶段耗时格式化为报告中显示的一行文字"""
+    return ' · '.join(f"{name} {value:g}" for name, value in (timings or {}).items())
+
+
+def timing_records(steps, encode_ms=None):
+    """
+    生成可序列化为JSON的步骤耗时记录。
+
+    :param steps: LogStep 序列（按执行顺序）
+    :param encode_ms: 按帧编号返回编码耗时的函数，为空时不统计编码时间
+    """
+    seen_frames = set()
+    records = []
+    for step in steps:
+        frame_ids = [frame_id for frame_id in (step.before_screenshot, step.after_screenshot) if frame_id]
+        timings = with_encode_time(step.timings, frame_ids, encode_ms, seen_frames) if encode_ms else dict(step.timings or {})
+        records.append({
+            'order': step.order,
+            'step_id': step.step_id,
+            'keyword': step.keyword,
+            'description': step.description,
+            'status': step.status,
+            'duration_ms': step.duration,
+            'timings_ms': timings,
+        })
+    return records
+
+
+def append_timing_records(path, records, **extra):
+    """把耗时记录追加写入 JSON Lines 文件，extra 中的字段（如用例id、浏览器）会加到每条记录上"""
+    if not records:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps({**extra, **record}, ensure_ascii=False) + '\n')
@@ -0,0 +1,114 @@
+# framework/utils/wait_profile.py
+"""
+页面等待预算
+
+按'页面'列定位页面时的各项等待时间（毫秒）由等待档位决定：
+    page_create_ms   - 等待新页面打开（默认 8000）
+    page_ready_ms    - 等待新页面 domcontentloaded（默认 15000）
+    networkidle_ms   - 等待网络空闲（默认 3000）；设为 0 完全跳过 networkidle 等待。
+                       单页应用的网络请求往往永远不会停止，每次等待都会白白耗尽这段时间
+    recover_load_ms  - 页面状态异常时等待 domcontentloaded（默认 2000）
+    reload_ms        - 仍然异常时刷新页面（默认 5000）
+    reload_load_ms   - 刷新后等待 domcontentloaded（默认 3000）
+
+预置档位：
+    fast      - 不等待 networkidle，各项等待更短，适合单页应用
+    default   - 与旧版固定的等待时间一致
+    tolerant  - 各项等待更长，适合响应慢的环境
+
+在 test_config.json 的 page_wait 中配置，值可以是档位名，也可以是字典：
+    "page_wait": "fast"
+    "page_wait": {"profile": "default", "networkidle_ms": 0}
+单个流程可以用同样格式的 page_wait 覆盖：流程指定了 profile 时以该档位为基础，否则在全局配置上叠加。
+只有 networkidle_ms 可以设为 0（跳过）；其他等待传给 Playwright 的 timeout=0 表示无限等待，
+因此小于 1 的值按 1 毫秒处理。
+"""
+from dataclasses import dataclass, fields, replace
+
+WAIT_FAST = 'fast'
+WAIT_DEFAULT = 'default'
+WAIT_TOLERANT = 'tolerant'
+
+
+@dataclass(frozen=True)
+class WaitProfile:
+    """页面定位、就绪等待和状态恢复的等待时间（毫秒）"""
+    name: str = WAIT_DEFAULT
+    page_create_ms: int = 8000
+    page_ready_ms: int = 15000
+    networkidle_ms: int = 3000
+    recover_load_ms: int = 2000
+    reload_ms: int = 5000
+    reload_load_ms: int = 3000
+
+    @property
+    def waits_for_networkidle(self):
+        """是否等待网络空闲"""
+        return self.networkidle_ms > 0
+
+
+WAIT_PROFILES = {
+    WAIT_FAST: WaitProfile(WAIT_FAST, page_create_ms=5000, page_ready_ms=8000, networkidle_ms=0,
+                           recover_load_ms=1000, reload_ms=3000, reload_load_ms=2000),
+    WAIT_DEFAULT: WaitProfile(),
+    WAIT_TOLERANT: WaitProfile(WAIT_TOLERANT, page_create_ms=15000, page_ready_ms=30000, networkidle_ms=5000,
+                               recover_load_ms=5000, reload_ms=10000, reload_load_ms=5000),
+}
+
+# 可以单独覆盖的等待时间
+BUDGET_FIELDS = tuple(field.name for field in fields(WaitProfile) if field.name != 'name')
+# 设为 0 表示跳过该等待的项；其余各项至少 MIN_WAIT_MS，避免 timeout=0 变成无限等待
+SKIPPABLE_FIELDS = ('networkidle_ms',)
+MIN_WAIT_MS = 1
+
+
+def normalize_wait_profile_name(value):
+    """把档位名规范化为标准名称，无法识别时抛出 ValueError"""
+    name = str(value).strip().lower()
+    if name not in WAIT_PROFILES:
+        raise ValueError(f"未知的页面等待档位 '{value}'，可选值: {', '.join(WAIT_PROFILES)}")
+    return name
+
+
+def _apply(profile, config):
+    """在 profile 上应用一层 page_wait 配置（档位名或字典），无法识别的值打印提示后忽略"""
+    if config is None or config == '' or config == {}:
+        return profile
+    if not isinstance(config, dict):
+        config = {'profile': config}
+
+    if config.get('profile'):
+        try:
+            profile = WAIT_PROFILES[normalize_wait_profile_name(config['profile'])]
+        except ValueError as e:
+            print(f"[配置] {e}，使用档位 '{profile.name}'")
+
+    overrides = {}
+    for key, value in config.items():
+        if key == 'profile':
+            continue
+        if key not in BUDGET_FIELDS:
+            print(f"[配置] page_wait 中未知的配置项 '{key}'，已忽略")
+            continue
+        try:
+            value_ms = int(value)
+        except (TypeError, ValueError):
+            print(f"[配置] page_wait.{key} 的值 '{value}' 不是整数毫秒数，已忽略")
+            continue
+        minimum = 0 if key in SKIPPABLE_FIELDS else MIN_WAIT_MS
+        if value_ms < minimum:
+            if minimum:
+                print(f"[配置] page_wait.{key} 的值 '{value}' 小于 {minimum} 毫秒（timeout=0 会无限等待），按 {minimum} 毫秒处理")
+            value_ms = minimum
+        overrides[key] = value_ms
+    return replace(profile, **overrides) if overrides else profile
+
+
+def resolve_wait_profile(config=None, flow_config=None):
+    """
+    根据全局和流程的 page_wait 配置得到等待档位。
+
+    :param config: test_config.json 的 page_wait
+    :param flow_config: 流程的 page_wait，叠加在全局配置之上
+    """
+    return _apply(_apply(WAIT_PROFILES[WAIT_DEFAULT], config), flow_config)
@@ -12,8 +12,27 @@ if project_root not in sys.path:
 # 导入Keywords是为了在最后报告时拿到那个全局变量
 from framework import Keywords as KeywordsModule
 from framework.Keywords import Keywords
+from framework.keywords.element_locator import TEXT_MATCH_STRATEGIES
 # 导入ReportLogger用于测试步骤记录
 from framework.utils.report_logger import ReportLogger
+from framework.utils.screenshot_policy import ScreenshotPolicy, SCREENSHOT_POLICIES, ASSETS_EXTERNAL
+from framework.utils.screenshot_encoder import create_thumbnail
+from framework.utils.step_store import DEFAULT_WINDOW as DEFAULT_STEP_WINDOW
+from framework.utils.step_timing import append_timing_records
+# Function模式下可选的浏览器上下文复用
+from framework.utils.context_pool import ContextPool
+# 按页码统计的页面等待耗时，会话结束时与 sleep 耗时一起输出
+from framework.utils.page_wait_metrics import page_wait_metrics
+# 结构化执行结果（JSON Lines），供仪表盘等下游工具增量读取
+from framework.utils.results_emitter import ResultsEmitter
+# 导入耗时历史记录，用于执行器按历史耗时调度流程
+from framework.utils.duration_history import DurationHistory, FLOW_META_KEY
+
+# 本次pytest进程中记录的流程/步骤耗时，在会话结束时统一写入历史文件
+_duration_history = None
+# 指定 --results-jsonl 时的结果输出器，以及当前正在执行的用例信息（用于关键字步骤记录）
+_results_emitter = None
+_results_context = {}
 
 def pytest_addoption(parser):
     """添加自定义命令行选项"""
@@ -28,6 +47,18 @@ def pytest_addoption(parser):
         default=".",
         help="指定截图保存目录路径"
     )
+    parser.addoption(
+        "--screenshot-policy",
+        action="store",
+        default=None,
+        help=f"测试报告的步骤截图策略，覆盖 test_config.json 中的 visual_mode.screenshot_policy ({'/'.join(SCREENSHOT_POLICIES)})"
+    )
+    parser.addoption(
+        "--results-jsonl",
+        action="store",
+        default=None,
+        help="把步骤/用例/流程的执行结果以 JSON Lines 逐行写入该文件"
+    )
 
 # --- Fixture 1: 加载JSON配置，只执行一次 ---
 @pytest.fixture(scope="session")
@@ -85,21 +116,116 @@ def set_running_mode_on_page(page, request, report_logger_name="report_logger"):
     page.context.running_mode = running_mode
     # 获取report_logger实例
     report_logger = request.getfixturevalue(report_logger_name)
-    return Keywords(page, report_logger)
+    keywords = Keywords(page, report_logger)
+    framework_config = request.getfixturevalue("framework_config")
+    keywords.text_match_strategy = _text_match_strategy(framework_config)
+    # 页面等待档位：全局 page_wait，Function模式下流程可以用 page_wait 覆盖
+    keywords.page_wait_config = framework_config.get("page_wait")
+    flow_config = getattr(getattr(request.node, "callspec", None), "params", {}).get("flow_config")
+    keywords.set_page_wait(flow_config.get("page_wait") if isinstance(flow_config, dict) else None)
+    return keywords
+
+def _text_match_strategy(framework_config):
+    """读取 get_by_text 匹配到多个元素时的处理策略（test_config.json 的 locator.text_match_strategy）"""
+    strategy = str(framework_config.get("locator", {}).get("text_match_strategy", Keywords.TEXT_MATCH_STRATEGY)).lower()
+    if strategy not in TEXT_MATCH_STRATEGIES:
+        print(f"[配置] 未知的 text_match_strategy '{strategy}'，使用默认值 '{Keywords.TEXT_MATCH_STRATEGY}'")
+        return Keywords.TEXT_MATCH_STRATEGY
+    return strategy
+
+@pytest.fixture(scope="session")
+def screenshot_policy(framework_config, request):
+    """报告截图策略：命令行 --screenshot-policy 优先，其次是 visual_mode.screenshot_policy"""
+    return ScreenshotPolicy.from_config(framework_config.get("visual_mode", {}),
+                                        request.config.getoption("--screenshot-policy"))
+
+@pytest.fixture(scope="session")
+def context_pool(browser, browser_context_args, framework_config):
+    """
+    Function模式的浏览器上下文池（execution.reuse_context 为 true 时开启，默认关闭）。
+    流程结束后上下文被重置并复用，不再为每个流程重新创建；未开启时为 None。
+    """
+    execution_config = framework_config.get("execution", {})
+    if not execution_config.get("reuse_context", False):
+        yield None
+        return
+    pool = ContextPool(lambda: browser.new_context(**browser_context_args),
+                       size=execution_config.get("context_pool_size", 1))
+    pool.warm()
+    yield pool
+    print(f"\n[上下文池] 共创建 {pool.created} 个浏览器上下文，复用 {pool.reused} 次")
+    pool.close()
+
+@pytest.fixture(scope="function")
+def flow_page(context_pool, request):
+    """Function模式流程使用的页面：开启上下文复用时从上下文池借用，否则使用 pytest-playwright 的 page"""
+    if context_pool is None:
+        yield request.getfixturevalue("page")
+        return
+    context = context_pool.acquire()
+    yield context.pages[0]
+    context_pool.release(context)
 
 @pytest.fixture(scope="function")
-def report_logger(page):
-    """创建ReportLogger实例，用于记录测试步骤"""
-    return ReportLogger(page)
+def report_logger(flow_page, screenshot_policy, request):
+    """创建ReportLogger实例，用于记录测试步骤（截图在后台线程中编码，测试结束时等待编码完成）"""
+    logger = ReportLogger(flow_page, screenshot_policy, request.config.getoption("--screenshots-dir"))
+    # Function模式下流程可以用 screenshot_mode 单独指定截图范围
+    flow_config = getattr(getattr(request.node, "callspec", None), "params", {}).get("flow_config")
+    if isinstance(flow_config, dict):
+        logger.set_capture_mode(flow_config.get("screenshot_mode"))
+    if _results_emitter is not None:
+        logger.add_step_listener(_emit_step_result)
+    yield logger
+    _write_step_timings(logger, request.config, test=request.node.nodeid)
+    logger.close()
+
+def _timings_path(config):
+    """步骤耗时分解(JSON Lines)的路径：与 pytest-html 报告放在一起，未指定 --html 时放在截图目录下"""
+    html_path = config.getoption("htmlpath", None)
+    if html_path:
+        return os.path.splitext(html_path)[0] + "_timings.jsonl"
+    return os.path.join(config.getoption("--screenshots-dir"), "step_timings.jsonl")
+
+def _write_step_timings(logger, config, **extra):
+    """把记录器中各步骤的耗时分解追加到 JSON Lines 文件，写入失败不影响测试结果"""
+    try:
+        append_timing_records(_timings_path(config), logger.timing_records(),
+                              browser=_current_browser(config), **extra)
+    except Exception as e:
+        print(f"写入步骤耗时分解时出错: {e}")
+
+def _step_report_path(config):
+    """Session模式流式步骤报告的路径：与 pytest-html 报告放在一起，未指定 --html 时放在截图目录下"""
+    html_path = config.getoption("htmlpath", None)
+    if html_path:
+        return os.path.splitext(html_path)[0] + "_steps.html"
+    return os.path.join(config.getoption("--screenshots-dir"), f"steps_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.html")
 
 @pytest.fixture(scope="session")
-def report_logger_session(page_session):
-    """创建session级别的ReportLogger实例，用于记录测试步骤"""
-    return ReportLogger(page_session)
+def report_logger_session(page_session, screenshot_policy, framework_config, request):
+    """
+    创建session级别的ReportLogger实例，用于记录测试步骤（可选地把步骤逐条写入HTML文件）。
+    只在内存中保留最近 visual_mode.report_memory_window（默认50，设为0不限制）个步骤，其余步骤和截图写入临时目录。
+    """
+    visual_config = framework_config.get("visual_mode", {})
+    memory_window = visual_config.get("report_memory_window", DEFAULT_STEP_WINDOW)
+    logger = ReportLogger(page_session, screenshot_policy, request.config.getoption("--screenshots-dir"),
+                          memory_window=memory_window or None)
+    if visual_config.get("stream_step_report", False):
+        step_report_path = _step_report_path(request.config)
+        logger.stream_to(step_report_path)
+        print(f"\n[报告] Session模式步骤报告将逐条写入: {step_report_path}")
+    if _results_emitter is not None:
+        logger.add_step_listener(_emit_step_result)
+    yield logger
+    # 先导出耗时分解，close() 会删除溢出到磁盘的步骤
+    _write_step_timings(logger, request.config, test="session")
+    logger.close()
 
 @pytest.fixture(scope="function")
-def keywords_func(page, request):
-    return set_running_mode_on_page(page, request)
+def keywords_func(flow_page, request):
+    return set_running_mode_on_page(flow_page, request)
 
 @pytest.fixture(scope="session")
 def page_session(browser):
@@ -114,11 +240,99 @@ def keywords_session(page_session, request):
     return set_running_mode_on_page(page_session, request, "report_logger_session")
 
 
+def _current_browser(config):
+    """获取本次pytest进程实际使用的浏览器名（pytest-playwright 的 --browser 参数）"""
+    browsers = config.getoption("browser", None) or ["chromium"]
+    return browsers[0] if isinstance(browsers, (list, tuple)) else str(browsers)
+
+def _record_duration(item, report):
+    """记录流程/步骤的耗时：Function模式按流程记录，Session模式按步骤累加到所属流程"""
+    global _duration_history
+    params = getattr(getattr(item, "callspec", None), "params", {})
+    browser = _current_browser(item.config)
+    flow_config = params.get("flow_config")
+    test_step = params.get("test_step")
+    if _duration_history is None and (flow_config or test_step):
+        _duration_history = DurationHistory()
+
+    if isinstance(flow_config, dict):
+        report_logger = item.funcargs.get("report_logger")
+        step_durations = report_logger.step_durations() if report_logger else {}
+        _duration_history.record(flow_config.get("file_path"), flow_config.get("sheet_name"), browser,
+                                 duration=report.duration, step_durations=step_durations)
+    elif isinstance(test_step, dict) and isinstance(test_step.get(FLOW_META_KEY), dict):
+        flow = test_step[FLOW_META_KEY]
+        step_id = test_step.get('编号') or item.name
+        _duration_history.record(flow.get("file_path"), flow.get("sheet_name"), browser,
+                                 step_durations={step_id: report.duration * 1000})
+
+
+def _item_flow(item):
+    """用例所属的流程 {file_path, sheet_name}：Function模式取 flow_config，Session模式取步骤上的流程信息"""
+    params = getattr(getattr(item, "callspec", None), "params", {})
+    flow = params.get("flow_config")
+    if not isinstance(flow, dict):
+        test_step = params.get("test_step")
+        flow = test_step.get(FLOW_META_KEY) if isinstance(test_step, dict) else None
+    if not isinstance(flow, dict):
+        return None
+    return {"file_path": flow.get("file_path"), "sheet_name": flow.get("sheet_name")}
+
+def _emit_step_result(step):
+    """ReportLogger 的步骤回调：把关键字步骤写入结构化结果"""
+    if _results_emitter is not None:
+        _results_emitter.emit_step(step, test=_results_context.get("test"), flow=_results_context.get("flow"))
+
+def _emit_test_result(item, report):
+    """把用例结果写入结构化结果：call 阶段的结果，或 setup 阶段的失败/跳过"""
+    params = getattr(getattr(item, "callspec", None), "params", {})
+    test_step = params.get("test_step")
+    error = None
+    if report.failed:
+        crash = getattr(report.longrepr, "reprcrash", None)
+        error = getattr(crash, "message", None) or report.longreprtext[-2000:]
+    page_url = None
+    keywords = item.funcargs.get("keywords_func") or item.funcargs.get("keywords_session")
+    try:
+        if keywords is not None and not keywords.active_page.is_closed():
+            page_url = keywords.active_page.url
+    except Exception:
+        pass
+    _results_emitter.emit_test(item.nodeid, report.outcome, report.duration * 1000, flow=_item_flow(item),
+                               step_id=test_step.get('编号') if isinstance(test_step, dict) else None,
+                               error=error, page_url=page_url)
+
+def pytest_sessionstart(session):
+    """指定 --results-jsonl 时创建结构化结果输出器"""
+    global _results_emitter
+    results_path = session.config.getoption("--results-jsonl")
+    if results_path:
+        _results_emitter = ResultsEmitter(results_path, browser=_current_browser(session.config))
+        _results_emitter.start_run(pid=os.getpid())
+
+def pytest_runtest_setup(item):
+    """记录当前用例，关键字步骤的结构化结果据此标注所属用例和流程"""
+    if _results_emitter is not None:
+        _results_context["test"] = item.nodeid
+        _results_context["flow"] = _item_flow(item)
+
 # --- Hook 4: 在测试结束后，报告 sleep 总时间 ---
 def pytest_sessionfinish(session, exitstatus):
     """
     在整个测试会话结束时被调用。
     """
+    if _results_emitter is not None:
+        try:
+            _results_emitter.close(int(exitstatus))
+        except Exception as e:
+            print(f"写入结构化结果失败: {e}")
+    # 保存本次执行的耗时历史
+    if _duration_history is not None:
+        try:
+            _duration_history.save()
+        except Exception as e:
+            print(f"保存耗时历史失败: {e}")
+
     # 直接从 Keywords 模块拿到那个全局变量
     total_sleep = KeywordsModule._total_sleep_time
     if total_sleep > 0:
@@ -127,6 +341,20 @@ def pytest_sessionfinish(session, exitstatus):
         reporter.write_sep("=", "强制等待 (sleep) 耗时统计", yellow=True)
         reporter.write_line(f"在有头模式下, 所有测试中 'sleep' 关键字的总耗时为: {total_sleep:.2f} 秒")
 
+    # 按'页面'列定位页面时的等待、恢复和替代耗时
+    if page_wait_metrics:
+        reporter = session.config.pluginmanager.getplugin('terminalreporter')
+        reporter.write_sep("=", "页面等待耗时统计", yellow=True)
+        for line in page_wait_metrics.summary_lines():
+            reporter.write_line(line)
+
+
+def _external_screenshot_html(screenshot_path, relative_path):
+    """外部资源模式下的失败截图：报告中只放懒加载的缩略图，点击打开原图文件"""
+    thumbnail = create_thumbnail(screenshot_path)
+    thumbnail_src = f"screenshots/{os.path.basename(thumbnail)}" if thumbnail else relative_path
+    return (f'<a href="{relative_path}" target="_blank">'
+            f'<img src="{thumbnail_src}" loading="lazy" alt="失败截图" style="max-width: 320px; border: 1px solid #ccc;"></a>')
 
 # --- Hook 5: 在测试用例执行后，生成详细的HTML报告 ---
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
@@ -140,8 +368,19 @@ def pytest_runtest_makereport(item, call):
     outcome = yield
     report = outcome.get_result()
     
+    # 结构化结果：call 阶段的结果，以及 setup 阶段的失败/跳过（此时不会再有 call 阶段）
+    if _results_emitter is not None and (report.when == "call" or (report.when == "setup" and not report.passed)):
+        try:
+            _emit_test_result(item, report)
+        except Exception as e:
+            print(f"写入结构化结果时出错: {e}")
+
     # 只在call阶段完成后处理报告生成
     if report.when == "call":
+        try:
+            _record_duration(item, report)
+        except Exception as e:
+            print(f"记录耗时历史时出错: {e}")
         try:
             # 处理失败截图的HTML集成
             if report.failed and hasattr(item, "funcargs"):
@@ -166,28 +405,18 @@ def pytest_runtest_makereport(item, call):
                             os.makedirs(screenshots_dir_session, exist_ok=True)
                             
                             # 生成截图
-                            keywords_session.active_page.screenshot(path=screenshot_path, full_page=True)
+                            keywords_session.active_page.screenshot(path=screenshot_path, **keywords_session._screenshot_options())
                             print(f"📷  Session模式失败截图已生成: {screenshot_path}")
                     except Exception as e:
+                        # 截图目录由并发批次共用，不再按文件名查找已有截图，以免关联到其他批次的截图
                         print(f"📷  Session模式生成失败截图失败: {e}")
-                        # 如果生成失败，尝试查找已存在的截图文件
-                        import glob
-                        error_screenshots = glob.glob(os.path.join(screenshots_dir_session, f"error_{step_id}_*.png"))
-                        if error_screenshots:
-                            error_screenshots.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-                            screenshot_path = error_screenshots[0]
-                            print(f"📷  Session模式找到已存在的错误截图: {screenshot_path}")
+                        screenshot_path = None
                 
                 # Function模式下的截图处理
-                elif "screenshots_dir" in item.funcargs:
-                    screenshots_dir = item.funcargs["screenshots_dir"]
-                    # 查找最新的错误截图文件
-                    import glob
-                    error_screenshots = glob.glob(os.path.join(screenshots_dir, "error_*.png"))
-                    if error_screenshots:
-                        # 按修改时间排序，获取最新的截图
-                        error_screenshots.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-                        screenshot_path = error_screenshots[0]
+                elif "keywords_func" in item.funcargs:
+                    # 使用本流程记录的失败截图路径（截图目录由并发批次共用，按修改时间查找可能拿到其他浏览器的截图）
+                    screenshot_path = getattr(item.funcargs["keywords_func"], "failure_screenshot", None)
+                    if screenshot_path:
                         print(f"📷  Function模式找到错误截图: {screenshot_path}")
                 
                 # 将截图添加到pytest-html报告
@@ -201,17 +430,22 @@ def pytest_runtest_makereport(item, call):
                         # 方法1：使用pytest_html.extras.image()直接添加截图文件
                         extras = getattr(report, "extras", [])
                         
-                        # 读取截图文件并转换为base64
-                        import base64
-                        with open(screenshot_path, "rb") as image_file:
-                            image_data = base64.b64encode(image_file.read()).decode()
-                        
-                        # 使用pytest_html.extras.png()添加截图
-                        extras.append(pytest_html.extras.png(image_data, name="失败截图"))
-                        
-                        # 添加额外的HTML信息
                         screenshot_name = os.path.basename(screenshot_path)
                         relative_path = f"screenshots/{screenshot_name}"
+                        screenshot_policy = item.funcargs.get("screenshot_policy")
+                        if screenshot_policy and screenshot_policy.asset_mode == ASSETS_EXTERNAL:
+                            # 外部资源模式：引用截图目录中的文件，不再嵌入base64
+                            extras.append(pytest_html.extras.html(_external_screenshot_html(screenshot_path, relative_path)))
+                        else:
+                            # 读取截图文件并转换为base64
+                            import base64
+                            with open(screenshot_path, "rb") as image_file:
+                                image_data = base64.b64encode(image_file.read()).decode()
+                            
+                            # 使用pytest_html.extras.png()添加截图
+                            extras.append(pytest_html.extras.png(image_data, name="失败截图"))
+                        
+                        # 添加额外的HTML信息
                         
                         extra_html = f'''
                         <div style="margin: 10px 0; padding: 10px; border: 1px solid #ddd; border-radius: 4px; background-color: #f8f9fa;">
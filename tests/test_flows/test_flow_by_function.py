@@ -1,5 +1,4 @@
 # tests/test_flows/test_service_system.py (最终软断言版)
-import pandas as pd
 import pytest
 import os
 import sys
@@ -12,6 +11,7 @@ from utils.execution_status import (
     format_status_message, is_try_status, is_skip_status, 
     is_end_status, is_normal_status, get_execution_status
 )
+from framework.utils.step_loader import load_steps
 
 # 单独的function测试用例，可以放在test_flows里快速自定义，方便调试，
 # 长期的用例放在test_data里，用test_flow_by_function_json.py来测试
@@ -47,7 +47,7 @@ def test_business_flow_soft_assert(keywords_func, flow_config, screenshots_dir):
     # 打印时也可以用上描述信息，让日志更清晰
     print(f"\n\n{'='*20} 开始执行: {flow_description} {'='*20}")
  
-    all_steps = pd.read_excel(excel_path, sheet_name=sheet_name).fillna('').to_dict(orient='records')
+    all_steps = load_steps(excel_path, sheet_name)
      
     # >> 核心：用于收集错误的列表 <<
     errors = []
@@ -124,6 +124,7 @@ def test_business_flow_soft_assert(keywords_func, flow_config, screenshots_dir):
             
             try:
                 keywords_func.page.screenshot(path=error_path, full_page=True)
+                keywords_func.failure_screenshot = error_path
                 print(f"📷  截图已保存至: {error_path}")
             except Exception as se:
                 print(f"📷  截图失败: {se}")
@@ -1,5 +1,4 @@
 # tests/test_flows/test_service_system.py (最终软断言版)
-import pandas as pd
 import pytest
 import os
 import json
@@ -13,6 +12,32 @@ from utils.execution_status import (
     format_status_message, is_try_status, is_skip_status, 
     is_end_status, is_normal_status, get_execution_status
 )
+from framework.utils.step_loader import load_steps
+from framework.utils.step_plan import compile_plan, format_plan_errors
+
+# (file_path, sheet_name) -> 编译好的执行计划，在收集阶段生成，执行时直接复用
+_compiled_plans = {}
+
+def get_flow_plan(flow_config):
+    """读取并编译流程的执行计划（同一流程只编译一次）"""
+    key = (flow_config["file_path"], str(flow_config["sheet_name"]))
+    if key not in _compiled_plans:
+        steps = load_steps(flow_config["file_path"], flow_config["sheet_name"])
+        _compiled_plans[key] = compile_plan(steps, name=f"{key[0]} [{key[1]}]")
+    return _compiled_plans[key]
+
+def validate_flow_plans(flows):
+    """在浏览器启动前编译所有流程，汇总报告所有格式错误的步骤"""
+    plans = []
+    for flow_config in flows:
+        try:
+            plans.append(get_flow_plan(flow_config))
+        except (OSError, ValueError):
+            # 文件或Sheet不存在时交给测试用例自身报告
+            continue
+    error_report = format_plan_errors(plans)
+    if error_report:
+        pytest.fail(error_report, pytrace=False)
 
 def load_test_data_from_config(config_file=None):
     """从配置文件加载测试流程配置。
@@ -71,6 +96,7 @@ def pytest_generate_tests(metafunc):
         # 获取配置文件路径
         config_file = metafunc.config.getoption("--flow-config-file", None)
         test_flows = load_test_data_from_config(config_file)
+        validate_flow_plans(test_flows)
         metafunc.parametrize("flow_config", test_flows)
 
 # TEST_FLOWS = [
@@ -102,12 +128,13 @@ def test_business_flow_soft_assert(keywords_func, flow_config, screenshots_dir):
     # 打印时也可以用上描述信息，让日志更清晰
     print(f"\n\n{'='*20} 开始执行: {flow_description} {'='*20}")
  
-    all_steps = pd.read_excel(excel_path, sheet_name=sheet_name).fillna('').to_dict(orient='records')
+    plan = get_flow_plan(flow_config)
      
     # >> 核心：用于收集错误的列表 <<
     errors = []
 
-    for index, test_step in enumerate(all_steps):
+    for index, planned_step in enumerate(plan.steps):
+        test_step = planned_step.kwargs
         step_id = test_step.get('编号', f'行号_{index+2}')
         description = test_step.get('描述', '无描述')
         keyword = test_step.get('关键字', '无关键字')
@@ -133,7 +160,7 @@ def test_business_flow_soft_assert(keywords_func, flow_config, screenshots_dir):
                 print(format_status_message(StatusIcons.WARNING, StatusMessages.TRY_FAIL_SKIP, step_id, "缺少关键字"))
                 continue
             
-            key_func = getattr(keywords_func, keyword, None)
+            key_func = planned_step.bind(keywords_func)
             if not key_func:
                 print(format_status_message(StatusIcons.WARNING, StatusMessages.TRY_FAIL_SKIP, step_id, f"关键字 '{keyword}' 不存在"))
                 continue
@@ -147,7 +174,7 @@ def test_business_flow_soft_assert(keywords_func, flow_config, screenshots_dir):
                 try:
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # 包含毫秒
                     error_path = os.path.join(screenshots_dir, f"try_error_{step_id}_{timestamp}.png")
-                    keywords_func.active_page.screenshot(path=error_path, full_page=True)
+                    keywords_func.active_page.screenshot(path=error_path, **keywords_func._screenshot_options())
                     print(f"📷  尝试失败截图已保存至: {error_path}")
                 except Exception as se:
                     print(f"📷  截图失败: {se}")
@@ -158,7 +185,7 @@ def test_business_flow_soft_assert(keywords_func, flow_config, screenshots_dir):
             print(format_status_message(StatusIcons.SUCCESS, StatusMessages.SKIP, step_id, "缺少关键字"))
             continue
 
-        key_func = getattr(keywords_func, keyword, None)
+        key_func = planned_step.bind(keywords_func)
         if not key_func:
             error_message = f"步骤 '{step_id}: {description}' 失败: 关键字 '{keyword}' 不存在"
             print(format_status_message(StatusIcons.FAILURE, StatusMessages.FAIL, step_id, f"关键字 '{keyword}' 不存在"))
@@ -178,7 +205,8 @@ def test_business_flow_soft_assert(keywords_func, flow_config, screenshots_dir):
             
             try:
                 # 修复截图功能，使用keywords_func的active_page属性
-                keywords_func.active_page.screenshot(path=error_path, full_page=True)
+                keywords_func.active_page.screenshot(path=error_path, **keywords_func._screenshot_options())
+                keywords_func.failure_screenshot = error_path
                 print(f"📷  截图已保存至: {error_path}")
             except Exception as se:
                 print(f"📷  截图失败: {se}")
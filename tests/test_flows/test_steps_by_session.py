@@ -1,5 +1,4 @@
 # tests/test_flows/test_steps_by_session.py
-import pandas as pd
 import pytest
 import os
 import sys
@@ -12,6 +11,7 @@ from utils.execution_status import (
     format_status_message, is_try_status, is_skip_status, 
     is_end_status, is_normal_status, get_execution_status
 )
+from framework.utils.step_loader import load_steps
 
 # 单独的session测试用例，可以在下面path、sheet里快速自定义，方便调试，
 # 长期的用例放在test_data里，用test_steps_by_session_json.py来测试
@@ -20,7 +20,7 @@ from utils.execution_status import (
 # excel_path = os.path.join(os.path.dirname(__file__), '..', '..', 'test_data', '电商-智能客服-UI测试用例表格.xlsx')
 excel_path = r"E:\项目相关文档\电商-智能客服相关文档\电商-智能客服-UI测试用例表格.xlsx"
 sheet_name = 'Sheet2'
-all_steps = pd.read_excel(excel_path, sheet_name=sheet_name).fillna('').to_dict(orient='records')
+all_steps = load_steps(excel_path, sheet_name)
 
 @pytest.mark.parametrize('test_step', all_steps)
 def test_single_step(keywords_session, test_step, screenshots_dir_session): # <<<< 注意！这里用的是 keywords_session
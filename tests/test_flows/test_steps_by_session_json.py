@@ -1,5 +1,4 @@
 # tests/test_flows/test_steps_by_session.py (V2 - JSON配置驱动版)
-import pandas as pd
 import pytest
 import os
 import json # 1. 导入json模块
@@ -13,6 +12,29 @@ from utils.execution_status import (
     format_status_message, is_try_status, is_skip_status, 
     is_end_status, is_normal_status, get_execution_status
 )
+from framework.utils.duration_history import FLOW_META_KEY
+from framework.utils.step_loader import load_steps
+from framework.utils.step_plan import compile_plan, format_plan_errors, planned_step_of
+
+def tag_steps_with_flow(steps, flow_config):
+    """为步骤标记所属流程，便于按流程记录耗时历史"""
+    flow_meta = {"file_path": flow_config.get("file_path"), "sheet_name": flow_config.get("sheet_name")}
+    if flow_config.get("screenshot_mode"):
+        flow_meta["screenshot_mode"] = flow_config["screenshot_mode"]
+    if flow_config.get("page_wait"):
+        flow_meta["page_wait"] = flow_config["page_wait"]
+    return [{**step, FLOW_META_KEY: flow_meta} for step in steps]
+
+def compile_session_steps(steps_by_flow):
+    """
+    在浏览器启动前编译所有流程的步骤：格式错误的步骤汇总后使收集阶段失败，
+    否则返回附带预解析参数和编译结果的步骤字典列表，用于参数化 test_step。
+    """
+    plans = [compile_plan(steps, name=name) for name, steps in steps_by_flow]
+    error_report = format_plan_errors(plans)
+    if error_report:
+        pytest.fail(error_report, pytrace=False)
+    return [planned_step.as_param() for plan in plans for planned_step in plan.steps]
 
 def load_test_data_from_config(config_file=None):
     """从配置文件加载测试流程配置。
@@ -90,7 +112,7 @@ def pytest_generate_tests(metafunc):
             # 如果提供了配置文件，则只从配置文件加载指定的流程
             flow_configs = load_test_data_from_config(config_file)
             print(f"[调试] 从配置文件加载到 {len(flow_configs)} 个流程配置")
-            all_steps = []
+            steps_by_flow = []
             for flow_config in flow_configs:
                 excel_file = flow_config["file_path"]
                 sheet_name = flow_config["sheet_name"]
@@ -104,15 +126,17 @@ def pytest_generate_tests(metafunc):
                     
                 print(f"[调试] 尝试加载Excel文件: {excel_path} (Sheet: {sheet_name})")
                 if os.path.exists(excel_path):
-                    steps = pd.read_excel(excel_path, sheet_name=sheet_name).fillna('').to_dict(orient='records')
+                    steps = load_steps(excel_path, sheet_name)
                     print(f"[调试] 从 {excel_path} 加载到 {len(steps)} 个测试步骤")
-                    all_steps.extend(steps)
+                    steps_by_flow.append((f"{excel_file} [{sheet_name}]", tag_steps_with_flow(steps, flow_config)))
                 else:
                     print(f"警告: 测试文件不存在: {excel_path}")
+            all_steps = compile_session_steps(steps_by_flow)
             metafunc.parametrize('test_step', all_steps)
         else:
             # 默认行为：使用全局的all_steps，如果不存在则使用空列表
             if 'all_steps' in globals() and all_steps:
+                all_steps = compile_session_steps([(f"{excel_path} [{sheet_name}]", all_steps)])
                 metafunc.parametrize('test_step', all_steps)
             else:
                 print("\n[警告] 未找到可用的测试步骤数据")
@@ -158,7 +182,8 @@ if flows_to_run:
     print(f"[调试] Session模式将使用流程: {excel_path} (Sheet: {sheet_name})")
     if excel_path and sheet_name and os.path.exists(excel_path):
         print(f"\n[Session测试模式] 将从文件 '{excel_path}' (Sheet: '{sheet_name}') 加载所有测试步骤。")
-        all_steps = pd.read_excel(excel_path, sheet_name=sheet_name).fillna('').to_dict(orient='records')
+        all_steps = load_steps(excel_path, sheet_name)
+        all_steps = tag_steps_with_flow(all_steps, selected_flow)
         print(f"[调试] 从 {excel_path} 加载到 {len(all_steps)} 个测试步骤")
     else:
         print(f"\n[警告] Session测试模式配置的Excel文件不存在或配置不完整: {excel_path}")
@@ -168,8 +193,15 @@ else:
 # 逐个执行测试步骤的函数
 def test_single_step(keywords_session, test_step, screenshots_dir_session): # <<<< 注意！这里用的是 keywords_session
     step_id = test_step.get('编号', '未知步骤')
+    # 按步骤所属流程的 screenshot_mode 切换截图范围
+    if keywords_session.report_logger:
+        keywords_session.report_logger.set_capture_mode(test_step.get(FLOW_META_KEY, {}).get("screenshot_mode"))
+    # 按步骤所属流程的 page_wait 切换页面等待档位
+    keywords_session.set_page_wait(test_step.get(FLOW_META_KEY, {}).get("page_wait"))
     keyword = test_step.get('关键字')
     description = test_step.get('描述', '')
+    # 关键字处理函数和预解析参数来自收集阶段编译的执行计划
+    planned_step = planned_step_of(test_step)
     
     execution_status = get_execution_status(test_step)
     
@@ -189,7 +221,7 @@ def test_single_step(keywords_session, test_step, screenshots_dir_session): # <<
             pytest.skip(f"步骤 {step_id} 尝试失败但已跳过 - 关键字为空")
             return
             
-        key_func = getattr(keywords_session, keyword, None)
+        key_func = planned_step.bind(keywords_session)
         if not key_func:
             print(format_status_message(StatusIcons.WARNING, StatusMessages.TRY_FAIL_SKIP, step_id, f"关键字 '{keyword}' 不存在"))
             pytest.skip(f"步骤 {step_id} 尝试失败但已跳过 - 关键字 '{keyword}' 不存在")
@@ -197,7 +229,7 @@ def test_single_step(keywords_session, test_step, screenshots_dir_session): # <<
         
         try:
             print(f"\n🚀 ===> 尝试执行步骤: {step_id} - {keyword} - {description}")
-            key_func(**test_step)
+            key_func(**planned_step.kwargs)
             print(format_status_message(StatusIcons.SUCCESS, StatusMessages.TRY_SUCCESS, step_id))
             return
         except Exception as e:
@@ -206,7 +238,7 @@ def test_single_step(keywords_session, test_step, screenshots_dir_session): # <<
             try:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]  # 包含毫秒
                 error_path = os.path.join(screenshots_dir_session, f"try_error_{step_id}_{timestamp}.png")
-                keywords_session.active_page.screenshot(path=error_path, full_page=True)
+                keywords_session.active_page.screenshot(path=error_path, **keywords_session._screenshot_options())
                 print(f"📷  尝试失败截图已保存至: {error_path}")
             except Exception as se:
                 print(f"📷  截图失败: {se}")
@@ -217,12 +249,12 @@ def test_single_step(keywords_session, test_step, screenshots_dir_session): # <<
     if not keyword:
         pytest.skip(f"步骤 {step_id} 关键字为空")
 
-    key_func = getattr(keywords_session, keyword, None)
+    key_func = planned_step.bind(keywords_session)
     if not key_func:
         pytest.fail(f"关键字 '{keyword}' 不存在")
     
     print(f"\n🚀 ===> 执行步骤: {step_id} - {keyword} - {description}")
-    key_func(**test_step) # 直接执行，如果失败，pytest会自动捕获并报告
+    key_func(**planned_step.kwargs) # 直接执行，如果失败，pytest会自动捕获并报告
     print(format_status_message(StatusIcons.SUCCESS, StatusMessages.PASS, step_id))
 
 if __name__ == '__main__':
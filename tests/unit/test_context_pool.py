@@ -0,0 +1,168 @@
+# tests/unit/test_context_pool.py
+"""
+浏览器上下文池单元测试
+
+测试上下文的预创建、借用与归还复用、重置失败时的丢弃以及重置内容（页面、视口、各源的存储）
+"""
+import unittest
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.context_pool import ContextPool, reset_context, storage_origins, BLANK_URL
+
+
+class FakePage:
+    def __init__(self, context, url=BLANK_URL):
+        self.context = context
+        self.url = url
+        self.closed = False
+        self.evaluated = []
+        self.viewport_size = dict(context.viewport)
+        self.routes = {}
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+        self.context.pages.remove(self)
+
+    def evaluate(self, script):
+        self.evaluated.append(script)
+        # 模拟清除存储：清除当前源的 localStorage
+        self.context.local_storage.pop(self.url.rstrip('/'), None)
+
+    def goto(self, url):
+        handled = any(url.startswith(pattern[:-2]) for pattern in self.routes)
+        if url != BLANK_URL and not handled:
+            self.context.visited.append(url)
+        self.url = url
+
+    def route(self, pattern, handler):
+        self.routes[pattern] = handler
+
+    def unroute(self, pattern, handler=None):
+        self.routes.pop(pattern, None)
+
+    def set_viewport_size(self, size):
+        self.viewport_size = dict(size)
+
+
+class FakeContext:
+    def __init__(self, viewport=None):
+        self.viewport = viewport or {'width': 1280, 'height': 720}
+        self.pages = []
+        # 源 -> localStorage 内容，以及未经 route 拦截、真正发出的导航
+        self.local_storage = {}
+        self.visited = []
+        self.cookies_cleared = 0
+        self.permissions_cleared = 0
+        self.closed = False
+
+    def new_page(self, url=BLANK_URL):
+        page = FakePage(self, url)
+        self.pages.append(page)
+        return page
+
+    def clear_cookies(self):
+        self.cookies_cleared += 1
+
+    def clear_permissions(self):
+        self.permissions_cleared += 1
+
+    def storage_state(self):
+        return {'cookies': [], 'origins': [{'origin': origin, 'localStorage': items}
+                                           for origin, items in self.local_storage.items()]}
+
+    def close(self):
+        self.closed = True
+
+
+class TestContextPool(unittest.TestCase):
+    """浏览器上下文池测试类"""
+
+    def setUp(self):
+        self.contexts = []
+
+    def factory(self):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    def test_contexts_are_reused(self):
+        """测试预创建的上下文在流程之间复用，不再重新创建"""
+        resets = []
+        pool = ContextPool(self.factory, reset=resets.append)
+        pool.warm()
+        self.assertEqual(pool.created, 1)
+        self.assertEqual(len(self.contexts[0].pages), 1)
+
+        for _ in range(3):
+            context = pool.acquire()
+            self.assertIs(context, self.contexts[0])
+            pool.release(context)
+        self.assertEqual((pool.created, pool.reused), (1, 3))
+        self.assertEqual(resets, [self.contexts[0]] * 3)
+
+        pool.close()
+        self.assertTrue(self.contexts[0].closed)
+
+    def test_failed_reset_discards_context(self):
+        """测试重置失败的上下文被关闭，下次借用时重新创建"""
+        def broken_reset(context):
+            raise RuntimeError("Target page, context or browser has been closed")
+
+        pool = ContextPool(self.factory, reset=broken_reset)
+        first = pool.acquire()
+        pool.release(first)
+        self.assertTrue(first.closed)
+        second = pool.acquire()
+        self.assertIsNot(second, first)
+        self.assertEqual(pool.created, 2)
+
+        pool.close()
+        self.assertTrue(second.closed)
+
+    def test_pool_size_limits_idle_contexts(self):
+        """测试空闲上下文超过池大小时多余的被关闭"""
+        pool = ContextPool(self.factory, reset=lambda context: None, size="1")
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        self.assertFalse(first.closed)
+        self.assertTrue(second.closed)
+        self.assertIs(pool.acquire(), first)
+
+    def test_reset_context(self):
+        """测试重置时关闭所有页面并新建页面、恢复视口，清除cookie、权限和流程访问过的各源的存储"""
+        context = FakeContext()
+        main = context.new_page("https://example.com/login")
+        main.set_viewport_size({'width': 375, 'height': 667})
+        popup = context.new_page("https://sso.example.com")
+        context.local_storage = {
+            "https://example.com": [{'name': 'token', 'value': 'a'}],
+            "https://sso.example.com": [{'name': 'sso', 'value': 'b'}],
+            "https://cdn.example.com": [],
+        }
+        kept = reset_context(context)
+
+        self.assertTrue(main.closed and popup.closed)
+        self.assertEqual(context.pages, [kept])
+        self.assertEqual(kept.url, BLANK_URL)
+        self.assertEqual(kept.viewport_size, {'width': 1280, 'height': 720})
+        self.assertEqual(storage_origins(context), [])
+        self.assertEqual(len(kept.evaluated), 2)
+        self.assertEqual(kept.routes, {})
+        self.assertEqual(context.visited, [])
+        self.assertEqual((context.cookies_cleared, context.permissions_cleared), (1, 1))
+
+        empty = FakeContext()
+        self.assertEqual(reset_context(empty).url, BLANK_URL)
+        self.assertEqual(len(empty.pages), 1)
+
+if __name__ == '__main__':
+    unittest.main()
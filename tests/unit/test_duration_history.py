@@ -0,0 +1,83 @@
+# tests/unit/test_duration_history.py
+"""
+耗时历史记录单元测试
+
+测试流程耗时的记录、合并写回以及基于历史耗时的估算
+"""
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.duration_history import DurationHistory, flow_key
+
+class TestDurationHistory(unittest.TestCase):
+    """耗时历史记录测试类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.history_path = os.path.join(self.temp_dir, "duration_history.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_flow_key(self):
+        """测试流程键包含文件、Sheet和浏览器"""
+        self.assertEqual(flow_key("test_data/a.xlsx", "Sheet1", "Firefox"),
+                         flow_key("test_data/./a.xlsx", "Sheet1", "firefox"))
+        self.assertNotEqual(flow_key("a.xlsx", "Sheet1", "chromium"), flow_key("a.xlsx", "Sheet1", "webkit"))
+
+    def test_record_and_save(self):
+        """测试记录流程耗时和步骤耗时并写回文件"""
+        history = DurationHistory(self.history_path)
+        history.record("a.xlsx", "Sheet1", "chromium", duration=12.5, step_durations={"case_001": 300})
+        history.save()
+
+        with open(self.history_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        record = records[flow_key("a.xlsx", "Sheet1", "chromium")]
+        self.assertEqual(record["duration"], 12.5)
+        self.assertEqual(record["runs"], 1)
+        self.assertEqual(record["steps"], {"case_001": 300.0})
+        self.assertFalse(os.path.exists(self.history_path + ".lock"))
+
+    def test_duration_from_steps(self):
+        """测试Session模式下按步骤耗时之和计算流程耗时"""
+        history = DurationHistory(self.history_path)
+        history.record("a.xlsx", "Sheet1", "chromium", step_durations={"case_001": 1500})
+        history.record("a.xlsx", "Sheet1", "chromium", step_durations={"case_002": 500})
+        history.save()
+        self.assertEqual(DurationHistory(self.history_path).estimate("a.xlsx", "Sheet1", "chromium"), 2.0)
+
+    def test_smoothing_between_runs(self):
+        """测试多次执行的耗时平滑合并"""
+        for duration in (10, 20):
+            history = DurationHistory(self.history_path)
+            history.record("a.xlsx", "Sheet1", "chromium", duration=duration)
+            history.save()
+        history = DurationHistory(self.history_path)
+        self.assertEqual(history.estimate("a.xlsx", "Sheet1", "chromium"), 15)
+        self.assertEqual(history.records[flow_key("a.xlsx", "Sheet1", "chromium")]["runs"], 2)
+
+    def test_estimate_flows_fallback(self):
+        """测试没有历史记录的流程按已知耗时的中位数估算"""
+        history = DurationHistory(self.history_path)
+        history.record("a.xlsx", "Sheet1", "chromium", duration=30)
+        history.record("b.xlsx", "Sheet1", "chromium", duration=10)
+        history.save()
+        flows = [
+            {"file_path": "a.xlsx", "sheet_name": "Sheet1"},
+            {"file_path": "b.xlsx", "sheet_name": "Sheet1"},
+            {"file_path": "new.xlsx", "sheet_name": "Sheet1"},
+        ]
+        self.assertEqual(history.estimate_flows(flows, "chromium"), [30, 10, 30])
+        self.assertEqual(DurationHistory(os.path.join(self.temp_dir, "none.json")).estimate_flows(flows), [0.0, 0.0, 0.0])
+
+if __name__ == '__main__':
+    unittest.main()
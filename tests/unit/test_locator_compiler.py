@@ -0,0 +1,118 @@
+# tests/unit/test_locator_compiler.py
+"""
+定位器编译缓存单元测试
+
+测试各定位方式的编译结果、绑定到页面后的调用链以及编译缓存
+"""
+import unittest
+import sys
+import os
+import re
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils import locator_compiler
+from framework.utils.locator_compiler import compile_locator, bind_locator
+
+class FakeLocator:
+    """记录调用链的模拟页面/定位器"""
+
+    def __init__(self, chain=()):
+        self.chain = tuple(chain)
+
+    def __getattr__(self, name):
+        if name in ('first', 'last'):
+            return FakeLocator(self.chain + (name,))
+
+        def method(*args, **kwargs):
+            return FakeLocator(self.chain + ((name, args, kwargs),))
+        return method
+
+class TestLocatorCompiler(unittest.TestCase):
+    """测试定位器编译"""
+
+    def setUp(self):
+        locator_compiler.clear_locator_cache()
+
+    def test_simple_locators(self):
+        """测试css/xpath/label/placeholder定位"""
+        page = FakeLocator()
+        self.assertEqual(bind_locator(compile_locator('css', '#id'), page).chain, (('locator', ('#id',), {}),))
+        self.assertEqual(bind_locator(compile_locator('xpath', '//div'), page).chain, (('locator', ('xpath=//div',), {}),))
+        self.assertEqual(bind_locator(compile_locator('get_by_label', '用户名'), page).chain,
+                         (('get_by_label', ('用户名',), {}),))
+
+    def test_get_by_role(self):
+        """测试get_by_role参数、数据内容合并以及修饰符"""
+        page = FakeLocator()
+        chain = bind_locator(compile_locator('get_by_role', 'button, name="登录"'), page).chain
+        self.assertEqual(chain, (('get_by_role', ('button',), {'name': '登录'}),))
+
+        chain = bind_locator(compile_locator('get_by_role', '"link"', 'name="更多", exact=True'), page).chain
+        self.assertEqual(chain, (('get_by_role', ('link',), {'name': '更多', 'exact': True}),))
+
+        chain = bind_locator(compile_locator('get_by_role', 'button, name="确定".nth(2)'), page).chain
+        self.assertEqual(chain[-1], ('nth', (2,), {}))
+
+        chain = bind_locator(compile_locator('get_by_role', '"button".first'), page).chain
+        self.assertEqual(chain, (('get_by_role', ('button',), {}), 'first'))
+
+        chain = bind_locator(compile_locator('get_by_role', 'link, name=re.compile("^更多")'), page).chain
+        self.assertEqual(chain[0][2]['name'], re.compile("^更多"))
+
+    def test_chain(self):
+        """测试链式定位"""
+        chain = bind_locator(compile_locator('chain', '#list >> li.item'), FakeLocator()).chain
+        self.assertEqual(chain, (('locator', ('#list',), {}), ('locator', ('li.item',), {})))
+        with self.assertRaises(ValueError):
+            compile_locator('chain', '#list >> ')
+
+    def test_codegen(self):
+        """测试codegen调用链"""
+        operations = compile_locator('codegen', 'get_by_role("row", name="A").get_by_role("cell").first')
+        chain = bind_locator(operations, FakeLocator()).chain
+        self.assertEqual(chain, (('get_by_role', ('row',), {'name': 'A'}), ('get_by_role', ('cell',), {}), 'first'))
+        with self.assertRaises(ValueError):
+            compile_locator('codegen', 'locator(os.system("x"))')
+        with self.assertRaises(ValueError):
+            compile_locator('codegen', '__class__.__bases__[0]')
+
+    def test_literal_arguments(self):
+        """测试字面量参数求值：列表、字典、负数、正则及其标志"""
+        operations = compile_locator(
+            'codegen', 'locator("li", has_text=re.compile("a+", re.I | re.M)).nth(-1).filter(has=[1, {"k": (2, None)}])'
+        )
+        chain = bind_locator(operations, FakeLocator()).chain
+        self.assertEqual(chain[0][2]['has_text'], re.compile("a+", re.I | re.M))
+        self.assertEqual(chain[1], ('nth', (-1,), {}))
+        self.assertEqual(chain[2][2]['has'], [1, {"k": (2, None)}])
+
+    def test_non_literal_arguments_rejected(self):
+        """测试非字面量参数被拒绝"""
+        for target in ('locator(__import__("os").getcwd())', 'locator("a" + "b")',
+                       'locator(re.escape("x"))', 'locator(**{"a": 1})', 'locator([x for x in "ab"])',
+                       'get_by_text(re.compile("a", re.DEBUG))'):
+            with self.assertRaises(ValueError, msg=target):
+                compile_locator('codegen', target)
+        with self.assertRaises(ValueError):
+            compile_locator('get_by_role', 'button, name=open("x").read()')
+
+    def test_unsupported_type(self):
+        """测试不支持的定位方式"""
+        with self.assertRaises(ValueError):
+            compile_locator('unknown', 'x')
+
+    def test_compiled_once(self):
+        """测试相同参数只编译一次，非get_by_role定位忽略数据内容"""
+        compile_locator('css', '#id', 'a')
+        compile_locator('css', '#id', 'b')
+        compile_locator('get_by_role', 'button', 'name="x"')
+        compile_locator('get_by_role', 'button', 'name="x"')
+        info = locator_compiler.locator_cache_info()
+        self.assertEqual(info.misses, 2)
+        self.assertEqual(info.hits, 2)
+
+if __name__ == '__main__':
+    unittest.main()
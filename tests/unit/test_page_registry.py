@@ -0,0 +1,149 @@
+# tests/unit/test_page_registry.py
+"""
+页面注册表单元测试
+
+测试页面的打开/关闭顺序、按上下文共用注册表、事件驱动的页面等待以及按加载事件记录的页面状态
+"""
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.page_registry import PageRegistry, READY_INTERACTIVE, READY_COMPLETE
+
+
+class FakeEmitter:
+    """按注册顺序分发事件的最小事件源"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def emit(self, event, arg):
+        for handler in list(self.handlers.get(event, [])):
+            handler(arg)
+
+
+class FakePage(FakeEmitter):
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+        self.emit('close', self)
+
+
+class FakeContext(FakeEmitter):
+    """
+    模拟浏览器上下文：wait_for_event 期间依次"打开" pending 中的页面，
+    predicate 满足时立即返回，页面用完仍未满足时抛出超时异常
+    """
+
+    def __init__(self, pages=()):
+        super().__init__()
+        self.pages = list(pages)
+        self.pending = []
+        self.wait_calls = []
+
+    def open(self, page):
+        self.pages.append(page)
+        self.emit('page', page)
+
+    def wait_for_event(self, event, predicate=None, timeout=None):
+        self.wait_calls.append((event, timeout))
+        while self.pending:
+            page = self.pending.pop(0)
+            self.open(page)
+            if predicate is None or predicate(page):
+                return page
+        raise TimeoutError(f"Timeout {timeout}ms exceeded while waiting for event \"{event}\"")
+
+
+class TestPageRegistry(unittest.TestCase):
+    """页面注册表测试类"""
+
+    def test_tracks_pages_in_order(self):
+        """测试注册表按打开顺序记录存活页面，关闭的页面被移除"""
+        main = FakePage("main")
+        context = FakeContext([main])
+        registry = PageRegistry(context)
+        popup, other = FakePage("popup"), FakePage("other")
+        context.open(popup)
+        context.open(other)
+        context.open(popup)
+        self.assertEqual(registry.pages, [main, popup, other])
+
+        popup.close()
+        self.assertEqual(registry.pages, [main, other])
+        self.assertIs(registry.get(1), other)
+        self.assertIsNone(registry.get(2))
+        self.assertIsNone(registry.get(-1))
+        self.assertEqual(registry.index_of(other), 1)
+        self.assertIsNone(registry.index_of(popup))
+
+    def test_registry_shared_per_context(self):
+        """测试同一上下文只创建一个注册表，只订阅一次 page 事件"""
+        context = FakeContext([FakePage("main")])
+        registry = PageRegistry.for_context(context)
+        self.assertIs(PageRegistry.for_context(context), registry)
+        self.assertEqual(len(context.handlers['page']), 1)
+
+    def test_wait_wakes_on_required_page(self):
+        """测试等待在页面数满足要求的事件到达时返回，只发起一次事件等待"""
+        context = FakeContext([FakePage("main")])
+        registry = PageRegistry(context)
+        self.assertTrue(registry.wait_for_count(1, 8000))
+        self.assertEqual(context.wait_calls, [])
+
+        third = FakePage("third")
+        context.pending = [FakePage("second"), third, FakePage("fourth")]
+        self.assertTrue(registry.wait_for_count(3, 8000))
+        self.assertEqual(context.wait_calls, [('page', 8000)])
+        self.assertIs(registry.get(2), third)
+        self.assertEqual(len(context.pending), 1)
+
+    def test_wait_timeout(self):
+        """测试超时后按实际页面数返回"""
+        context = FakeContext([FakePage("main")])
+        registry = PageRegistry(context)
+        context.pending = [FakePage("second")]
+        self.assertFalse(registry.wait_for_count(3, 500))
+        self.assertEqual(len(registry), 2)
+
+    def test_ready_state_follows_load_events(self):
+        """测试页面状态随加载事件更新，主框架导航后变为未知，子框架导航不影响"""
+        main = FakePage("main")
+        context = FakeContext([main])
+        registry = PageRegistry(context)
+        self.assertIsNone(registry.ready_state(main))
+
+        main.emit('domcontentloaded', main)
+        self.assertEqual(registry.ready_state(main), READY_INTERACTIVE)
+        main.emit('load', main)
+        self.assertEqual(registry.ready_state(main), READY_COMPLETE)
+
+        main.emit('framenavigated', SimpleNamespace(parent_frame=object()))
+        self.assertEqual(registry.ready_state(main), READY_COMPLETE)
+        main.emit('framenavigated', SimpleNamespace(parent_frame=None))
+        self.assertIsNone(registry.ready_state(main))
+
+        registry.record_ready_state(main, READY_INTERACTIVE)
+        self.assertEqual(registry.ready_state(main), READY_INTERACTIVE)
+        main.close()
+        self.assertIsNone(registry.ready_state(main))
+        registry.record_ready_state(main, READY_COMPLETE)
+        self.assertIsNone(registry.ready_state(main))
+
+if __name__ == '__main__':
+    unittest.main()
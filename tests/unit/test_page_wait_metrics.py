@@ -0,0 +1,75 @@
+# tests/unit/test_page_wait_metrics.py
+"""
+页面等待耗时统计单元测试
+
+测试按页码和等待类型累计次数、失败次数与耗时，以及会话结束时的统计文字
+"""
+import unittest
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.page_wait_metrics import (
+    PageWaitMetrics, WAIT_CREATE, WAIT_READY, WAIT_RECOVERY, WAIT_FALLBACK
+)
+
+
+class FakeClock:
+    """可手动推进的时钟（秒）"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestPageWaitMetrics(unittest.TestCase):
+    """页面等待耗时统计测试类"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.metrics = PageWaitMetrics(self.clock)
+
+    def wait(self, kind, page_number, seconds, ok=True):
+        started = self.metrics.now()
+        self.clock.advance(seconds)
+        self.metrics.record(kind, page_number, started, ok=ok)
+
+    def test_stats_per_page_and_kind(self):
+        """测试按页码和等待类型分别累计，并按页码、类型排序"""
+        self.wait(WAIT_READY, 2, 3.0)
+        self.wait(WAIT_CREATE, 2, 0.5)
+        self.wait(WAIT_CREATE, 2, 8.0, ok=False)
+        self.wait(WAIT_RECOVERY, 1, 0.25)
+
+        stats = self.metrics.stats()
+        self.assertEqual(list(stats), [(1, WAIT_RECOVERY), (2, WAIT_CREATE), (2, WAIT_READY)])
+        self.assertEqual(stats[(2, WAIT_CREATE)], {'count': 2, 'failed': 1, 'total_ms': 8500.0, 'max_ms': 8000.0})
+        self.assertEqual(self.metrics.total_ms(), 11750.0)
+
+    def test_summary_lines(self):
+        """测试统计文字包含次数、失败次数、总耗时和最长耗时"""
+        self.assertFalse(self.metrics)
+        self.assertEqual(self.metrics.summary_lines(), [])
+
+        self.wait(WAIT_FALLBACK, 3, 8.2, ok=False)
+        self.wait(WAIT_READY, 2, 1.5)
+        self.assertTrue(self.metrics)
+        self.assertEqual(self.metrics.summary_lines(), [
+            "页2 等待页面就绪: 1 次，共 1.50 秒，最长 1500 ms",
+            "页3 页面替代: 1 次，失败 1 次，共 8.20 秒，最长 8200 ms",
+            "页面等待总耗时: 9.70 秒",
+        ])
+
+        self.metrics.reset()
+        self.assertFalse(self.metrics)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+# tests/unit/test_report_merger.py
+"""
+分片报告合并单元测试
+
+测试 pytest-html 分片报告的用例数据合并、样式资源目录的复制、退化的索引页生成以及分片 JSON Lines 文件的合并
+"""
+import unittest
+import sys
+import os
+import json
+import html
+import shutil
+import tempfile
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.run_tests.report_merger import merge_html_reports, merge_jsonl_files
+
+def _fake_report(tests, passed, failed):
+    """构造一个与 pytest-html 4.x 结构一致的最小报告"""
+    blob = html.escape(json.dumps({"title": "report", "tests": tests}), quote=True)
+    return (
+        '<html><body>'
+        f'<p class="run-count">{passed + failed} tests took 00:00:01.</p>'
+        f'<span class="failed">{failed} Failed,</span>'
+        f'<span class="passed">{passed} Passed,</span>'
+        f'<div id="data-container" data-jsonblob="{blob}"></div>'
+        '</body></html>'
+    )
+
+class TestMergeHtmlReports(unittest.TestCase):
+    """分片报告合并测试类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_merge_pytest_html_reports(self):
+        """测试合并用例数据与结果统计"""
+        test_id = "test_flow_by_function_json.py::test_business_flow_soft_assert[flow_config0]"
+        shard1 = self._write("shard1.html", _fake_report({test_id: [{"id": "test_1", "testId": test_id, "result": "Passed"}]}, 1, 0))
+        shard2 = self._write("shard2.html", _fake_report({test_id: [{"id": "test_1", "testId": test_id, "result": "Failed"}]}, 0, 1))
+        output = os.path.join(self.temp_dir, "merged.html")
+
+        self.assertTrue(merge_html_reports([shard1, shard2], output))
+        with open(output, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        self.assertIn('<p class="run-count">2 tests', content)
+        self.assertIn('<span class="failed">1 Failed,</span>', content)
+        self.assertIn('<span class="passed">1 Passed,</span>', content)
+        start = content.index('data-jsonblob="') + len('data-jsonblob="')
+        blob = json.loads(html.unescape(content[start:content.index('"', start)]))
+        self.assertEqual(len(blob["tests"]), 2)
+        ids = [result["id"] for results in blob["tests"].values() for result in results]
+        self.assertEqual(sorted(ids), ["test_1", "test_2"])
+
+    def test_copy_report_assets(self):
+        """测试合并报告写在分片目录之外时，分片报告引用的 assets/ 目录一并复制"""
+        os.makedirs(os.path.join(self.temp_dir, "shards", "assets"))
+        self._write(os.path.join("shards", "assets", "style.css"), "body {}")
+        shard1 = self._write(os.path.join("shards", "shard1.html"), _fake_report({}, 0, 0))
+        output = os.path.join(self.temp_dir, "merged.html")
+
+        self.assertTrue(merge_html_reports([shard1], output))
+        self.assertTrue(os.path.isfile(os.path.join(self.temp_dir, "assets", "style.css")))
+
+    def test_fallback_index(self):
+        """测试无法识别的报告退化为索引页"""
+        shard1 = self._write("shard1.html", "<html>plain</html>")
+        output = os.path.join(self.temp_dir, "merged.html")
+        self.assertTrue(merge_html_reports([shard1], output))
+        with open(output, 'r', encoding='utf-8') as f:
+            self.assertIn('href="shard1.html"', f.read())
+
+    def test_missing_reports(self):
+        """测试分片报告都不存在时不生成报告"""
+        output = os.path.join(self.temp_dir, "merged.html")
+        self.assertFalse(merge_html_reports([os.path.join(self.temp_dir, "none.html")], output))
+        self.assertFalse(os.path.exists(output))
+
+    def test_merge_jsonl_files(self):
+        """测试分片 JSON Lines 文件按分片顺序合并，并为每条记录标记分片编号"""
+        shard1 = self._write("shard1_results.jsonl", '{"type": "run_start"}\n{"type": "test", "outcome": "passed"}\n')
+        shard3 = self._write("shard3_results.jsonl", '{"type": "run_end"}\n\nnot json\n')
+        output = os.path.join(self.temp_dir, "merged_results.jsonl")
+        missing = os.path.join(self.temp_dir, "shard2_results.jsonl")
+
+        self.assertEqual(merge_jsonl_files([shard1, missing, shard3], output), 2)
+        with open(output, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual([json.loads(line) for line in lines[:3]], [
+            {"type": "run_start", "shard": 1}, {"type": "test", "outcome": "passed", "shard": 1},
+            {"type": "run_end", "shard": 3},
+        ])
+        self.assertEqual(lines[3], "not json")
+
+        self.assertEqual(merge_jsonl_files([missing], output), 0)
+        self.assertFalse(os.path.exists(output))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+# tests/unit/test_report_writer.py
+"""
+步骤报告流式写入单元测试
+
+测试逐行写入、截图帧只嵌入一次、未编码完成或被暂缓的步骤延后写出以及写入后释放帧数据
+"""
+import unittest
+import sys
+import os
+import io
+from collections import deque
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.report_writer import StepReportWriter, REPORT_HEADER, REPORT_FOOTER
+
+
+class FakeFrames:
+    """模拟 FrameStore：帧数据可以是字符串或 Future"""
+
+    def __init__(self, frames, prefix="t", external=False):
+        self.prefix = prefix
+        self.external = external
+        self._frames = dict(frames)
+        self.released = []
+
+    def ready(self, frame_id):
+        value = self._frames.get(frame_id)
+        return not isinstance(value, Future) or value.done()
+
+    def get(self, frame_id):
+        value = self._frames.get(frame_id)
+        return value.result() if isinstance(value, Future) else value
+
+    def release(self, frame_id):
+        self.released.append(frame_id)
+        self._frames[frame_id] = None
+
+    def encode_ms(self, frame_id):
+        return 5.0 if frame_id in self._frames else None
+
+
+def make_step(order, before=None, after=None, status='PASS', error=None):
+    return SimpleNamespace(order=order, keyword='click', description=f'step {order}', status=status,
+                           duration=10, before_screenshot=before, after_screenshot=after, details={'目标对象': 'btn'},
+                           error_message=error, timestamp='2025-01-01 00:00:00', page_url='https://example.com')
+
+
+class TestStepReportWriter(unittest.TestCase):
+    """步骤报告流式写入测试类"""
+
+    def test_full_report(self):
+        """测试页头、步骤行、页尾的完整输出，相同的帧只嵌入一次"""
+        stream = io.StringIO()
+        writer = StepReportWriter(stream, FakeFrames({"f1": "AAA", "f2": "BBB"}))
+        writer.add_step(make_step(1, "f1", "f2"))
+        writer.add_step(make_step(2, "f2", "f2", status='FAIL', error='boom'))
+        writer.close()
+
+        html = stream.getvalue()
+        self.assertTrue(html.startswith(REPORT_HEADER))
+        self.assertTrue(html.endswith(REPORT_FOOTER))
+        self.assertEqual(html.count('"BBB"'), 1)
+        self.assertEqual(html.count('data-frame="f2"'), 3)
+        self.assertIn('id="ss_before_t_2"', html)
+        self.assertIn('<strong>Error:</strong> boom', html)
+        self.assertIn('class="status-FAIL"', html)
+        self.assertEqual(writer.rows_written, 2)
+
+    def test_pending_frames_keep_order(self):
+        """测试截图未编码完成的步骤及其后的步骤延后写出，close() 时全部写出"""
+        pending = Future()
+        stream = io.StringIO()
+        writer = StepReportWriter(stream, FakeFrames({"f1": pending, "f2": "BBB"}))
+        writer.add_step(make_step(1, "f1"))
+        writer.add_step(make_step(2, "f2"))
+        writer.flush()
+        self.assertEqual(writer.rows_written, 0)
+        self.assertIn('<tbody>', stream.getvalue())
+
+        pending.set_result("AAA")
+        writer.flush()
+        self.assertEqual(writer.rows_written, 2)
+        html = stream.getvalue()
+        self.assertLess(html.index('>step 1<'), html.index('>step 2<'))
+
+    def test_timing_breakdown(self):
+        """测试步骤耗时分解显示在报告中，共享帧的编码时间只计入一次"""
+        stream = io.StringIO()
+        writer = StepReportWriter(stream, FakeFrames({"f1": "AAA"}))
+        first = make_step(1, after="f1")
+        first.timings = {'action': 12.0}
+        second = make_step(2, before="f1")
+        second.timings = {'action': 3.0}
+        writer.add_step(first)
+        writer.add_step(second)
+        writer.close()
+        html = stream.getvalue()
+        self.assertIn('<strong>Timing (ms):</strong> action 12 · encode 5</div>', html)
+        self.assertIn('<strong>Timing (ms):</strong> action 3</div>', html)
+
+    def test_failed_frames_are_skipped(self):
+        """测试编码失败的帧不生成图片元素"""
+        stream = io.StringIO()
+        writer = StepReportWriter(stream, FakeFrames({"f1": None}))
+        writer.add_step(make_step(1, "f1"))
+        writer.close()
+        self.assertNotIn('data-frame="f1"', stream.getvalue())
+        self.assertNotIn('Object.assign', stream.getvalue())
+
+    def test_external_frames(self):
+        """测试外部资源模式下引用截图文件和缩略图，并且不嵌入base64"""
+        stream = io.StringIO()
+        frames = FakeFrames({"f1": "screenshots/steps/a.jpg", "f2": None}, external=True)
+        writer = StepReportWriter(stream, frames)
+        writer.add_step(make_step(1, "f1", "f2"))
+        writer.close()
+        html = stream.getvalue()
+        self.assertIn('src="screenshots/steps/a_thumb.jpg" loading="lazy"', html)
+        self.assertIn('id="ss_before_t_1" class="screenshot" src="screenshots/steps/a.jpg" loading="lazy"', html)
+        self.assertNotIn('ss_after_t_1', html)
+        self.assertNotIn('Object.assign', html)
+
+    def test_release_frames_after_writing(self):
+        """测试流式写入时帧写入后即释放，后续引用同一帧的步骤仍然可以显示"""
+        frames = FakeFrames({"f1": "AAA"})
+        stream = io.StringIO()
+        writer = StepReportWriter(stream, frames, release_frames=True)
+        writer.add_step(make_step(1, after="f1"))
+        writer.flush()
+        self.assertEqual(frames.released, ["f1"])
+
+        writer.add_step(make_step(2, before="f1"))
+        writer.close()
+        html = stream.getvalue()
+        self.assertEqual(html.count('"AAA"'), 1)
+        self.assertIn('id="ss_before_t_2"', html)
+
+    def test_held_steps_wait_for_failure_frames(self):
+        """测试 on_failure 策略下缓冲中的步骤暂缓写出，失败时补上执行前截图后再写出，移出缓冲的步骤照常写出"""
+        frames = FakeFrames({"b2": "B2", "b3": "B3"})
+        buffer = deque(maxlen=2)
+        stream = io.StringIO()
+        writer = StepReportWriter(stream, frames, release_frames=True,
+                                  hold=lambda step: any(buffered is step for buffered in buffer))
+        steps = [make_step(order) for order in (1, 2, 3)]
+
+        for step in steps[:2]:
+            buffer.append(step)
+            writer.add_step(step)
+            writer.flush()
+        self.assertEqual(writer.rows_written, 0)
+
+        # 第3步开始时第1步移出缓冲，第3步失败时缓冲中的第2、3步补上执行前截图
+        buffer.append(steps[2])
+        steps[2].status = 'FAIL'
+        for step, frame_id in zip(buffer, ("b2", "b3")):
+            step.before_screenshot = frame_id
+        buffer.clear()
+        writer.add_step(steps[2])
+        writer.flush()
+
+        self.assertEqual(writer.rows_written, 3)
+        html = stream.getvalue()
+        self.assertNotIn('id="ss_before_t_1"', html)
+        self.assertIn('id="ss_before_t_2"', html)
+        self.assertIn('id="ss_before_t_3"', html)
+        self.assertEqual(frames.released, ["b2", "b3"])
+
+if __name__ == '__main__':
+    unittest.main()
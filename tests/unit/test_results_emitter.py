@@ -0,0 +1,88 @@
+# tests/unit/test_results_emitter.py
+"""
+结构化执行结果输出单元测试
+
+测试步骤/用例记录的字段、流程切换时的汇总以及会话结束记录
+"""
+import unittest
+import sys
+import os
+import json
+import tempfile
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.results_emitter import ResultsEmitter, flow_key
+
+FLOW_A = {"file_path": "test_data/a.xlsx", "sheet_name": "Sheet1"}
+FLOW_B = {"file_path": "test_data/b.xlsx", "sheet_name": "登录"}
+
+
+class TestResultsEmitter(unittest.TestCase):
+    """结构化执行结果输出测试类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, "report_results.jsonl")
+        self.emitter = ResultsEmitter(self.path, browser="chromium")
+        self.addCleanup(self.emitter.close)
+
+    def read_records(self):
+        with open(self.path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_records_are_written_immediately(self):
+        """测试每条记录写入后立即可读，并带有公共字段"""
+        self.emitter.start_run(pid=1)
+        step = SimpleNamespace(step_id='3', order=1, keyword='click', description='点击登录', status='FAIL',
+                               duration=120, timings={'action': 100.0}, error_message='TimeoutError: ...',
+                               page_url='https://example.com/login')
+        self.emitter.emit_step(step, test="test_flow[a]", flow=FLOW_A)
+
+        records = self.read_records()
+        self.assertEqual([record['type'] for record in records], ['run_start', 'step'])
+        step_record = records[1]
+        self.assertEqual(step_record['browser'], "chromium")
+        self.assertEqual(step_record['step_id'], '3')
+        self.assertEqual(step_record['status'], 'FAIL')
+        self.assertEqual(step_record['duration_ms'], 120)
+        self.assertEqual(step_record['error'], 'TimeoutError: ...')
+        self.assertEqual(step_record['page_url'], 'https://example.com/login')
+        self.assertEqual(step_record['flow'], FLOW_A)
+
+    def test_flow_summaries(self):
+        """测试流程切换和会话结束时输出流程汇总"""
+        self.emitter.emit_test("s[1]", "passed", 100.4, flow=FLOW_A, step_id='1')
+        self.emitter.emit_test("s[2]", "failed", 50, flow=FLOW_A, step_id='2', error='boom')
+        self.emitter.emit_test("s[3]", "passed", 10, flow=FLOW_B, step_id='1')
+        self.emitter.emit_test("s[4]", "skipped", 0, flow=FLOW_B, step_id='2')
+        self.emitter.close(exitstatus=1)
+
+        records = self.read_records()
+        self.assertEqual([record['type'] for record in records],
+                         ['test', 'test', 'flow', 'test', 'test', 'flow', 'run_end'])
+        flow_a = records[2]
+        self.assertEqual(flow_a['flow'], FLOW_A)
+        self.assertEqual(flow_a['status'], 'failed')
+        self.assertEqual(flow_a['outcomes'], {'passed': 1, 'failed': 1})
+        self.assertEqual(flow_a['duration_ms'], 150)
+        self.assertEqual(flow_a['errors'], [{'test': 's[2]', 'step_id': '2', 'error': 'boom'}])
+        self.assertEqual(records[5]['status'], 'passed')
+        self.assertEqual(records[6]['outcomes'], {'passed': 2, 'failed': 1, 'skipped': 1})
+        self.assertEqual(records[6]['status'], 'failed')
+
+    def test_tests_without_flow(self):
+        """测试不属于任何流程的用例不产生流程汇总，关闭后不再写入"""
+        self.emitter.emit_test("t", "skipped", 0)
+        self.emitter.close()
+        self.emitter.emit_test("late", "passed", 1)
+        self.assertEqual([record['type'] for record in self.read_records()], ['test', 'run_end'])
+        self.assertEqual(flow_key(FLOW_B), ("test_data/b.xlsx", "登录"))
+        self.assertIsNone(flow_key(None))
+
+if __name__ == '__main__':
+    unittest.main()
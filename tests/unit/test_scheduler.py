@@ -0,0 +1,125 @@
+# tests/unit/test_scheduler.py
+"""
+并发批次调度器单元测试
+
+测试最大并发数解析、批次提交顺序以及异常批次的结果汇总
+"""
+import unittest
+import sys
+import os
+import threading
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.run_tests.scheduler import (
+    BatchTask, BatchResult, resolve_max_concurrency, split_into_shards,
+    run_concurrently, print_batch_summary
+)
+
+class TestResolveMaxConcurrency(unittest.TestCase):
+    """最大并发数解析测试类"""
+
+    def test_clamped_to_task_count(self):
+        """测试并发数不超过批次数量"""
+        self.assertEqual(resolve_max_concurrency(8, 3), 3)
+        self.assertEqual(resolve_max_concurrency(2, 3), 2)
+
+    def test_invalid_values(self):
+        """测试非法配置回退为合法值"""
+        self.assertEqual(resolve_max_concurrency(0, 3), 1)
+        self.assertEqual(resolve_max_concurrency(-2, 3), 1)
+        self.assertEqual(resolve_max_concurrency("abc", 2), 2)
+        self.assertEqual(resolve_max_concurrency(None, 1), 1)
+
+class TestSplitIntoShards(unittest.TestCase):
+    """分片拆分测试类"""
+
+    def test_single_shard(self):
+        """测试分片数为1或任务为空时不拆分"""
+        self.assertEqual(split_into_shards([1, 2, 3], 1), [[1, 2, 3]])
+        self.assertEqual(split_into_shards([], 4), [])
+        self.assertEqual(split_into_shards([1, 2], "abc"), [[1, 2]])
+
+    def test_shard_count_capped_by_items(self):
+        """测试分片数不超过任务数"""
+        shards = split_into_shards(["a", "b"], 5)
+        self.assertEqual(sorted(shards), [["a"], ["b"]])
+
+    def test_equal_weights_balanced(self):
+        """测试无权重时按任务数均分，并保持原始顺序"""
+        shards = split_into_shards(list(range(7)), 3)
+        self.assertEqual(sorted(len(shard) for shard in shards), [2, 2, 3])
+        for shard in shards:
+            self.assertEqual(shard, sorted(shard))
+        self.assertEqual(sorted(item for shard in shards for item in shard), list(range(7)))
+
+    def test_weighted_longest_first(self):
+        """测试按权重装箱，长任务独占分片"""
+        durations = {"long": 100, "a": 30, "b": 30, "c": 30}
+        shards = split_into_shards(list(durations), 2, weight=durations.get)
+        self.assertIn(["long"], shards)
+        self.assertIn(["a", "b", "c"], shards)
+
+class TestRunConcurrently(unittest.TestCase):
+    """并发执行测试类"""
+
+    def test_batches_run_in_parallel(self):
+        """测试多个批次同时运行"""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def _batch():
+            # 三个批次必须同时到达屏障，串行执行会超时
+            barrier.wait()
+            return True
+
+        tasks = [BatchTask(label=name, run=_batch) for name in ("chromium", "firefox", "webkit")]
+        results = run_concurrently(tasks, max_concurrency=3)
+        self.assertTrue(all(result.passed for result in results))
+
+    def test_longest_batch_submitted_first(self):
+        """测试预估耗时长的批次优先启动"""
+        started = []
+
+        def _make_batch(name):
+            def _batch():
+                started.append(name)
+                return True
+            return _batch
+
+        tasks = [
+            BatchTask(label="short", run=_make_batch("short"), estimated_duration=1),
+            BatchTask(label="long", run=_make_batch("long"), estimated_duration=10),
+        ]
+        results = run_concurrently(tasks, max_concurrency=1)
+        self.assertEqual(started, ["long", "short"])
+        self.assertEqual([result.label for result in results], ["long", "short"])
+
+    def test_failed_and_crashed_batches(self):
+        """测试失败批次和抛出异常的批次都记为失败"""
+        def _crash():
+            raise RuntimeError("boom")
+
+        tasks = [
+            BatchTask(label="ok", run=lambda: True),
+            BatchTask(label="failed", run=lambda: False),
+            BatchTask(label="crashed", run=_crash),
+        ]
+        results = {result.label: result for result in run_concurrently(tasks, max_concurrency=3)}
+        self.assertTrue(results["ok"].passed)
+        self.assertFalse(results["failed"].passed)
+        self.assertFalse(results["crashed"].passed)
+        self.assertEqual(results["crashed"].error, "boom")
+
+    def test_summary(self):
+        """测试汇总结果"""
+        self.assertTrue(print_batch_summary([]))
+        self.assertTrue(print_batch_summary([BatchResult("chromium", True, 1.0)]))
+        self.assertFalse(print_batch_summary([
+            BatchResult("chromium", True, 1.0),
+            BatchResult("firefox", False, 2.0),
+        ]))
+
+if __name__ == '__main__':
+    unittest.main()
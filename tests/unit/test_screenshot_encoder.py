@@ -0,0 +1,167 @@
+# tests/unit/test_screenshot_encoder.py
+"""
+截图后台编码单元测试
+
+测试截图提交到后台线程池编码以及结果取回
+"""
+import unittest
+import sys
+import os
+import threading
+import tempfile
+from unittest import mock
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils import screenshot_encoder
+
+class TestScreenshotEncoder(unittest.TestCase):
+    """截图后台编码测试类"""
+
+    def tearDown(self):
+        screenshot_encoder.shutdown()
+
+    def test_encoding_runs_in_background(self):
+        """测试编码在后台线程中执行，提交方无需等待"""
+        release = threading.Event()
+        worker_threads = []
+
+        def slow_encode(png_bytes, quality):
+            worker_threads.append(threading.current_thread().name)
+            release.wait(5)
+            return f"{png_bytes.decode()}:{quality}"
+
+        with mock.patch.object(screenshot_encoder, "encode_screenshot", side_effect=slow_encode):
+            future = screenshot_encoder.submit_encode(b"png", 40)
+            self.assertFalse(future.done())
+            release.set()
+            self.assertEqual(screenshot_encoder.resolve(future), "png:40")
+        self.assertTrue(worker_threads[0].startswith("screenshot-encoder"))
+
+    def test_resolve_plain_values(self):
+        """测试非Future的值原样返回"""
+        self.assertEqual(screenshot_encoder.resolve("abc"), "abc")
+        self.assertIsNone(screenshot_encoder.resolve(None))
+
+    def test_failed_encoding_resolves_to_none(self):
+        """测试编码异常时结果为None"""
+        with mock.patch.object(screenshot_encoder, "encode_screenshot", side_effect=RuntimeError("boom")):
+            future = screenshot_encoder.submit_encode(b"png")
+        self.assertIsNone(screenshot_encoder.resolve(future))
+
+    def test_invalid_image(self):
+        """测试无法识别的图片数据返回None"""
+        self.assertIsNone(screenshot_encoder.encode_screenshot(b"not an image"))
+
+    def test_thumbnail_path(self):
+        """测试缩略图路径与原图位于同一目录"""
+        self.assertEqual(screenshot_encoder.thumbnail_path("screenshots/steps/a.jpg"), "screenshots/steps/a_thumb.jpg")
+        self.assertEqual(screenshot_encoder.thumbnail_path("error_1.png"), "error_1_thumb.jpg")
+
+    def test_invalid_image_is_not_saved(self):
+        """测试无法识别的图片数据保存失败时返回False"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            self.assertFalse(screenshot_encoder.save_screenshot(b"not an image", os.path.join(temp_dir, "a.jpg")))
+            self.assertIsNone(screenshot_encoder.create_thumbnail(os.path.join(temp_dir, "missing.png")))
+
+class TestFrameStore(unittest.TestCase):
+    """截图帧去重测试类"""
+
+    def setUp(self):
+        patcher = mock.patch.object(screenshot_encoder, "encode_screenshot",
+                                    side_effect=lambda png_bytes, quality: f"{png_bytes.decode()}:{quality}")
+        self.encode = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = screenshot_encoder.FrameStore(prefix="t")
+
+    def tearDown(self):
+        screenshot_encoder.shutdown()
+
+    def test_identical_frames_share_id(self):
+        """测试内容相同的帧复用同一编号且只编码一次"""
+        first = self.store.add(b"same", 50)
+        second = self.store.add(b"same", 50)
+        self.assertEqual(first, second)
+        self.store.resolve_all()
+        self.assertEqual(self.encode.call_count, 1)
+        self.assertEqual((self.store.added, self.store.deduplicated, len(self.store)), (2, 1, 1))
+        self.assertEqual(self.store.get(first), "same:50")
+        self.assertGreaterEqual(self.store.encode_ms(first), 0)
+        self.assertIsNone(self.store.encode_ms("missing"))
+
+    def test_different_frames_get_new_ids(self):
+        """测试内容或压缩质量不同的帧使用不同编号"""
+        ids = {self.store.add(b"a", 50), self.store.add(b"b", 50), self.store.add(b"a", 80)}
+        self.assertEqual(len(ids), 3)
+        self.assertTrue(all(frame_id.startswith("t_f") for frame_id in ids))
+
+    def test_ids_not_reused_after_clear(self):
+        """测试清空后新帧不会复用已经写入报告的编号"""
+        first = self.store.add(b"a")
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+        self.assertNotEqual(self.store.add(b"a"), first)
+
+    def test_frames_skip_failed_encoding(self):
+        """测试编码失败的帧不包含在导出结果中"""
+        ok = self.store.add(b"ok")
+        self.store.resolve_all()
+        self.encode.side_effect = RuntimeError("boom")
+        bad = self.store.add(b"bad")
+        frames = self.store.frames()
+        self.assertEqual(frames, {ok: "ok:50"})
+        self.assertEqual(self.store.frames([ok, bad, "missing"]), {ok: "ok:50"})
+
+    def test_external_frames_are_saved_as_files(self):
+        """测试外部资源模式下帧保存为文件，帧的值是相对报告目录的路径"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            asset_dir = os.path.join(temp_dir, "screenshots", "steps")
+            store = screenshot_encoder.FrameStore(prefix="t", asset_dir=asset_dir, asset_base=temp_dir)
+            with mock.patch.object(screenshot_encoder, "save_screenshot", return_value=True) as save:
+                frame_id = store.add(b"png", 60)
+                self.assertEqual(store.add(b"png", 60), frame_id)
+                url = store.get(frame_id)
+            self.assertTrue(store.external)
+            self.assertEqual(save.call_count, 1)
+            path, quality = save.call_args[0][1], save.call_args[0][2]
+            self.assertEqual(os.path.dirname(path), asset_dir)
+            self.assertEqual(quality, 60)
+            self.assertEqual(url, f"screenshots/steps/{os.path.basename(path)}")
+
+            with mock.patch.object(screenshot_encoder, "save_screenshot", return_value=False):
+                self.assertIsNone(store.get(store.add(b"other")))
+
+    def test_spilled_frames_are_read_back(self):
+        """测试指定 spill_dir 时编码完成的帧写入磁盘，读取时从文件读回"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = screenshot_encoder.FrameStore(prefix="t", spill_dir=temp_dir)
+            first = store.add(b"a")
+            store.resolve_all()
+            self.assertEqual(store.spill(), 1)
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, f"{first}.b64")))
+            self.assertEqual(store.spill(), 0)
+
+            # 新增帧时自动写出已完成的帧，去重仍然有效
+            second = store.add(b"b")
+            self.assertEqual(store.add(b"a"), first)
+            self.assertEqual(store.frames([first, second]), {first: "a:50", second: "b:50"})
+
+            store.release(first)
+            self.assertFalse(os.path.exists(os.path.join(temp_dir, f"{first}.b64")))
+            store.spill()
+            store.clear()
+            self.assertEqual(os.listdir(temp_dir), [])
+
+    def test_release_keeps_frame_id(self):
+        """测试释放帧数据后相同的帧仍复用原编号"""
+        frame_id = self.store.add(b"a")
+        self.store.resolve_all()
+        self.assertTrue(self.store.ready(frame_id))
+        self.store.release(frame_id)
+        self.assertIsNone(self.store.get(frame_id))
+        self.assertEqual(self.store.add(b"a"), frame_id)
+
+if __name__ == '__main__':
+    unittest.main()
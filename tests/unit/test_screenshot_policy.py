@@ -0,0 +1,90 @@
+# tests/unit/test_screenshot_policy.py
+"""
+报告截图策略单元测试
+
+测试策略名规范化、配置/命令行优先级以及各策略的截图时机
+"""
+import unittest
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.screenshot_policy import (
+    ScreenshotPolicy, normalize_policy, normalize_capture_mode, normalize_asset_mode, page_screenshot_options,
+    POLICY_FULL, POLICY_AFTER_ONLY, POLICY_ON_FAILURE, POLICY_OFF,
+    CAPTURE_FULL_PAGE, CAPTURE_VIEWPORT, CAPTURE_ELEMENT, ASSETS_EMBEDDED, ASSETS_EXTERNAL
+)
+
+class TestScreenshotPolicy(unittest.TestCase):
+    """截图策略测试类"""
+
+    def test_normalize(self):
+        """测试策略名及常见别名的规范化"""
+        self.assertEqual(normalize_policy("Full"), POLICY_FULL)
+        self.assertEqual(normalize_policy("after-only"), POLICY_AFTER_ONLY)
+        self.assertEqual(normalize_policy("failure-only"), POLICY_ON_FAILURE)
+        self.assertEqual(normalize_policy("none"), POLICY_OFF)
+        with self.assertRaises(ValueError):
+            normalize_policy("sometimes")
+
+    def test_capture_points(self):
+        """测试各策略在步骤前后的截图时机"""
+        full = ScreenshotPolicy(POLICY_FULL)
+        self.assertTrue(full.captures_before)
+        self.assertTrue(full.captures_after('PASS'))
+
+        after_only = ScreenshotPolicy(POLICY_AFTER_ONLY)
+        self.assertFalse(after_only.captures_before)
+        self.assertTrue(after_only.captures_after('PASS'))
+
+        on_failure = ScreenshotPolicy(POLICY_ON_FAILURE)
+        self.assertFalse(on_failure.captures_before)
+        self.assertTrue(on_failure.buffers_before)
+        self.assertFalse(on_failure.captures_after('PASS'))
+        self.assertTrue(on_failure.captures_after('FAIL'))
+
+        off = ScreenshotPolicy(POLICY_OFF)
+        self.assertFalse(off.captures_before or off.buffers_before or off.captures_after('FAIL'))
+
+    def test_from_config(self):
+        """测试命令行参数优先于配置，非法配置回退到默认策略"""
+        visual_config = {"screenshot_policy": "after_only", "screenshot_buffer_size": 5}
+        policy = ScreenshotPolicy.from_config(visual_config)
+        self.assertEqual((policy.mode, policy.buffer_size), (POLICY_AFTER_ONLY, 5))
+        self.assertEqual(ScreenshotPolicy.from_config(visual_config, "off").mode, POLICY_OFF)
+        self.assertEqual(ScreenshotPolicy.from_config({"screenshot_policy": "bogus"}).mode, POLICY_FULL)
+        self.assertEqual(ScreenshotPolicy.from_config(None).mode, POLICY_FULL)
+        self.assertEqual(ScreenshotPolicy(POLICY_ON_FAILURE, 0).buffer_size, 1)
+
+    def test_capture_mode(self):
+        """测试截图范围的规范化、配置读取以及页面截图参数"""
+        self.assertEqual(normalize_capture_mode(None), CAPTURE_FULL_PAGE)
+        self.assertEqual(normalize_capture_mode('', CAPTURE_VIEWPORT), CAPTURE_VIEWPORT)
+        self.assertEqual(normalize_capture_mode('Viewport'), CAPTURE_VIEWPORT)
+        self.assertEqual(normalize_capture_mode('clip'), CAPTURE_ELEMENT)
+        with self.assertRaises(ValueError):
+            normalize_capture_mode('thumbnail')
+
+        self.assertEqual(page_screenshot_options(CAPTURE_FULL_PAGE), {'full_page': True})
+        self.assertEqual(page_screenshot_options(CAPTURE_VIEWPORT), {'full_page': False})
+        self.assertEqual(page_screenshot_options(CAPTURE_ELEMENT), {'full_page': False})
+
+        self.assertEqual(ScreenshotPolicy.from_config({"screenshot_mode": "element"}).capture_mode, CAPTURE_ELEMENT)
+        self.assertEqual(ScreenshotPolicy.from_config({"screenshot_mode": "bogus"}).capture_mode, CAPTURE_FULL_PAGE)
+
+    def test_asset_mode(self):
+        """测试报告截图存放方式的规范化与配置读取"""
+        self.assertEqual(normalize_asset_mode(None), ASSETS_EMBEDDED)
+        self.assertEqual(normalize_asset_mode('Self-Contained'), ASSETS_EMBEDDED)
+        self.assertEqual(normalize_asset_mode('files'), ASSETS_EXTERNAL)
+        with self.assertRaises(ValueError):
+            normalize_asset_mode('zip')
+
+        self.assertEqual(ScreenshotPolicy.from_config({"report_assets": "external"}).asset_mode, ASSETS_EXTERNAL)
+        self.assertEqual(ScreenshotPolicy.from_config({"report_assets": "bogus"}).asset_mode, ASSETS_EMBEDDED)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+# tests/unit/test_step_loader.py
+"""
+测试步骤加载单元测试
+
+测试工作簿只解析一次、按修改时间失效、磁盘缓存及旧缓存清理以及Sheet选择逻辑
+"""
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils import step_loader
+
+SHEETS = {
+    "Sheet1": [{"编号": "case_001", "关键字": "open", "数据内容": "https://example.com"}],
+    "Sheet2": [{"编号": "case_001", "关键字": "click", "数据内容": ""}],
+}
+
+class TestStepLoader(unittest.TestCase):
+    """测试步骤加载测试类"""
+
+    def setUp(self):
+        step_loader.clear_cache()
+        self.temp_dir = tempfile.mkdtemp()
+        self.excel_path = os.path.join(self.temp_dir, "flow.xlsx")
+        with open(self.excel_path, 'wb') as f:
+            f.write(b"placeholder")
+        patcher = mock.patch.object(step_loader, "_parse_workbook", side_effect=lambda path: SHEETS)
+        self.parse_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache_dir = os.path.join(self.temp_dir, ".step_cache")
+        cache_patcher = mock.patch.object(step_loader, "STEP_CACHE_DIR", self.cache_dir)
+        cache_patcher.start()
+        self.addCleanup(cache_patcher.stop)
+
+    def tearDown(self):
+        step_loader.clear_cache()
+        shutil.rmtree(self.temp_dir)
+
+    def test_workbook_parsed_once(self):
+        """测试多个调用方共享同一次解析结果"""
+        self.assertEqual(step_loader.get_sheet_names(self.excel_path), ["Sheet1", "Sheet2"])
+        self.assertEqual(step_loader.load_steps(self.excel_path, "Sheet1")[0]["关键字"], "open")
+        self.assertEqual(step_loader.load_steps(self.excel_path, "Sheet2")[0]["关键字"], "click")
+        self.assertEqual(self.parse_mock.call_count, 1)
+
+    def test_returns_copies(self):
+        """测试调用方修改返回结果不影响缓存"""
+        steps = step_loader.load_steps(self.excel_path, "Sheet1")
+        steps[0]["关键字"] = "changed"
+        self.assertEqual(step_loader.load_steps(self.excel_path, "Sheet1")[0]["关键字"], "open")
+
+    def test_modified_workbook_reparsed(self):
+        """测试工作簿修改后重新解析"""
+        step_loader.load_steps(self.excel_path, "Sheet1")
+        with open(self.excel_path, 'ab') as f:
+            f.write(b" edited")
+        stat = os.stat(self.excel_path)
+        os.utime(self.excel_path, (stat.st_atime, stat.st_mtime + 10))
+        step_loader.load_steps(self.excel_path, "Sheet1")
+        self.assertEqual(self.parse_mock.call_count, 2)
+
+    def test_disk_cache_reused(self):
+        """测试内存缓存清空后（相当于新的子进程）直接读取磁盘缓存"""
+        step_loader.warm_step_cache([{"file_path": self.excel_path, "sheet_name": "Sheet1"}])
+        step_loader.clear_cache()
+        self.assertEqual(step_loader.get_sheet_names(self.excel_path), ["Sheet1", "Sheet2"])
+        self.assertEqual(step_loader.load_steps(self.excel_path, "Sheet2")[0]["关键字"], "click")
+        self.assertEqual(self.parse_mock.call_count, 1)
+
+    def test_touched_workbook_uses_disk_cache(self):
+        """测试只改动修改时间、内容未变时沿用磁盘缓存"""
+        step_loader.load_steps(self.excel_path, "Sheet1")
+        stat = os.stat(self.excel_path)
+        os.utime(self.excel_path, (stat.st_atime, stat.st_mtime + 10))
+        step_loader.load_steps(self.excel_path, "Sheet1")
+        self.assertEqual(self.parse_mock.call_count, 1)
+
+    def test_disk_cache_keyed_by_content(self):
+        """测试工作簿内容变化后磁盘缓存失效"""
+        step_loader.load_steps(self.excel_path, "Sheet1")
+        step_loader.clear_cache()
+        with open(self.excel_path, 'wb') as f:
+            f.write(b"changed content")
+        step_loader.load_steps(self.excel_path, "Sheet1")
+        self.assertEqual(self.parse_mock.call_count, 2)
+
+    def test_corrupt_disk_cache_reparsed(self):
+        """测试磁盘缓存损坏时重新解析工作簿"""
+        step_loader.load_steps(self.excel_path, "Sheet1")
+        step_loader.clear_cache()
+        for cache_name in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, cache_name, "0.json"), 'w', encoding='utf-8') as f:
+                f.write("{broken")
+        self.assertEqual(step_loader.load_steps(self.excel_path, "Sheet1")[0]["关键字"], "open")
+        self.assertEqual(self.parse_mock.call_count, 2)
+
+    def test_old_cache_dirs_pruned(self):
+        """测试写入新缓存时删除其他版本的目录，当前版本只保留最近使用的 MAX_CACHE_ENTRIES 个"""
+        def make_cache_dir(name, age):
+            path = os.path.join(self.cache_dir, name)
+            os.makedirs(path)
+            stamp = os.stat(self.temp_dir).st_mtime - age
+            os.utime(path, (stamp, stamp))
+            return path
+
+        old_version = make_cache_dir(f"v{step_loader.CACHE_VERSION - 1}_{'a' * 40}", 0)
+        recent = make_cache_dir(f"v{step_loader.CACHE_VERSION}_{'b' * 40}", 10)
+        oldest = make_cache_dir(f"v{step_loader.CACHE_VERSION}_{'c' * 40}", 20)
+        unrelated = make_cache_dir("notes", 30)
+
+        with mock.patch.object(step_loader, "MAX_CACHE_ENTRIES", 2):
+            step_loader.load_steps(self.excel_path, "Sheet1")
+
+        self.assertFalse(os.path.exists(old_version))
+        self.assertTrue(os.path.exists(recent))
+        self.assertFalse(os.path.exists(oldest))
+        self.assertTrue(os.path.exists(unrelated))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+    def test_non_json_cells_not_cached(self):
+        """测试含有日期单元格的工作簿不写入磁盘缓存，读到的类型始终与解析结果一致"""
+        from datetime import datetime
+        sheets = {"Sheet1": [{"编号": "case_001", "数据内容": datetime(2024, 1, 2, 3, 4, 5)}]}
+        self.parse_mock.side_effect = lambda path: sheets
+        self.assertIsInstance(step_loader.load_steps(self.excel_path, "Sheet1")[0]["数据内容"], datetime)
+        self.assertFalse(os.path.exists(self.cache_dir) and os.listdir(self.cache_dir))
+
+        step_loader.clear_cache()
+        self.assertIsInstance(step_loader.load_steps(self.excel_path, "Sheet1")[0]["数据内容"], datetime)
+        self.assertEqual(self.parse_mock.call_count, 2)
+
+    def test_sheet_selection(self):
+        """测试按序号选择Sheet以及Sheet不存在的情况"""
+        self.assertEqual(step_loader.load_steps(self.excel_path, 1)[0]["关键字"], "click")
+        with self.assertRaises(ValueError):
+            step_loader.load_steps(self.excel_path, "Missing")
+        with self.assertRaises(ValueError):
+            step_loader.load_steps(self.excel_path, 5)
+
+    def test_missing_file(self):
+        """测试文件不存在"""
+        with self.assertRaises(FileNotFoundError):
+            step_loader.load_steps(os.path.join(self.temp_dir, "none.xlsx"), "Sheet1")
+
+class FakeWorksheet:
+    """模拟 openpyxl 只读工作表"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def iter_rows(self, values_only=True):
+        return iter(self.rows)
+
+
+class TestSheetRows(unittest.TestCase):
+    """测试Excel行到步骤字典的转换规则"""
+
+    def test_blank_cells_and_rows(self):
+        """测试空单元格转为空字符串、空行被跳过"""
+        worksheet = FakeWorksheet([
+            ("编号", "关键字", "数据内容", None),
+            ("case_001", "open", None, None),
+            (None, None, None, None),
+            ("case_002", "wait", 2, None),
+        ])
+        steps = list(step_loader._iter_sheet_rows(worksheet))
+        self.assertEqual(steps, [
+            {"编号": "case_001", "关键字": "open", "数据内容": ""},
+            {"编号": "case_002", "关键字": "wait", "数据内容": 2},
+        ])
+
+    def test_header_names(self):
+        """测试空表头和重复表头的命名与 pandas 一致"""
+        self.assertEqual(step_loader._header_names(["编号", None, "描述", "描述"]),
+                         ["编号", "Unnamed: 1", "描述", "描述.1"])
+
+    def test_values_beyond_header(self):
+        """测试超出表头范围的数据列"""
+        worksheet = FakeWorksheet([("编号",), ("case_001", "extra")])
+        self.assertEqual(list(step_loader._iter_sheet_rows(worksheet)),
+                         [{"编号": "case_001", "Unnamed: 1": "extra"}])
+
+    def test_sparse_trailing_column(self):
+        """测试只有部分行有值的表头外列：与 pandas 一致补齐中间的列，所有步骤都包含全部列"""
+        worksheet = FakeWorksheet([
+            ("编号", "关键字"),
+            ("a", "open"),
+            ("b", "click", None, "note"),
+        ])
+        self.assertEqual(list(step_loader._iter_sheet_rows(worksheet)), [
+            {"编号": "a", "关键字": "open", "Unnamed: 2": "", "Unnamed: 3": ""},
+            {"编号": "b", "关键字": "click", "Unnamed: 2": "", "Unnamed: 3": "note"},
+        ])
+
+    def test_empty_sheet(self):
+        """测试空Sheet"""
+        self.assertEqual(list(step_loader._iter_sheet_rows(FakeWorksheet([]))), [])
+
+if __name__ == '__main__':
+    unittest.main()
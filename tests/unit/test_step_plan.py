@@ -0,0 +1,128 @@
+# tests/unit/test_step_plan.py
+"""
+测试步骤执行计划单元测试
+
+测试数据内容预解析、关键字处理函数解析以及格式错误汇总
+"""
+import unittest
+import sys
+import os
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.step_plan import (
+    PARSED_ARGS_KEY, PLANNED_STEP_KEY, compile_plan, format_plan_errors, get_step_args, planned_step_of,
+    parse_open_args, parse_position_args, parse_scroll_args, parse_window_size_args
+)
+
+class FakeKeywords:
+    """模拟 Keywords 类，只提供测试用到的关键字"""
+    DEFAULT_TIMEOUT = 10000
+
+    def open(self, **kwargs):
+        return ('open', kwargs)
+
+    def click(self, **kwargs):
+        return ('click', kwargs)
+
+    def scroll_page(self, **kwargs):
+        return ('scroll_page', kwargs)
+
+class TestArgumentParsers(unittest.TestCase):
+    """测试数据内容解析函数"""
+
+    def test_open(self):
+        """测试打开页面的URL与超时解析"""
+        self.assertEqual(parse_open_args("https://a.com"), ("https://a.com", None))
+        self.assertEqual(parse_open_args("https://a.com, 60"), ("https://a.com", 60000))
+        with self.assertRaises(ValueError):
+            parse_open_args("https://a.com,abc")
+
+    def test_position(self):
+        """测试坐标解析"""
+        self.assertEqual(parse_position_args("x=0.5, y=0.25"), (0.5, 0.25))
+        with self.assertRaises(ValueError):
+            parse_position_args("0.5,0.5")
+
+    def test_window_size(self):
+        """测试窗口大小解析"""
+        self.assertEqual(parse_window_size_args("1920x1080"), (1920, 1080))
+        with self.assertRaises(ValueError):
+            parse_window_size_args("1920*1080")
+
+    def test_scroll(self):
+        """测试滚动距离解析"""
+        self.assertEqual(parse_scroll_args("0,-500"), (0, -500))
+        with self.assertRaises(ValueError):
+            parse_scroll_args("down")
+
+    def test_get_step_args_prefers_parsed(self):
+        """测试关键字优先使用预解析参数"""
+        self.assertEqual(get_step_args('scroll_page', {'数据内容': 'bad', PARSED_ARGS_KEY: (0, 100)}), (0, 100))
+        self.assertEqual(get_step_args('scroll_page', {}), (0, 500))
+        self.assertIsNone(get_step_args('click', {'数据内容': 'anything'}))
+
+class TestCompilePlan(unittest.TestCase):
+    """测试执行计划编译"""
+
+    def test_valid_plan(self):
+        """测试处理函数解析与参数预解析"""
+        plan = compile_plan([
+            {'编号': 'case_001', '关键字': 'open', '数据内容': 'https://a.com,30'},
+            {'编号': 'case_002', '关键字': 'click', '数据内容': ''},
+        ], keywords_class=FakeKeywords)
+        self.assertEqual(plan.errors, [])
+        first, second = plan.steps
+        self.assertEqual(first.kwargs[PARSED_ARGS_KEY], ('https://a.com', 30000))
+        self.assertNotIn(PARSED_ARGS_KEY, second.kwargs)
+        keyword, kwargs = first.bind(FakeKeywords())(**first.kwargs)
+        self.assertEqual(keyword, 'open')
+        self.assertEqual(kwargs['编号'], 'case_001')
+
+    def test_session_param_round_trip(self):
+        """测试Session模式参数化的步骤字典能取回编译后的步骤，调用关键字时不带该引用"""
+        plan = compile_plan([{'编号': 'case_001', '关键字': 'open', '数据内容': 'https://a.com'}],
+                            keywords_class=FakeKeywords)
+        param = plan.steps[0].as_param()
+        self.assertEqual(param['编号'], 'case_001')
+        planned = planned_step_of(param)
+        self.assertIs(planned, plan.steps[0])
+        keyword, kwargs = planned.bind(FakeKeywords())(**planned.kwargs)
+        self.assertEqual(keyword, 'open')
+        self.assertNotIn(PLANNED_STEP_KEY, kwargs)
+        self.assertIsNone(planned_step_of({'编号': 'case_001'}))
+
+    def test_errors_collected_across_sheet(self):
+        """测试所有格式错误一次性汇总"""
+        plan = compile_plan([
+            {'编号': 'case_001', '关键字': 'missing_keyword'},
+            {'编号': 'case_002', '关键字': 'scroll_page', '数据内容': 'down'},
+            {'编号': 'case_003', '关键字': 'DEFAULT_TIMEOUT'},
+        ], keywords_class=FakeKeywords, name="flow.xlsx [Sheet1]")
+        self.assertEqual(len(plan.errors), 3)
+        self.assertIn("case_002", plan.errors[1])
+        report = format_plan_errors([plan])
+        self.assertIn("共 3 处错误", report)
+        self.assertIn("flow.xlsx [Sheet1]", report)
+
+    def test_skipped_try_and_ended_steps_not_validated(self):
+        """测试跳过、尝试执行和终止之后的步骤不视为错误"""
+        plan = compile_plan([
+            {'编号': 'case_001', '关键字': 'missing_keyword', '执行状态': 'skip'},
+            {'编号': 'case_002', '关键字': 'scroll_page', '数据内容': 'down', '执行状态': 'try'},
+            {'编号': 'case_003', '关键字': 'click', '执行状态': 'end'},
+            {'编号': 'case_004', '关键字': 'missing_keyword'},
+        ], keywords_class=FakeKeywords)
+        self.assertEqual(plan.errors, [])
+        self.assertEqual(format_plan_errors([plan]), '')
+
+    def test_empty_keyword(self):
+        """测试关键字为空的步骤"""
+        plan = compile_plan([{'编号': 'case_001', '关键字': ''}], keywords_class=FakeKeywords)
+        self.assertEqual(plan.errors, [])
+        self.assertIsNone(plan.steps[0].bind(FakeKeywords()))
+
+if __name__ == '__main__':
+    unittest.main()
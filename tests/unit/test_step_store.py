@@ -0,0 +1,80 @@
+# tests/unit/test_step_store.py
+"""
+步骤溢出存储单元测试
+
+测试内存窗口、写入JSONL后按顺序读回、清空以及临时文件清理
+"""
+import unittest
+import sys
+import os
+import tempfile
+from dataclasses import dataclass, field
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.step_store import StepStore
+
+
+@dataclass
+class FakeStep:
+    order: int
+    keyword: str = 'click'
+    before_screenshot: str = None
+    details: dict = field(default_factory=dict)
+
+
+class TestStepStore(unittest.TestCase):
+    """步骤溢出存储测试类"""
+
+    def setUp(self):
+        self.store = StepStore(window=3, factory=FakeStep)
+        self.addCleanup(self.store.close)
+
+    def test_window_bounds_memory(self):
+        """测试内存中只保留最近的步骤，其余写入文件，遍历时顺序不变"""
+        for order in range(1, 11):
+            self.store.append(FakeStep(order, details={'目标对象': f'btn{order}'}))
+        self.assertEqual(len(self.store), 10)
+        self.assertEqual(self.store.spilled, 7)
+        self.assertEqual([step.order for step in self.store.recent], [8, 9, 10])
+
+        steps = list(self.store)
+        self.assertEqual([step.order for step in steps], list(range(1, 11)))
+        self.assertEqual(steps[0], FakeStep(1, details={'目标对象': 'btn1'}))
+
+    def test_recent_steps_stay_mutable(self):
+        """测试仍在窗口中的步骤被修改后，写入文件时保存的是修改后的内容"""
+        first = FakeStep(1)
+        self.store.append(first)
+        first.before_screenshot = "r1_f1"
+        for order in range(2, 5):
+            self.store.append(FakeStep(order))
+        self.assertEqual(next(iter(self.store)).before_screenshot, "r1_f1")
+
+    def test_clear(self):
+        """测试清空后文件和内存中的步骤都被移除"""
+        for order in range(1, 6):
+            self.store.append(FakeStep(order))
+        self.store.clear()
+        self.assertFalse(self.store)
+        self.store.append(FakeStep(1))
+        self.assertEqual([step.order for step in self.store], [1])
+
+    def test_close_removes_temporary_file(self):
+        """测试使用临时文件时 close() 删除文件，指定路径时保留文件"""
+        self.store.close()
+        self.assertFalse(os.path.exists(self.store.path))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "steps.jsonl")
+            store = StepStore(window=1, path=path)
+            store.append({"order": 1})
+            store.append({"order": 2})
+            self.assertEqual(list(store), [{"order": 1}, {"order": 2}])
+            store.close()
+            self.assertTrue(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# tests/unit/test_step_timing.py
+"""
+步骤耗时分解单元测试
+
+测试嵌套阶段的独占计时、截图编码时间的归属以及JSON Lines导出
+"""
+import unittest
+import sys
+import os
+import json
+import tempfile
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.step_timing import (
+    StepTimer, with_encode_time, format_timings, timing_records, append_timing_records,
+    PHASE_ACTION, PHASE_LOCATOR, PHASE_PAGE, PHASE_LOGGER, PHASE_SCREENSHOT, PHASE_ENCODE
+)
+
+
+class FakeClock:
+    """可手动推进的时钟（秒）"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestStepTimer(unittest.TestCase):
+    """步骤计时器测试类"""
+
+    def test_nested_phases_are_exclusive(self):
+        """测试外层阶段不包含内层阶段的耗时"""
+        clock = FakeClock()
+        timer = StepTimer(clock)
+        with timer.phase(PHASE_LOGGER):
+            clock.advance(0.001)
+            with timer.phase(PHASE_SCREENSHOT):
+                clock.advance(0.080)
+        with timer.phase(PHASE_ACTION):
+            clock.advance(0.050)
+            with timer.phase(PHASE_LOCATOR):
+                clock.advance(0.010)
+                with timer.phase(PHASE_PAGE):
+                    clock.advance(0.200)
+            with timer.phase(PHASE_LOCATOR):
+                clock.advance(0.005)
+
+        self.assertEqual(timer.breakdown(), {
+            PHASE_PAGE: 200.0, PHASE_LOCATOR: 15.0, PHASE_ACTION: 50.0,
+            PHASE_SCREENSHOT: 80.0, PHASE_LOGGER: 1.0,
+        })
+        self.assertEqual(list(timer.breakdown()), [PHASE_PAGE, PHASE_LOCATOR, PHASE_ACTION, PHASE_SCREENSHOT, PHASE_LOGGER])
+
+    def test_phase_recorded_on_exception(self):
+        """测试阶段中抛出异常时耗时仍被记录"""
+        clock = FakeClock()
+        timer = StepTimer(clock)
+        with self.assertRaises(RuntimeError):
+            with timer.phase(PHASE_ACTION):
+                clock.advance(0.002)
+                raise RuntimeError("boom")
+        self.assertEqual(timer.breakdown(), {PHASE_ACTION: 2.0})
+
+    def test_encode_time_counted_once(self):
+        """测试同一帧的编码时间只计入第一个引用它的步骤"""
+        encode_ms = {"f1": 30.0, "f2": 12.5}.get
+        seen = set()
+        first = with_encode_time({PHASE_ACTION: 5.0}, ["f1", "f2"], encode_ms, seen)
+        second = with_encode_time({PHASE_ACTION: 3.0}, ["f2", "f3"], encode_ms, seen)
+        self.assertEqual(first, {PHASE_ACTION: 5.0, PHASE_ENCODE: 42.5})
+        self.assertEqual(second, {PHASE_ACTION: 3.0})
+        self.assertEqual(format_timings(first), "action 5 · encode 42.5")
+
+    def test_timing_records_export(self):
+        """测试耗时记录导出为JSON Lines并带上附加字段"""
+        steps = [
+            SimpleNamespace(order=1, step_id='1', keyword='click', description='点击', status='PASS', duration=120,
+                            before_screenshot='f1', after_screenshot='f2', timings={PHASE_ACTION: 40.0}),
+            SimpleNamespace(order=2, step_id='2', keyword='fill', description='输入', status='FAIL', duration=80,
+                            before_screenshot='f2', after_screenshot=None, timings={}),
+        ]
+        records = timing_records(steps, {"f1": 10.0, "f2": 20.0}.get)
+        self.assertEqual(records[0]['timings_ms'], {PHASE_ACTION: 40.0, PHASE_ENCODE: 30.0})
+        self.assertEqual(records[1]['timings_ms'], {})
+        self.assertEqual(timing_records(steps)[0]['timings_ms'], {PHASE_ACTION: 40.0})
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "report_timings.jsonl")
+            append_timing_records(path, records, test="test_flow[1]", browser="chromium")
+            append_timing_records(path, [])
+            with open(path, encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]['test'], "test_flow[1]")
+        self.assertEqual(lines[1]['description'], '输入')
+
+if __name__ == '__main__':
+    unittest.main()
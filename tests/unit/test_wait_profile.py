@@ -0,0 +1,80 @@
+# tests/unit/test_wait_profile.py
+"""
+页面等待档位单元测试
+
+测试预置档位、全局配置与流程覆盖的叠加以及无效配置的回退
+"""
+import unittest
+import sys
+import os
+import io
+from contextlib import redirect_stdout
+
+# 添加项目根目录到路径
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, project_root)
+
+from framework.utils.wait_profile import (
+    WaitProfile, WAIT_PROFILES, WAIT_FAST, WAIT_DEFAULT, WAIT_TOLERANT,
+    resolve_wait_profile, normalize_wait_profile_name
+)
+
+
+class TestWaitProfile(unittest.TestCase):
+    """页面等待档位测试类"""
+
+    def test_default_matches_legacy_waits(self):
+        """测试默认档位与旧版固定的等待时间一致"""
+        profile = resolve_wait_profile()
+        self.assertEqual(profile, WaitProfile())
+        self.assertEqual((profile.page_create_ms, profile.page_ready_ms, profile.networkidle_ms), (8000, 15000, 3000))
+        self.assertEqual((profile.recover_load_ms, profile.reload_ms, profile.reload_load_ms), (2000, 5000, 3000))
+        self.assertTrue(profile.waits_for_networkidle)
+
+    def test_named_profiles(self):
+        """测试按档位名选择预置档位"""
+        self.assertIs(resolve_wait_profile("fast"), WAIT_PROFILES[WAIT_FAST])
+        self.assertFalse(WAIT_PROFILES[WAIT_FAST].waits_for_networkidle)
+        self.assertIs(resolve_wait_profile({"profile": " Tolerant "}), WAIT_PROFILES[WAIT_TOLERANT])
+        self.assertEqual(normalize_wait_profile_name("DEFAULT"), WAIT_DEFAULT)
+        with self.assertRaises(ValueError):
+            normalize_wait_profile_name("slow")
+
+    def test_flow_overrides_global(self):
+        """测试流程配置叠加在全局配置之上，流程指定档位时以该档位为基础"""
+        global_config = {"profile": "tolerant", "networkidle_ms": 0}
+        profile = resolve_wait_profile(global_config)
+        self.assertEqual(profile.name, WAIT_TOLERANT)
+        self.assertFalse(profile.waits_for_networkidle)
+
+        profile = resolve_wait_profile(global_config, {"page_ready_ms": "20000"})
+        self.assertEqual(profile.page_ready_ms, 20000)
+        self.assertEqual(profile.networkidle_ms, 0)
+
+        profile = resolve_wait_profile(global_config, "default")
+        self.assertEqual(profile, WAIT_PROFILES[WAIT_DEFAULT])
+
+    def test_invalid_config_falls_back(self):
+        """测试无法识别的档位名和配置项打印提示后忽略"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            profile = resolve_wait_profile({"profile": "slow", "reload_ms": "abc", "typo_ms": 1})
+        self.assertEqual(profile.name, WAIT_DEFAULT)
+        self.assertEqual(profile.reload_ms, 5000)
+        self.assertIn("slow", output.getvalue())
+        self.assertIn("typo_ms", output.getvalue())
+
+    def test_non_positive_waits(self):
+        """测试只有 networkidle_ms 可以为 0，其他等待至少 1 毫秒，不会变成无限等待（timeout=0）"""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            profile = resolve_wait_profile({"page_create_ms": -5, "page_ready_ms": 0, "reload_load_ms": "0",
+                                            "networkidle_ms": -1})
+        self.assertEqual((profile.page_create_ms, profile.page_ready_ms, profile.reload_load_ms), (1, 1, 1))
+        self.assertEqual(profile.networkidle_ms, 0)
+        self.assertFalse(profile.waits_for_networkidle)
+        self.assertIn("page_create_ms", output.getvalue())
+        self.assertNotIn("networkidle_ms", output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()